@@ -0,0 +1,428 @@
+"""
+Athlete / Match Database
+========================
+Embedded SQLite database built from athlete profiles and parsed brackets.
+
+Tables: athletes, competitions, events, categories, matches. Indexed on
+country, category, event, normalized name and canonical athlete id (from
+the identity index) so dashboard queries don't scan every match. Event
+and category names have FTS5 trigram indexes (event_search,
+category_search) for substring lookups.
+
+Usage:
+    python athlete_db.py              # Rebuild Cache/jjif.sqlite
+    python athlete_db.py --info       # Show row counts
+"""
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from match_store import load_match_table, MATCHES_TABLE, MATCHES_JSON
+from profile_store import load_profiles, PROFILES_JSON
+from identity_index import load_identity_index, name_forms, IDENTITY_FILE
+
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = BASE_DIR / "Cache"
+DB_FILE = CACHE_DIR / "jjif.sqlite"
+
+# Bump when the schema changes - older files are rebuilt
+SCHEMA_VERSION = 5
+
+# Inputs of the database; their fingerprint is stored in the meta table
+DB_SOURCES = (PROFILES_JSON, MATCHES_TABLE, MATCHES_JSON, IDENTITY_FILE)
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE athletes (
+    id INTEGER PRIMARY KEY,
+    profile_id TEXT,
+    name TEXT,
+    name_norm TEXT,
+    country_code TEXT,
+    country TEXT
+);
+CREATE TABLE competitions (
+    id INTEGER PRIMARY KEY,
+    athlete_id INTEGER REFERENCES athletes(id),
+    category TEXT,
+    event TEXT,
+    event_type TEXT,
+    date TEXT,
+    rank INTEGER,
+    wins INTEGER,
+    medal TEXT
+);
+CREATE TABLE events (
+    id INTEGER PRIMARY KEY,
+    verid TEXT,
+    name TEXT,
+    name_upper TEXT
+);
+CREATE TABLE categories (
+    id INTEGER PRIMARY KEY,
+    event_id INTEGER REFERENCES events(id),
+    catid TEXT,
+    name TEXT,
+    name_upper TEXT
+);
+CREATE TABLE matches (
+    id INTEGER PRIMARY KEY,
+    event_id INTEGER REFERENCES events(id),
+    category_id INTEGER REFERENCES categories(id),
+    round TEXT,
+    red_name TEXT,
+    red_norm TEXT,
+    red_country TEXT,
+    red_federation TEXT,
+    red_score INTEGER,
+    red_athlete TEXT,
+    blue_name TEXT,
+    blue_norm TEXT,
+    blue_country TEXT,
+    blue_federation TEXT,
+    blue_score INTEGER,
+    blue_athlete TEXT,
+    winner_side TEXT
+);
+
+CREATE INDEX idx_athletes_country ON athletes(country_code);
+CREATE INDEX idx_athletes_name_norm ON athletes(name_norm);
+CREATE INDEX idx_athletes_profile_id ON athletes(profile_id);
+CREATE INDEX idx_competitions_athlete ON competitions(athlete_id);
+CREATE INDEX idx_competitions_category ON competitions(category);
+CREATE INDEX idx_competitions_event ON competitions(event);
+CREATE INDEX idx_categories_event ON categories(event_id);
+CREATE INDEX idx_matches_category ON matches(category_id);
+CREATE INDEX idx_matches_event ON matches(event_id);
+CREATE INDEX idx_matches_red_country ON matches(red_country);
+CREATE INDEX idx_matches_blue_country ON matches(blue_country);
+CREATE INDEX idx_matches_red_norm ON matches(red_norm);
+CREATE INDEX idx_matches_blue_norm ON matches(blue_norm);
+CREATE INDEX idx_matches_red_athlete ON matches(red_athlete);
+CREATE INDEX idx_matches_blue_athlete ON matches(blue_athlete);
+
+-- Substring search on names; rowid is events.id / categories.id
+CREATE VIRTUAL TABLE event_search USING fts5(name_upper, tokenize='trigram');
+CREATE VIRTUAL TABLE category_search USING fts5(name_upper, tokenize='trigram');
+"""
+
+
+def normalize_name(name):
+    """Order-independent name key: 'SURNAME FIRST' == 'FIRST SURNAME'."""
+    forms = name_forms(name)
+    return forms[0] if forms else ''
+
+
+def _int(v):
+    """Plain int or None for a table/profile value."""
+    if v is None or v is pd.NA:
+        return None
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(v):
+    """Plain str or None for a table value."""
+    return v if isinstance(v, str) else None
+
+
+def source_fingerprint():
+    """Size and mtime of every database input, as a JSON string."""
+    fingerprint = {}
+    for source in DB_SOURCES:
+        if source.exists():
+            stat = source.stat()
+            fingerprint[source.name] = [stat.st_size, stat.st_mtime_ns]
+        else:
+            fingerprint[source.name] = None
+    return json.dumps(fingerprint, sort_keys=True)
+
+
+def build_database(db_file=None):
+    """Build the SQLite database from profiles and the match table."""
+    db_file = Path(db_file) if db_file else DB_FILE
+    db_file.parent.mkdir(exist_ok=True)
+    print("Building athlete/match database...")
+
+    # A private temp file - dashboard sessions or processes may rebuild at the same time
+    with tempfile.NamedTemporaryFile(dir=db_file.parent, prefix=f"{db_file.stem}.", suffix='.tmp',
+                                     delete=False) as f:
+        tmp_file = Path(f.name)
+
+    # Rebuilds a stale identity index first, so the fingerprint sees the new file
+    identity = load_identity_index()
+    # Taken before the inputs are read - one that changes mid-build makes the result stale
+    fingerprint = source_fingerprint()
+
+    conn = sqlite3.connect(tmp_file)
+    try:
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT INTO meta (key, value) VALUES ('sources', ?)", (fingerprint,))
+
+        # Athletes + competitions
+        profiles = load_profiles()
+        for p in profiles:
+            cur = conn.execute(
+                "INSERT INTO athletes (profile_id, name, name_norm, country_code, country) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (p.get('profile_id'), p.get('name'), normalize_name(p.get('name')),
+                 p.get('country_code'), p.get('country'))
+            )
+            athlete_id = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO competitions (athlete_id, category, event, event_type, date, rank, wins, medal) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(athlete_id, cat.get('category'), comp.get('event'), comp.get('event_type'),
+                  comp.get('date'), _int(comp.get('rank')), _int(comp.get('wins')), comp.get('medal'))
+                 for cat in p.get('categories', []) for comp in cat.get('competitions', [])]
+            )
+
+        # Events, categories, matches
+        df = load_match_table()
+        n_matches = 0
+        if df is not None:
+            event_ids = {}
+            category_ids = {}
+            for row in df.to_dict('records'):
+                verid = _text(row['verid']) or ''
+                if verid not in event_ids:
+                    name = _text(row['event']) or ''
+                    event_ids[verid] = conn.execute(
+                        "INSERT INTO events (verid, name, name_upper) VALUES (?, ?, ?)",
+                        (verid, name, name.upper())
+                    ).lastrowid
+
+                catid = _text(row['catid']) or ''
+                if (verid, catid) not in category_ids:
+                    name = _text(row['category']) or ''
+                    category_ids[(verid, catid)] = conn.execute(
+                        "INSERT INTO categories (event_id, catid, name, name_upper) VALUES (?, ?, ?, ?)",
+                        (event_ids[verid], catid, name, name.upper())
+                    ).lastrowid
+
+                corners = {}
+                for side in ('red', 'blue'):
+                    name = _text(row[f'{side}_name'])
+                    country = _text(row[f'{side}_country'])
+                    federation = _text(row[f'{side}_federation'])
+                    corners[side] = (name, normalize_name(name), country, federation, _int(row[f'{side}_score']),
+                                     identity.resolve(name, country or '', federation) if name else None)
+
+                conn.execute(
+                    "INSERT INTO matches (event_id, category_id, round, "
+                    "red_name, red_norm, red_country, red_federation, red_score, red_athlete, "
+                    "blue_name, blue_norm, blue_country, blue_federation, blue_score, blue_athlete, winner_side) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (event_ids[verid], category_ids[(verid, catid)], _text(row['round']) or '',
+                     *corners['red'], *corners['blue'], _text(row['winner_side']))
+                )
+                n_matches += 1
+
+        conn.execute("INSERT INTO event_search (rowid, name_upper) SELECT id, name_upper FROM events")
+        conn.execute("INSERT INTO category_search (rowid, name_upper) SELECT id, name_upper FROM categories")
+
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp_file.unlink(missing_ok=True)
+        raise
+    conn.close()
+
+    # NamedTemporaryFile is private (0600) - keep the database readable like the other caches
+    os.chmod(tmp_file, 0o644)
+    os.replace(tmp_file, db_file)
+    print(f"  Stored {len(profiles)} athletes and {n_matches} matches in {db_file.name}")
+    return db_file
+
+
+def database_is_stale(db_file=None):
+    """True if the database is missing, from an old schema, or built from other inputs.
+
+    Compares the input fingerprint stored at build time with the inputs now.
+    """
+    db_file = Path(db_file) if db_file else DB_FILE
+    if not db_file.exists():
+        return True
+
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            return True
+        row = conn.execute("SELECT value FROM meta WHERE key = 'sources'").fetchone()
+    except sqlite3.DatabaseError:
+        return True
+    finally:
+        conn.close()
+    return row is None or row[0] != source_fingerprint()
+
+
+def connect_db(db_file=None, check_same_thread=True):
+    """Open a read-only connection, rebuilding the database if it is stale.
+
+    check_same_thread=False lets one connection be shared by threads (the
+    dashboard keeps one per database file). Returns None when there is no
+    data to build from.
+    """
+    db_file = Path(db_file) if db_file else DB_FILE
+    if database_is_stale(db_file):
+        if not PROFILES_JSON.exists() and not MATCHES_TABLE.exists() and not MATCHES_JSON.exists():
+            return None
+        build_database(db_file)
+
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+MATCH_SELECT = """
+    SELECT m.id, e.name AS event, c.name AS category, m.round,
+           m.red_name, m.red_country, m.red_federation, m.red_score,
+           m.blue_name, m.blue_country, m.blue_federation, m.blue_score, m.winner_side,
+           m.red_athlete, m.blue_athlete
+    FROM matches m
+    JOIN events e ON e.id = m.event_id
+    JOIN categories c ON c.id = m.category_id
+"""
+
+
+def _corner(row, side):
+    """Corner dict for a match row ({} for a BYE)."""
+    name = row[f'{side}_name']
+    country = row[f'{side}_country']
+    if name is None and country is None:
+        return {}
+    return {
+        'name': name or '',
+        'country': country or '',
+        'federation': row[f'{side}_federation'] or '',
+        'score': row[f'{side}_score']
+    }
+
+
+def match_row_to_dict(row):
+    """Match dict with red/blue corners and winner, from a MATCH_SELECT row."""
+    red = _corner(row, 'red')
+    blue = _corner(row, 'blue')
+    winner = red if row['winner_side'] == 'red' else blue if row['winner_side'] == 'blue' else None
+    return {
+        'match_id': row['id'],
+        'event': row['event'],
+        'category': row['category'],
+        'round': row['round'],
+        'red': red,
+        'blue': blue,
+        'red_athlete': row['red_athlete'],
+        'blue_athlete': row['blue_athlete'],
+        'winner_side': row['winner_side'],
+        'winner': winner.get('name') if winner else None,
+        'winner_country': winner.get('country') if winner else None
+    }
+
+
+def find_matches_by_athlete(conn, athlete_ids):
+    """Matches where either corner is one of the canonical athlete ids."""
+    ids = list(athlete_ids)
+    if not ids:
+        return []
+
+    placeholders = ','.join('?' * len(ids))
+    rows = conn.execute(
+        MATCH_SELECT +
+        f"WHERE m.red_athlete IN ({placeholders}) OR m.blue_athlete IN ({placeholders}) ORDER BY m.id",
+        ids + ids
+    ).fetchall()
+    return [match_row_to_dict(r) for r in rows]
+
+
+def _name_search(table, terms):
+    """Subquery for the ids whose name contains any of the terms.
+
+    Terms of 3+ characters go through the trigram index; shorter ones
+    (which the index can't serve) scan the name table, never the matches.
+    """
+    parts = []
+    params = []
+    long_terms = [t for t in terms if len(t) >= 3]
+    if long_terms:
+        parts.append(f"SELECT rowid FROM {table} WHERE {table} MATCH ?")
+        params.append(' OR '.join('"' + t.replace('"', '""') + '"' for t in long_terms))
+    for t in terms:
+        if len(t) < 3:
+            parts.append(f"SELECT rowid FROM {table} WHERE instr(name_upper, ?) > 0")
+            params.append(t)
+    return ' UNION '.join(parts), params
+
+
+def query_category_matches(conn, event_name=None, category_name=None, country=None):
+    """Matches from events whose name contains any word of event_name,
+    in categories containing category_name, optionally involving country.
+
+    Event and category names are looked up in their trigram indexes, and
+    the matches are then read through the event/category indexes.
+    """
+    where = []
+    params = []
+
+    event_words = event_name.upper().split() if event_name else []
+    if event_words:
+        sql, sql_params = _name_search('event_search', event_words)
+        where.append(f'm.event_id IN ({sql})')
+        params.extend(sql_params)
+
+    if category_name:
+        sql, sql_params = _name_search('category_search', [category_name.upper()])
+        where.append(f'm.category_id IN ({sql})')
+        params.extend(sql_params)
+
+    if country:
+        where.append('(m.red_country = ? OR m.blue_country = ?)')
+        params.extend([country, country])
+
+    sql = MATCH_SELECT + (' WHERE ' + ' AND '.join(where) if where else '') + ' ORDER BY m.id'
+    return [match_row_to_dict(r) for r in conn.execute(sql, params).fetchall()]
+
+
+def count_country_matches(conn, country_codes):
+    """Number of matches with at least one athlete from country_codes."""
+    codes = list(country_codes)
+    placeholders = ','.join('?' * len(codes))
+    return conn.execute(
+        f"SELECT COUNT(*) FROM matches WHERE red_country IN ({placeholders}) OR blue_country IN ({placeholders})",
+        codes + codes
+    ).fetchone()[0]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Build the SQLite athlete/match database')
+    parser.add_argument('--info', action='store_true', help='Show row counts')
+    args = parser.parse_args()
+
+    if args.info:
+        conn = connect_db()
+        if conn is None:
+            print("No data found")
+        else:
+            for table in ('athletes', 'competitions', 'events', 'categories', 'matches'):
+                n = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                print(f"{table:<14} {n:>8}")
+            conn.close()
+    else:
+        build_database()
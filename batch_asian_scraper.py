@@ -9,6 +9,13 @@ Usage:
     python batch_asian_scraper.py --limit 5    # Scrape first 5 unscraped events
     python batch_asian_scraper.py --verid 814  # Scrape specific event
     python batch_asian_scraper.py --status     # Show scraping status
+    python batch_asian_scraper.py --pages 4 --rate 1   # Fetch 4 categories at once, max 1 request/sec
+    python batch_asian_scraper.py --events 2 --pages 4 # Also scrape 2 events at once
+    python batch_asian_scraper.py --sync       # Original one-page loop instead of the asyncio engine
+    python batch_asian_scraper.py --http --pages 8 --rate 4   # Brackets over HTTP after the CAPTCHA
+    python batch_asian_scraper.py --no-block   # Also load images, CSS and third-party requests
+
+Runs on the asyncio engine (scrape_engine.py) unless --sync is given.
 """
 
 import json
@@ -18,13 +25,19 @@ from datetime import datetime
 from pathlib import Path
 from playwright.sync_api import sync_playwright
 
+import scrape_engine
+from bracket_http import session_from_context, fetch_all
+from scrape_common import (BASE_URL, BracketWorker, TokenBucket, bracket_url, save_bracket, fetch_pages,
+                           wait_ready, RequestProfile, format_blocked,
+                           BRACKET_SELECTOR, CATEGORY_SELECTOR, EVENT_SELECTOR,
+                           DEFAULT_PAGES, DEFAULT_RATE)
+
 BASE_DIR = Path(__file__).parent
 RESULTS_DIR = BASE_DIR / "Results"
 BRACKETS_DIR = BASE_DIR / "Brackets"
 RESULTS_DIR.mkdir(exist_ok=True)
 BRACKETS_DIR.mkdir(exist_ok=True)
 
-BASE_URL = "https://www.sportdata.org/ju-jitsu/set-online"
 VERIFIED_EVENTS_FILE = BASE_DIR / "verified_asian_events.json"
 
 
@@ -90,7 +103,8 @@ def wait_for_captcha_or_content(page, timeout=300):
             print("  Content loaded!", flush=True)
             return True
 
-        time.sleep(1)
+        # Returns as soon as category links show up
+        wait_ready(page, CATEGORY_SELECTOR, 1000)
 
     print("  Timeout", flush=True)
     return False
@@ -117,7 +131,7 @@ def get_categories(page, verid):
     print(f"  Loading categories: vernr={verid}", flush=True)
 
     page.goto(cat_url, wait_until='domcontentloaded')
-    page.wait_for_timeout(2000)
+    wait_ready(page, CATEGORY_SELECTOR)
 
     if not wait_for_captcha_or_content(page):
         return []
@@ -153,13 +167,20 @@ def get_categories(page, verid):
     return categories
 
 
-def scrape_bracket(page, verid, catid, cat_name):
-    """Scrape a single bracket."""
-    url = f"{BASE_URL}/popup_mitschrift_main.php?popup_action=mitschriftcatxml&catid={catid}&verid={verid}"
+def scrape_bracket(page, verid, catid, cat_name, worker=None, loaded=False):
+    """Scrape a single bracket.
+
+    With a BracketWorker the competitors are parsed in the background and
+    filled into the returned dict when the worker collects them.
+    loaded=True means page already shows the bracket (fetch_pages).
+    """
+    url = bracket_url(verid, catid)
 
     try:
-        page.goto(url, wait_until='domcontentloaded', timeout=30000)
-        page.wait_for_timeout(2000)
+        if not loaded:
+            page.goto(url, wait_until='domcontentloaded', timeout=30000)
+        # Rounds in the DOM (or a fully loaded page without any) - no fixed wait
+        wait_ready(page, BRACKET_SELECTOR, until_load=True)
 
         content = page.content()
 
@@ -170,53 +191,36 @@ def scrape_bracket(page, verid, catid, cat_name):
                 return None
             content = page.content()
 
-        # Save bracket HTML
-        html_file = BRACKETS_DIR / f"bracket_{verid}_{catid}.html"
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(content)
-
-        # Extract competitors
-        competitors = page.evaluate('''() => {
-            const comps = [];
-            const cells = document.querySelectorAll('.tournament-bracket__caption_info, td');
-
-            cells.forEach(cell => {
-                const text = cell.textContent.trim();
-                // Look for country code pattern
-                const match = text.match(/([A-Z]{3})\\s*$/);
-                if (match) {
-                    const name = text.replace(match[0], '').replace(/,/g, '').trim();
-                    if (name.length > 2) {
-                        comps.push({ name: name, country: match[1] });
-                    }
-                }
-            });
-
-            return [...new Map(comps.map(c => [c.name, c])).values()];
-        }''')
-
-        return {
-            'catid': catid,
-            'category': cat_name,
-            'html_saved': str(html_file),
-            'competitors': competitors
-        }
+        # Save bracket HTML; competitors come from the shared parser, off the browser's thread
+        return save_bracket(verid, catid, cat_name, content, worker)
 
     except Exception as e:
         print(f" [Error: {e}]")
         return None
 
 
-def scrape_event(page, verid):
-    """Scrape all brackets for an event."""
+def scrape_event(page, verid, worker=None, pages=1, limiter=None, session=None, profile=None):
+    """Scrape all brackets for an event (competitors parsed by worker, if given).
+
+    pages > 1 fetches that many categories at once in the page's browser
+    context, paced by limiter (a TokenBucket shared across events). With a
+    BracketSession (bracket_http.py) the brackets are fetched over HTTP
+    with the context's cookies, and only CAPTCHA pages load in the browser.
+    profile is the context's RequestProfile; its blocked requests since the
+    last event are added to the results.
+    """
     print(f"\n{'='*60}")
     print(f"SCRAPING EVENT: verid={verid}")
     print(f"{'='*60}")
 
+    if profile is not None:
+        # Start this event's count
+        profile.report()
+
     # First go to event page to get name
     event_url = f"{BASE_URL}/veranstaltung_info_main.php?active_menu=calendar&vernr={verid}#a_eventhead"
     page.goto(event_url, wait_until='domcontentloaded')
-    page.wait_for_timeout(2000)
+    wait_ready(page, EVENT_SELECTOR)
 
     if not wait_for_captcha_or_content(page):
         return None
@@ -239,31 +243,76 @@ def scrape_event(page, verid):
         'categories': []
     }
 
-    for i, cat in enumerate(categories, 1):
-        catid = cat['catid']
+    def scrape_category(bracket_page, item, loaded=False, content=None):
+        i, cat = item
         name = cat['name'][:40] + "..." if len(cat['name']) > 40 else cat['name']
 
         print(f"  [{i}/{len(categories)}] {name}", end=" ", flush=True)
 
-        result = scrape_bracket(page, verid, catid, cat['name'])
+        if content is not None:
+            # Fetched over HTTP
+            result = save_bracket(verid, cat['catid'], cat['name'], content, worker)
+        else:
+            result = scrape_bracket(bracket_page, verid, cat['catid'], cat['name'], worker, loaded)
         if result:
             results['categories'].append(result)
-            n = len(result.get('competitors', []))
-            print(f"OK ({n} competitors)")
+            print("OK")
         else:
             print("FAILED")
 
-        page.wait_for_timeout(500)
+    items = list(enumerate(categories, 1))
+    if session is not None:
+        # The category page passed the CAPTCHA - hand its cookies to the session
+        session.set_cookies(page.context.cookies())
+        urls = [bracket_url(verid, cat['catid']) for _, cat in items]
+        for item, content in zip(items, fetch_all(session, urls, limiter or TokenBucket())):
+            scrape_category(page, item, content=content)
+            if content is None:
+                session.set_cookies(page.context.cookies())
+    elif pages > 1:
+        # Several categories load at once in the CAPTCHA-cleared context
+        fetch_pages(page.context, items, lambda item: bracket_url(verid, item[1]['catid']),
+                    scrape_category, pages, limiter or TokenBucket())
+    else:
+        limiter = limiter or TokenBucket()
+        for item in items:
+            # Only waits when pages come back faster than the rate limit
+            limiter.acquire()
+            scrape_category(page, item)
+
+    # Wait for the competitors still being parsed
+    if worker is not None:
+        worker.collect(wait=True)
+
+    if profile is not None:
+        results['blocked_requests'] = profile.report()
+        print(f"  {format_blocked(results['blocked_requests'])}")
+
+    save_event_results(results)
+    return results
+
 
-    # Save results
+def save_event_results(results):
+    """Save an event's scrape results to Results/brackets_{verid}_{timestamp}.json."""
+    verid = results['verid']
     output = RESULTS_DIR / f"brackets_{verid}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
     with open(output, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
 
     print(f"\nSaved: {output.name}")
     print(f"Categories: {len(results['categories'])}")
+    print(f"Competitors: {sum(len(c.get('competitors', [])) for c in results['categories'])}")
+    return output
 
-    return results
+
+def mark_scraped(events, results):
+    """Record a scraped event in verified_asian_events.json."""
+    for e in events:
+        if e['verid'] == results['verid']:
+            e['status'] = 'scraped'
+            e['name'] = results.get('event_name', 'Unknown')
+            break
+    save_verified_events(events)
 
 
 def show_status():
@@ -306,6 +355,17 @@ def main():
     parser.add_argument('--status', action='store_true', help='Show scraping status')
     parser.add_argument('--limit', type=int, default=0, help='Max events to scrape (0=all)')
     parser.add_argument('--verid', type=str, help='Scrape specific event')
+    parser.add_argument('--pages', type=int, nargs='?', const=DEFAULT_PAGES, default=1,
+                        help=f'Fetch categories on several pages at once (default {DEFAULT_PAGES} when given)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help='Max bracket requests per second with --pages')
+    parser.add_argument('--events', type=int, default=1, help='Events scraped at once')
+    parser.add_argument('--sync', action='store_true',
+                        help='Use the original one-page sync loop instead of the asyncio engine')
+    parser.add_argument('--http', action='store_true',
+                        help='Fetch bracket pages over HTTP with the browser cookies (browser only on CAPTCHA)')
+    parser.add_argument('--no-block', action='store_true',
+                        help='Load every resource (images, CSS, third-party) - e.g. if a CAPTCHA does not render')
 
     args = parser.parse_args()
 
@@ -335,6 +395,19 @@ def main():
     print(f"Events to scrape: {len(to_scrape)}")
     print("=" * 60)
 
+    if not args.sync:
+        def on_event(result):
+            if result['categories']:
+                save_event_results(result)
+                mark_scraped(events, result)
+
+        scrape_engine.scrape_events([e['verid'] for e in to_scrape], pages=args.pages, rate=args.rate,
+                                    events=args.events, on_event=on_event, http=args.http,
+                                    block=not args.no_block)
+        print("\nDone!")
+        show_status()
+        return
+
     with sync_playwright() as p:
         print("\nLaunching browser...", flush=True)
         browser = p.chromium.launch(
@@ -345,7 +418,16 @@ def main():
             viewport={'width': 1400, 'height': 900},
             no_viewport=True
         )
+        # Blocked requests are reported per event
+        profile = None if args.no_block else RequestProfile()
+        if profile is not None:
+            context.route('**/*', profile.route)
         page = context.new_page()
+        worker = BracketWorker()
+        # One request budget for the whole run
+        limiter = TokenBucket(args.rate)
+        # Cookies are copied over per event, once its category page is past the CAPTCHA
+        session = session_from_context(context, page, args.pages) if args.http else None
 
         try:
             for i, event in enumerate(to_scrape, 1):
@@ -355,24 +437,23 @@ def main():
                 print(f"# [{i}/{len(to_scrape)}] verid={verid}")
                 print(f"{'#'*60}")
 
-                result = scrape_event(page, verid)
+                result = scrape_event(page, verid, worker, args.pages, limiter, session, profile)
 
                 if result:
                     # Update status in verified events
-                    for e in events:
-                        if e['verid'] == verid:
-                            e['status'] = 'scraped'
-                            e['name'] = result.get('event_name', 'Unknown')
-                            break
-                    save_verified_events(events)
+                    mark_scraped(events, result)
 
                 # Brief pause between events
                 time.sleep(2)
 
         finally:
             print("\nClosing browser...")
+            if session is not None:
+                print(f"HTTP: {session.stats()}")
+                session.close()
             context.close()
             browser.close()
+            worker.close()
 
     print("\nDone!")
     show_status()
@@ -0,0 +1,473 @@
+"""
+Bracket Parser Benchmark
+========================
+Offline throughput, memory and correctness check for parse_bracket_html.
+
+Brackets/ is not in the repo, so the benchmark generates its own corpus:
+sportdata-style pages with the same markup the parser reads (newsheader
+title, tournament-bracket__round / __item / __caption_info ...), from 4
+to 128 competitors, with byes, tied scores, DQ / walkover / submission /
+decision markers and a repechage pool feeding the bronze bouts. The
+generator knows every bout it wrote, so each parse is also checked
+against the expected rounds, bout winners and outcomes, and champion.
+
+Each backend runs in a fresh process and reports parse time per file,
+files/sec, matches/sec, peak Python heap (tracemalloc - lxml's C-side
+tree only shows up in the RSS) and peak process RSS. --save writes the results; --baseline compares against saved
+results and exits 1 when a backend got slower than --max-slowdown or
+parsed any page wrongly, so parser changes can be gated on it.
+
+Usage:
+    python bracket_benchmark.py                          # Benchmark every installed backend
+    python bracket_benchmark.py --sizes 8 32 128 --per-size 20
+    python bracket_benchmark.py --save Cache/parser_benchmark.json
+    python bracket_benchmark.py --baseline Cache/parser_benchmark.json
+    python bracket_benchmark.py --write-corpus /tmp/brackets   # Just write the HTML files
+"""
+import sys
+import json
+import time
+import random
+import statistics
+import tracemalloc
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_SIZES = [4, 8, 16, 32, 64, 128]
+DEFAULT_PER_SIZE = 10
+DEFAULT_REPEAT = 5
+# Timings are only comparable on the same machine; leave room for noise
+DEFAULT_MAX_SLOWDOWN = 1.5
+
+COUNTRIES = ['KSA', 'UAE', 'KAZ', 'UZB', 'JOR', 'MGL', 'THA', 'KOR', 'JPN', 'FRA', 'GER', 'BRA']
+SURNAMES = ['AL-HARBI', 'NURLANOV', 'KIM', 'SATO', 'DUPONT', 'SILVA', 'BATBAYAR', 'KHALIL', 'MULLER']
+FIRSTNAMES = ['OMAR', 'AIDAR', 'MIN-JUN', 'KENJI', 'LUCAS', 'RAFAEL', 'TEMUULEN', 'YOUSEF', 'JONAS']
+
+
+# =============================================================================
+# SYNTHETIC CORPUS
+# =============================================================================
+def _item(competitor, score, winner=False):
+    """One li.tournament-bracket__item (an empty one is a BYE); score may be a marker like 'DQ'."""
+    if competitor is None:
+        return '<li class="tournament-bracket__item"><div class="tournament-bracket__match"></div></li>'
+    name, federation, country = competitor
+    score_html = '' if score is None else f'<span class="tournament-bracket__number">{score}</span>'
+    match_class = 'tournament-bracket__match tournament-bracket__match--winner' if winner else 'tournament-bracket__match'
+    return (
+        '<li class="tournament-bracket__item">\n'
+        f'  <div class="{match_class}" tabindex="0">\n'
+        '    <table class="tournament-bracket__table"><tbody><tr>\n'
+        f'      <td class="tournament-bracket__caption_info">{name}&nbsp;\n'
+        f'        <span class="tournament-bracket__caption_info2">{federation},{country}</span></td>\n'
+        f'      <td class="tournament-bracket__country"><abbr class="tournament-bracket__code" '
+        f'title="{country}">{country}</abbr></td>\n'
+        f'      <td class="tournament-bracket__score">{score_html}</td>\n'
+        '    </tr></tbody></table>\n'
+        '  </div>\n'
+        '</li>'
+    )
+
+
+class _Page:
+    """Collects rounds of HTML plus the bouts the parser should find."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.rounds = []
+        self.matches = 0
+        self.outcomes = []   # (winner name, outcome) per bout in page order
+        self.tied = False
+
+    def bout(self, red, blue):
+        """Score one bout; returns (items html, winner, loser).
+
+        Most bouts are won on score; some carry a DQ, walkover, submission
+        or decision marker, and some are plain ties. A tie goes to red.
+        """
+        self.matches += 1
+        self.tied = False
+        if red is None or blue is None:
+            self.outcomes.append((None, 'bye'))
+            return [_item(red, None), _item(blue, None)], red or blue, None
+
+        scores = {'red': self.rng.randint(0, 20), 'blue': self.rng.randint(0, 20)}
+        flags = {'red': False, 'blue': False}
+        roll = self.rng.random()
+        if roll < 0.05:
+            scores['blue'] = scores['red']
+        self.tied = scores['red'] == scores['blue']
+        winner_side = 'red' if scores['red'] >= scores['blue'] else 'blue'
+        loser_side = 'blue' if winner_side == 'red' else 'red'
+        outcome = 'tie' if self.tied else 'score'
+
+        if 0.05 <= roll < 0.07:
+            scores[loser_side], outcome = self.rng.choice(['DQ', 'HSK']), 'disqualification'
+        elif 0.07 <= roll < 0.09:
+            scores[loser_side], outcome = self.rng.choice(['W.O.', 'WO', 'FF']), 'walkover'
+        elif 0.09 <= roll < 0.11:
+            scores[winner_side], outcome = f"{scores[winner_side]} SUB", 'submission'
+        elif 0.11 <= roll < 0.13:
+            scores[loser_side] = scores[winner_side]
+            flags[winner_side], outcome = True, 'decision'
+
+        if outcome != 'tie':
+            self.tied = False
+
+        winner, loser = (red, blue) if winner_side == 'red' else (blue, red)
+        self.outcomes.append((winner[0], outcome))
+        return [_item(red, scores['red'], flags['red']), _item(blue, scores['blue'], flags['blue'])], winner, loser
+
+    def round(self, title, pairs):
+        """Add a round of bouts; returns [(winner, loser)] per bout."""
+        items = []
+        results = []
+        for red, blue in pairs:
+            html, winner, loser = self.bout(red, blue)
+            items.extend(html)
+            results.append((winner, loser))
+        self.rounds.append(
+            '<div class="tournament-bracket__round">\n'
+            f'<h3 class="tournament-bracket__round-title">{title}</h3>\n'
+            '<ul class="tournament-bracket__list">\n' + '\n'.join(items) + '\n</ul>\n</div>'
+        )
+        return results
+
+
+def generate_bracket(competitors, seed=0, repechage=True, event_name='SYNTHETIC OPEN', category=None):
+    """Generate one bracket page; returns (html, expected).
+
+    expected holds the round titles in page order, the number of bouts,
+    (winner, outcome) for every bout - outcome 'tie' for a tie with no
+    marker - and the champion (None if the final was such a tie).
+    """
+    rng = random.Random(seed)
+    category = category or f"ADULTS JU-JITSU FIGHTING MALE -{56 + 7 * (seed % 6)} KG"
+
+    athletes = []
+    for i in range(competitors):
+        country = rng.choice(COUNTRIES)
+        name = f"{rng.choice(SURNAMES)} {rng.choice(FIRSTNAMES)} {i + 1}"
+        athletes.append((name, f"{country} JU-JITSU FEDERATION", country))
+
+    # Pad to a power of two - each bye meets a different athlete in round 1
+    size = 2
+    while size < competitors:
+        size *= 2
+    slots = athletes + [None] * (size - competitors)
+    draw = []
+    for k in range(size // 2):
+        draw.extend([slots[k], slots[size - 1 - k]])
+
+    page = _Page(rng)
+    beaten_by = {}   # winner -> athletes they beat, for repechage
+    titles = []
+    alive = draw
+    round_no = 0
+    semi_losers = []
+    while len(alive) > 2:
+        round_no += 1
+        title = 'Semi-Final' if len(alive) == 4 else f"Main Tree Pool 1 - Round {round_no}"
+        titles.append(title)
+        results = page.round(title, [(alive[i], alive[i + 1]) for i in range(0, len(alive), 2)])
+        for winner, loser in results:
+            if winner is not None and loser is not None:
+                beaten_by.setdefault(winner, []).append(loser)
+                if len(alive) == 4:
+                    semi_losers.append(loser)
+        alive = [winner for winner, _ in results]
+
+    finalists = alive
+    if repechage and len(semi_losers) == 2 and competitors >= 8:
+        # Everyone a finalist beat before the semi-final fights through a repechage
+        # ladder; each ladder's survivor meets a semi-final loser for bronze
+        bronze_pairs = []
+        for pool, (finalist, semi_loser) in enumerate(zip(finalists, reversed(semi_losers)), 1):
+            ladder = [a for a in beaten_by.get(finalist, []) if a not in semi_losers]
+            survivor = ladder[0] if ladder else None
+            for step, challenger in enumerate(ladder[1:], 1):
+                title = f"Repechage Pool {pool} - Round {step}"
+                titles.append(title)
+                (survivor, _), = page.round(title, [(survivor, challenger)])
+            bronze_pairs.append((survivor, semi_loser))
+        titles.append('Bronze Medal Match')
+        page.round('Bronze Medal Match', bronze_pairs)
+
+    titles.append('Final')
+    (champion, _), = page.round('Final', [(finalists[0], finalists[1])])
+
+    html = (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>sportdata</title>\n'
+        '<script>var bracket = "<h3>not a title</h3>";</script></head>\n<body>\n'
+        '<div class="container"><div class="newsheader">\n'
+        f'<h3>{event_name}<br>{category}</h3>\n</div>\n'
+        '<!-- bracket --><div class="tournament-bracket tournament-bracket--rounded">\n' +
+        '\n'.join(page.rounds) +
+        '\n</div></div>\n</body></html>\n'
+    )
+
+    expected = {
+        'competitors': competitors,
+        'event_name': event_name,
+        'category': category,
+        'rounds': titles,
+        'matches': page.matches,
+        'outcomes': page.outcomes,
+        'champion': None if page.tied else champion[0],
+    }
+    return html, expected
+
+
+def generate_corpus(sizes=None, per_size=DEFAULT_PER_SIZE, seed=0, repechage=True):
+    """[(name, html, expected)] - per_size pages for each competitor count."""
+    corpus = []
+    for size in sizes or DEFAULT_SIZES:
+        for i in range(per_size):
+            page_seed = seed * 100003 + size * 1009 + i
+            html, expected = generate_bracket(size, seed=page_seed, repechage=repechage,
+                                              event_name=f"SYNTHETIC OPEN {size}")
+            corpus.append((f"bracket_{900000 + size}_{i + 1}.html", html, expected))
+    return corpus
+
+
+def write_corpus(directory, corpus):
+    """Write the corpus as bracket_{verid}_{catid}.html files (the layout of Brackets/)."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, html, _ in corpus:
+        (directory / name).write_text(html, encoding='utf-8')
+    return directory
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+def check_parse(parsed, expected):
+    """List of ways a parse differs from what the generator wrote."""
+    problems = []
+    if parsed.get('event_name') != expected['event_name']:
+        problems.append(f"event_name {parsed.get('event_name')!r}")
+    if parsed.get('category') != expected['category']:
+        problems.append(f"category {parsed.get('category')!r}")
+    if parsed.get('rounds') != expected['rounds']:
+        problems.append(f"rounds {parsed.get('rounds')}")
+    if len(parsed.get('matches', [])) != expected['matches']:
+        problems.append(f"{len(parsed.get('matches', []))} matches, expected {expected['matches']}")
+    if expected['champion']:
+        final = [m for m in parsed.get('matches', []) if m.get('round') == 'Final']
+        if not final or final[-1].get('winner') != expected['champion']:
+            problems.append("wrong champion")
+
+    wrong = 0
+    for match, (winner, outcome) in zip(parsed.get('matches', []), expected.get('outcomes', [])):
+        if outcome == 'tie':
+            # Only resolvable when the winner fights on - never the wrong athlete
+            ok = match.get('winner') in (None, winner) and match.get('outcome') in (None, 'progression')
+        else:
+            ok = match.get('winner') == winner and match.get('outcome') == outcome
+        wrong += not ok
+    if wrong:
+        problems.append(f"{wrong} bouts with the wrong winner or outcome")
+    return problems
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _bench_backend(backend, corpus, repeat):
+    """Runs in a fresh process: time, memory and correctness of one backend."""
+    from parse_bracket_html import parse_bracket_html
+
+    # Warm up imports and compiled selectors outside the timed loop
+    parse_bracket_html(corpus[0][1], backend)
+    rss_before = _max_rss_mb()
+
+    per_file = []
+    problems = {}
+    for name, html, expected in corpus:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parsed = parse_bracket_html(html, backend)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        per_file.append((expected['competitors'], best, len(parsed.get('matches', []))))
+        found = check_parse(parsed, expected)
+        if found:
+            problems[name] = found
+
+    # Memory pass - tracemalloc slows parsing, so it is kept out of the timings
+    tracemalloc.start()
+    peak = 0
+    for _, html, _ in corpus:
+        tracemalloc.reset_peak()
+        parse_bracket_html(html, backend)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    total = sum(t for _, t, _ in per_file)
+    matches = sum(m for _, _, m in per_file)
+    times_ms = [t * 1000 for _, t, _ in per_file]
+    by_size = {}
+    for size, t, _ in per_file:
+        by_size.setdefault(size, []).append(t * 1000)
+
+    rss_after = _max_rss_mb()
+    return {
+        'backend': backend,
+        'files': len(per_file),
+        'matches': matches,
+        'total_s': total,
+        'files_per_s': len(per_file) / total if total else 0,
+        'matches_per_s': matches / total if total else 0,
+        'ms_per_file_mean': statistics.mean(times_ms),
+        'ms_per_file_median': statistics.median(times_ms),
+        'ms_per_file_max': max(times_ms),
+        'ms_per_file_by_size': {str(size): statistics.mean(ts) for size, ts in sorted(by_size.items())},
+        'peak_heap_mb': peak / (1024 * 1024),
+        'max_rss_mb': rss_after,
+        'rss_growth_mb': rss_after - rss_before if rss_after is not None else None,
+        'problems': problems,
+    }
+
+
+def available_backends():
+    """Backends that can run here (lxml only if installed)."""
+    from parse_bracket_html import BACKENDS, etree
+    return [b for b in BACKENDS if b != 'lxml' or etree is not None]
+
+
+def run_benchmark(corpus, backends=None, repeat=1):
+    """Benchmark each backend in its own fresh process; returns {backend: results}."""
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for backend in backends or available_backends():
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[backend] = pool.submit(_bench_backend, backend, corpus, repeat).result()
+    return results
+
+
+def compare_to_baseline(results, baseline, max_slowdown=DEFAULT_MAX_SLOWDOWN):
+    """List of regressions against saved results (slower than max_slowdown x, or wrong output).
+
+    Timings are compared over the competitor counts both runs have, so a
+    smaller or larger corpus still compares like with like.
+    """
+    regressions = []
+    for backend, result in results.items():
+        if result['problems']:
+            regressions.append(f"{backend}: {len(result['problems'])} pages parsed wrongly")
+        old = baseline.get('results', {}).get(backend)
+        if not old:
+            continue
+        new_sizes = result['ms_per_file_by_size']
+        old_sizes = old.get('ms_per_file_by_size', {})
+        shared = [size for size in new_sizes if size in old_sizes]
+        if not shared:
+            continue
+        new_ms = sum(new_sizes[size] for size in shared)
+        old_ms = sum(old_sizes[size] for size in shared)
+        ratio = new_ms / old_ms if old_ms else 0
+        if ratio > max_slowdown:
+            regressions.append(f"{backend}: {ratio:.2f}x slower than baseline on {', '.join(shared)} "
+                               f"competitors ({new_ms:.2f} vs {old_ms:.2f} ms)")
+    return regressions
+
+
+def format_report(results):
+    lines = []
+    for backend, r in results.items():
+        rss = f"{r['max_rss_mb']:.1f} MB" if r['max_rss_mb'] is not None else 'n/a'
+        lines.append(f"{backend}:")
+        lines.append(f"  {r['files']} files, {r['matches']} matches in {r['total_s']:.2f}s")
+        lines.append(f"  {r['files_per_s']:.1f} files/sec, {r['matches_per_s']:.0f} matches/sec")
+        lines.append(f"  ms/file: mean {r['ms_per_file_mean']:.2f}, median {r['ms_per_file_median']:.2f}, "
+                     f"max {r['ms_per_file_max']:.2f}")
+        lines.append(f"  peak heap {r['peak_heap_mb']:.1f} MB, max RSS {rss}")
+        status = f"{len(r['problems'])} pages wrong" if r['problems'] else 'OK'
+        lines.append(f"  correctness: {status}")
+        for name, problems in list(r['problems'].items())[:5]:
+            lines.append(f"    {name}: {'; '.join(problems)}")
+
+    sizes = list(next(iter(results.values()))['ms_per_file_by_size']) if results else []
+    if sizes:
+        lines.append("")
+        lines.append("ms/file by competitors: " + "".join(f"{b:>10}" for b in results))
+        for size in sizes:
+            lines.append(f"  {size:>20}  " + "".join(
+                f"{results[b]['ms_per_file_by_size'][size]:>10.2f}" for b in results))
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Benchmark the bracket parser on a synthetic corpus')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Competitor counts to generate (4-128)')
+    parser.add_argument('--per-size', type=int, default=DEFAULT_PER_SIZE, help='Pages per competitor count')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed')
+    parser.add_argument('--no-repechage', action='store_true', help='Plain single elimination pages')
+    parser.add_argument('--backend', action='append', help='Backend to run (default: all installed)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Parses per file (best time is kept)')
+    parser.add_argument('--save', type=str, help='Save results as JSON')
+    parser.add_argument('--baseline', type=str, help='Compare with saved results; exit 1 on regression')
+    parser.add_argument('--max-slowdown', type=float, default=DEFAULT_MAX_SLOWDOWN,
+                        help='Allowed ms/file ratio against the baseline')
+    parser.add_argument('--write-corpus', type=str, help='Write the HTML files to this directory and exit')
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.sizes, args.per_size, args.seed, repechage=not args.no_repechage)
+
+    if args.write_corpus:
+        directory = write_corpus(args.write_corpus, corpus)
+        print(f"Wrote {len(corpus)} bracket pages to {directory}")
+        sys.exit(0)
+
+    backends = args.backend or available_backends()
+    print(f"Corpus: {len(corpus)} pages ({', '.join(str(s) for s in args.sizes)} competitors, "
+          f"{sum(e['matches'] for _, _, e in corpus)} bouts), seed {args.seed}")
+    print(f"Backends: {', '.join(backends)} (best of {args.repeat})\n")
+
+    results = run_benchmark(corpus, backends, args.repeat)
+    print(format_report(results))
+
+    if args.save:
+        save_file = Path(args.save)
+        save_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(save_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(),
+                'corpus': {'sizes': args.sizes, 'per_size': args.per_size, 'seed': args.seed,
+                           'repechage': not args.no_repechage},
+                'results': results
+            }, f, indent=2)
+        print(f"\nSaved to: {save_file}")
+
+    failed = any(r['problems'] for r in results.values())
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.max_slowdown)
+        print(f"\nBaseline: {args.baseline}")
+        for regression in regressions:
+            print(f"  REGRESSION {regression}")
+        if not regressions:
+            print("  No regressions")
+        failed = failed or bool(regressions)
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,153 @@
+"""
+Bracket Parse Cache
+===================
+Parsed bracket fragments keyed by the content hash of their HTML.
+
+Cache/brackets/ holds one {sha1}.json per parsed bracket page plus an
+index.json mapping each Brackets/*.html file name to its hash, mtime and
+size. A re-parse only runs the parser on files whose hash has no fragment
+yet; everything else is read back from the cache. The index records the
+parser version, so a parser change invalidates every fragment at once.
+
+Usage:
+    python bracket_cache.py               # Show cache size and hit coverage
+    python bracket_cache.py --clear       # Delete all cached fragments
+"""
+import sys
+import json
+import hashlib
+from pathlib import Path
+from datetime import datetime
+
+BASE_DIR = Path(__file__).parent
+BRACKETS_DIR = BASE_DIR / "Brackets"
+CACHE_DIR = BASE_DIR / "Cache" / "brackets"
+INDEX_FILE = CACHE_DIR / "index.json"
+
+CACHE_VERSION = 1
+
+
+def html_fingerprint(path, previous=None):
+    """sha1, mtime and size of an HTML file.
+
+    The hash is reused from the previous entry when mtime and size are
+    unchanged, so unchanged files are not re-read.
+    """
+    stat = path.stat()
+    if previous and previous.get('mtime') == stat.st_mtime and previous.get('size') == stat.st_size:
+        return previous
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+    return {'sha1': digest.hexdigest(), 'mtime': stat.st_mtime, 'size': stat.st_size}
+
+
+class BracketCache:
+    """Fragment store for parsed bracket pages."""
+
+    def __init__(self, parser_version, cache_dir=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        self.parser_version = parser_version
+        self.files = {}
+
+        index_file = self.cache_dir / INDEX_FILE.name
+        if index_file.exists():
+            try:
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                if index.get('version') == CACHE_VERSION and index.get('parser_version') == parser_version:
+                    self.files = index.get('files', {})
+            except Exception:
+                pass
+
+        # Only fragments the current index points to are trusted
+        self.known = {fp['sha1'] for fp in self.files.values()}
+
+    def fingerprint(self, path):
+        """Fingerprint of a bracket file, reusing the indexed hash when possible."""
+        return html_fingerprint(path, self.files.get(path.name))
+
+    def _fragment_file(self, sha1):
+        return self.cache_dir / f"{sha1}.json"
+
+    def has(self, fingerprint):
+        """True if a fragment for this fingerprint is cached."""
+        return fingerprint['sha1'] in self.known and self._fragment_file(fingerprint['sha1']).exists()
+
+    def get(self, fingerprint):
+        """Cached parse result for a fingerprint, or None on a miss."""
+        if fingerprint['sha1'] not in self.known:
+            return None
+        fragment_file = self._fragment_file(fingerprint['sha1'])
+        if not fragment_file.exists():
+            return None
+        try:
+            with open(fragment_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def put(self, fingerprint, parsed):
+        """Store a parse result under its content hash."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._fragment_file(fingerprint['sha1']), 'w', encoding='utf-8') as f:
+            json.dump(parsed, f, ensure_ascii=False)
+        self.known.add(fingerprint['sha1'])
+
+    def save(self, fingerprints, replace=True):
+        """Write the index for the files just parsed.
+
+        replace=True drops entries (and fragments) for files that are gone;
+        replace=False only updates the given files (e.g. a --verid run).
+        """
+        files = dict(fingerprints) if replace else {**self.files, **fingerprints}
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Index is written last - fragments it points to already exist
+        with open(self.cache_dir / INDEX_FILE.name, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': CACHE_VERSION,
+                'parser_version': self.parser_version,
+                'updated_at': datetime.now().isoformat(),
+                'files': files
+            }, f, indent=1, ensure_ascii=False)
+        self.files = files
+        self.known = {fp['sha1'] for fp in files.values()}
+
+        if replace:
+            live = {fp['sha1'] for fp in files.values()}
+            for fragment_file in self.cache_dir.glob("*.json"):
+                if fragment_file.name != INDEX_FILE.name and fragment_file.stem not in live:
+                    fragment_file.unlink()
+
+
+if __name__ == "__main__":
+    import argparse
+    import shutil
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Inspect the bracket parse cache')
+    parser.add_argument('--clear', action='store_true', help='Delete all cached fragments')
+    args = parser.parse_args()
+
+    if args.clear:
+        if CACHE_DIR.exists():
+            shutil.rmtree(CACHE_DIR)
+        print(f"Cleared: {CACHE_DIR}")
+    elif not INDEX_FILE.exists():
+        print(f"No parse cache at {CACHE_DIR} - run: python parse_bracket_html.py --all")
+    else:
+        with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        fragments = [p for p in CACHE_DIR.glob("*.json") if p.name != INDEX_FILE.name]
+        size = sum(p.stat().st_size for p in fragments)
+        current = sum(1 for p in BRACKETS_DIR.glob("bracket_*.html") if p.name in index['files'])
+        print(f"Cache: {CACHE_DIR}")
+        print(f"Parser version: {index.get('parser_version')}")
+        print(f"Indexed files: {len(index['files'])} ({current} still in Brackets/)")
+        print(f"Fragments: {len(fragments)} ({size / 1024:.1f} KB)")
+        print(f"Updated: {index.get('updated_at', 'N/A')}")
@@ -0,0 +1,312 @@
+"""
+Bracket HTTP
+============
+Fetches bracket pages over plain HTTP with the browser's cookies.
+
+The bracket popup (popup_mitschrift_main.php?popup_action=mitschriftcatxml)
+is a plain HTML document, so once the browser has cleared the CAPTCHA
+there is no need to render each one in Chromium. A BracketSession copies
+the browser context's cookies and user agent into a requests.Session
+with a connection pool, and fetch_all() downloads the pages on a few
+threads over keep-alive connections, spaced by the scrapers' TokenBucket.
+
+A page that comes back as the CAPTCHA (or a 403/429/503) is returned as
+None: the scraper loads that category in the browser instead, where the
+CAPTCHA can be solved, and then hands the fresh cookies back to the
+session with set_cookies().
+
+The scrapers use this with --http. The base URL comes from
+scrape_common.BASE_URL (SPORTDATA_BASE_URL overrides it), so the whole
+path can be run offline against the stub server below.
+
+Usage:
+    python bracket_http.py --stub                   # Serve generated brackets on localhost:8765
+    python bracket_http.py --check                  # Fetch 60 brackets from a local stub, print timings
+    python bracket_http.py --check --workers 8 --delay 50 --captcha-every 20
+    python bracket_http.py --stub --no-charset      # Content-Type without a charset
+"""
+import sys
+import time
+import threading
+from email.message import Message
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scrape_common import TokenBucket, bracket_url, is_captcha_page, DEFAULT_PAGES
+
+DEFAULT_WORKERS = DEFAULT_PAGES
+HTTP_TIMEOUT = 30
+
+# Answers that mean the site wants a browser rather than a failed request
+BLOCKED_STATUSES = {403, 429, 503}
+
+
+def response_text(response):
+    """Decoded body of a response.
+
+    Uses the charset from the Content-Type header, else UTF-8 (what the
+    bracket pages are), else requests' guess from the bytes. response.text
+    would fall back to ISO-8859-1 for text/html without a charset and turn
+    non-ASCII athlete names into mojibake.
+    """
+    header = Message()
+    header['Content-Type'] = response.headers.get('Content-Type', '')
+    charset = header.get_param('charset')
+    if charset:
+        try:
+            return response.content.decode(charset, errors='replace')
+        except LookupError:
+            pass
+    try:
+        return response.content.decode('utf-8')
+    except UnicodeDecodeError:
+        return response.content.decode(response.apparent_encoding or 'utf-8', errors='replace')
+
+
+class BracketSession:
+    """A pooled requests.Session carrying a browser context's cookies.
+
+    Counts what it fetched: pages, bytes, and the pages it handed back to
+    the browser (fallbacks).
+    """
+
+    def __init__(self, cookies=(), user_agent=None, workers=DEFAULT_WORKERS, timeout=HTTP_TIMEOUT):
+        self.session = requests.Session()
+        # One pool per host, with a kept-alive connection per worker
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, workers))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.pages = 0
+        self.bytes = 0
+        self.fallbacks = 0
+        self.set_cookies(cookies)
+
+    def set_cookies(self, cookies):
+        """Copy Playwright cookies (context.cookies()) into the session."""
+        for c in cookies:
+            self.session.cookies.set(c['name'], c['value'], domain=c.get('domain', ''), path=c.get('path', '/'))
+
+    def fetch(self, url):
+        """HTML of url, or None if it needs the browser (CAPTCHA, blocked or failed request)."""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code not in BLOCKED_STATUSES:
+                response.raise_for_status()
+                content = response_text(response)
+                if not is_captcha_page(content):
+                    with self.lock:
+                        self.pages += 1
+                        self.bytes += len(response.content)
+                    return content
+        except requests.RequestException as e:
+            print(f"  [HTTP error: {e}]", flush=True)
+        with self.lock:
+            self.fallbacks += 1
+        return None
+
+    def stats(self):
+        return f"{self.pages} pages over HTTP ({self.bytes / 1024:.0f} KB), {self.fallbacks} via the browser"
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def session_from_context(context, page, workers=DEFAULT_WORKERS):
+    """BracketSession with the cookies and user agent of a (sync Playwright) browser context."""
+    return BracketSession(context.cookies(), page.evaluate('() => navigator.userAgent'), workers)
+
+
+def fetch_all(session, urls, limiter=None):
+    """Fetch urls on session.workers threads; yields each page's HTML (or None) in order.
+
+    About session.workers pages further down the list keep downloading
+    while the caller handles the current one - e.g. loads a CAPTCHA'd page
+    in the browser. Later requests are only sent once the caller asks for
+    the next page, so cookies it hands over with set_cookies() apply to
+    them. Each request takes a token from limiter (no limit without one).
+    """
+    def fetch(url):
+        if limiter is not None:
+            limiter.acquire()
+        return session.fetch(url)
+
+    urls = iter(urls)
+    executor = ThreadPoolExecutor(max_workers=session.workers)
+    futures = deque()
+    try:
+        while True:
+            for url in islice(urls, session.workers - len(futures)):
+                futures.append(executor.submit(fetch, url))
+            if not futures:
+                return
+            yield futures.popleft().result()
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown()
+
+
+# -----------------------------------------------------------------------------
+# Offline stub of the bracket popup
+# -----------------------------------------------------------------------------
+STUB_PORT = 8765
+STUB_COOKIE = 'sd_cleared=1'
+# Non-ASCII, so a wrong decode shows up in the parsed event name
+STUB_EVENT = 'OPEN DE SÃO PAULO'
+CAPTCHA_PAGE = '<html><body><h1>Please verify you are a human</h1></body></html>'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves a generated bracket for any catid; the CAPTCHA without the cleared cookie.
+
+    With captcha_every N every Nth request is challenged again and the
+    cleared cookie changes value (sd_cleared=2, 3, ...), so requests still
+    carrying the old one are challenged too until new cookies are set.
+    With charset False the Content-Type has no charset, like some of the
+    site's pages.
+    """
+    protocol_version = 'HTTP/1.1'
+    delay_ms = 0
+    captcha_every = 0
+    charset = True
+    requests_seen = 0
+    generation = 1
+    connections = set()
+    lock = threading.Lock()
+
+    @classmethod
+    def cookie(cls):
+        """The cookie that currently clears the CAPTCHA."""
+        return f"{STUB_COOKIE.split('=')[0]}={cls.generation}"
+
+    def do_GET(self):
+        from bracket_benchmark import generate_bracket
+
+        cls = type(self)
+        with cls.lock:
+            cls.requests_seen += 1
+            cls.connections.add(self.client_address)
+            challenged = cls.cookie() not in self.headers.get('Cookie', '').split('; ')
+            if cls.captcha_every and cls.requests_seen % cls.captcha_every == 0:
+                cls.generation += 1
+                challenged = True
+        if cls.delay_ms:
+            time.sleep(cls.delay_ms / 1000)
+
+        query = parse_qs(urlparse(self.path).query)
+        if challenged:
+            body = CAPTCHA_PAGE
+        else:
+            catid = int(query.get('catid', ['0'])[0])
+            body = generate_bracket(4 + catid % 29, seed=catid, event_name=STUB_EVENT)[0]
+
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8' if cls.charset else 'text/html')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(port=0, delay_ms=0, captcha_every=0, charset=True):
+    """Start the stub server in a thread; returns (server, base_url)."""
+    StubHandler.delay_ms = delay_ms
+    StubHandler.captcha_every = captcha_every
+    StubHandler.charset = charset
+    StubHandler.requests_seen = 0
+    StubHandler.generation = 1
+    StubHandler.connections = set()
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_check(categories=60, workers=DEFAULT_WORKERS, rate=0, delay_ms=20, captcha_every=0):
+    """Scrape a stub event over HTTP the way the scrapers do; prints and returns the counts.
+
+    The session starts with the cleared cookie. With captcha_every, the
+    browser fallbacks per re-challenge show how many requests were already
+    out with the old cookie.
+    """
+    server, base_url = start_stub(delay_ms=delay_ms, captcha_every=captcha_every)
+    host = urlparse(base_url).hostname
+
+    def cleared():
+        # What the browser holds once the CAPTCHA is solved
+        name, value = StubHandler.cookie().split('=')
+        return [{'name': name, 'value': value, 'domain': host, 'path': '/'}]
+
+    urls = [bracket_url('1', 1000 + i, base_url) for i in range(categories)]
+    limiter = TokenBucket(rate) if rate else None
+    browser = 0
+    start = time.perf_counter()
+    with BracketSession(cleared(), workers=workers) as session:
+        for url, content in zip(urls, fetch_all(session, urls, limiter)):
+            if content is None:
+                # Stands in for the browser fallback: load the page, solve, export the cookies
+                browser += 1
+                session.set_cookies(cleared())
+        seconds = time.perf_counter() - start
+        challenges = StubHandler.generation - 1
+        print(f"Stub {base_url}: {categories} categories, {workers} workers, {delay_ms} ms server delay")
+        print(f"  {session.stats()}")
+        if challenges:
+            print(f"  {challenges} re-challenges -> {browser} browser loads "
+                  f"({browser / challenges:.1f} per re-challenge, at most {workers})")
+        print(f"  {seconds:.2f}s ({categories / seconds:.1f} pages/sec), "
+              f"{len(StubHandler.connections)} connections for {StubHandler.requests_seen} requests")
+    server.shutdown()
+    return {'pages': session.pages, 'fallbacks': browser, 'challenges': challenges, 'seconds': seconds,
+            'connections': len(StubHandler.connections)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='HTTP bracket fetching with the browser session')
+    parser.add_argument('--stub', action='store_true', help='Run the offline stub server')
+    parser.add_argument('--check', action='store_true', help='Fetch brackets from a local stub and print timings')
+    parser.add_argument('--port', type=int, default=STUB_PORT, help='Stub server port (--stub)')
+    parser.add_argument('--categories', type=int, default=60, help='Categories to fetch (--check)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Parallel requests (--check)')
+    parser.add_argument('--rate', type=float, default=0, help='Max requests per second, 0 = unlimited (--check)')
+    parser.add_argument('--delay', type=int, default=20, help='Stub response delay in ms')
+    parser.add_argument('--captcha-every', type=int, default=0, help='Challenge every Nth request again')
+    parser.add_argument('--no-charset', action='store_true', help='Send Content-Type without a charset (--stub)')
+    args = parser.parse_args()
+
+    if args.stub:
+        server, base_url = start_stub(args.port, args.delay, args.captcha_every, not args.no_charset)
+        print(f"Stub bracket server on {base_url} (cookie {STUB_COOKIE} clears the CAPTCHA)")
+        print(f"Point the scrapers at it with SPORTDATA_BASE_URL={base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.check:
+        run_check(args.categories, args.workers, args.rate, args.delay, args.captcha_every)
+    else:
+        parser.print_help()
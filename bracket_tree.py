@@ -0,0 +1,217 @@
+"""
+Bracket Tree
+============
+Match-to-match progression links for a parsed bracket category.
+
+sportdata pages list each round's bouts in order but don't say which bout
+a winner moves on to. link_matches() reconstructs it from the athletes:
+a bout's winner advances to the first bout in a later round that they
+fight in, and its loser (if they fight again) drops to a repechage or
+bronze bout. Every match gets:
+
+    id          position in the category's match list
+    next        id of the match the winner advances to (None for the final)
+    loser_next  id of the repechage/bronze match the loser drops to, or None
+    feeders     ids of the matches whose winners meet in this match
+    depth       longest chain of matches leading here (0 = first bout)
+
+and the category gets round_depths - one canonical depth per round, the
+left-to-right column order of the bracket. Path-to-final queries follow
+the next links (O(depth)) instead of scanning or matching round names.
+
+Usage:
+    python bracket_tree.py VERID CATID    # Print the linked bracket of one category
+"""
+import sys
+
+from match_outcome import round_stage
+
+
+# Stages only reached by losing a bout
+LOSER_STAGES = ('repechage', 'bronze')
+
+
+def _corner_name(match, side):
+    corner = match.get(f'{side}_corner') or {}
+    return corner.get('name') or ''
+
+
+def link_matches(bracket_data):
+    """Add id/next/loser_next/feeders/depth to every match and round_depths to bracket_data.
+
+    Works on a parsed category (parse_bracket_html output or a category of
+    all_matches.json); matches must be in round order, as parsed.
+    """
+    matches = bracket_data.get('matches', [])
+
+    # Round position counts round blocks in match order, so two pools with
+    # the same round title are still separate rounds
+    positions = []
+    for i, match in enumerate(matches):
+        new_round = i == 0 or match.get('round') != matches[i - 1].get('round')
+        positions.append(positions[-1] + new_round if positions else 0)
+
+    # name -> [(round position, match id)] in match order
+    appearances = {}
+    for i, match in enumerate(matches):
+        match['id'] = i
+        r = positions[i]
+        for side in ('red', 'blue'):
+            name = _corner_name(match, side)
+            if name:
+                appearances.setdefault(name, []).append((r, i))
+
+    def next_appearance(name, after_round):
+        for r, i in appearances.get(name, []):
+            if r > after_round:
+                return i
+        return None
+
+    for i, match in enumerate(matches):
+        r = positions[i]
+        winner = match.get('winner')
+        match['next'] = None
+        match['loser_next'] = None
+        red, blue = _corner_name(match, 'red'), _corner_name(match, 'blue')
+        if winner:
+            loser = blue if winner == red else red
+            match['next'] = next_appearance(winner, r)
+            match['loser_next'] = next_appearance(loser, r) if loser else None
+        else:
+            # No winner recorded - if only one corner fights on, that bout is next
+            later = [i for i in (next_appearance(red, r), next_appearance(blue, r)) if i is not None]
+            if len(later) == 2:
+                # Both fight again: the one staying in the main tree advanced,
+                # the one dropping to repechage/bronze lost
+                later = [i for i in later if round_stage(matches[i].get('round')) not in LOSER_STAGES]
+            if len(later) == 1:
+                match['next'] = later[0]
+
+    for match in matches:
+        match['feeders'] = []
+    for match in matches:
+        if match['next'] is not None:
+            matches[match['next']]['feeders'].append(match['id'])
+
+    set_depths(bracket_data)
+    return bracket_data
+
+
+def set_depths(bracket_data):
+    """Compute match depths and round_depths from the next/loser_next links."""
+    matches = bracket_data.get('matches', [])
+
+    # Links always point to a later match, so one pass in match order is enough
+    depths = [0] * len(matches)
+    for i, match in enumerate(matches):
+        for target in (match.get('next'), match.get('loser_next')):
+            if target is not None and target > i:
+                depths[target] = max(depths[target], depths[i] + 1)
+
+    round_depths = {}
+    for match, depth in zip(matches, depths):
+        match['depth'] = depth
+        name = match.get('round')
+        round_depths[name] = max(round_depths.get(name, 0), depth)
+
+    bracket_data['round_depths'] = [round_depths.get(name, 0) for name in bracket_data.get('rounds', [])]
+    return bracket_data
+
+
+def restore_links(bracket_data):
+    """Rebuild feeders and depths for matches that only carry id/next/loser_next (e.g. from the match table)."""
+    matches = bracket_data.get('matches', [])
+    for i, match in enumerate(matches):
+        match['id'] = i
+        match['feeders'] = []
+    for match in matches:
+        target = match.get('next')
+        if target is not None and 0 <= target < len(matches):
+            matches[target]['feeders'].append(match['id'])
+    return set_depths(bracket_data)
+
+
+def has_links(bracket_data):
+    """True if the category's matches carry progression links."""
+    matches = bracket_data.get('matches', [])
+    return bool(matches) and 'round_depths' in bracket_data and any(
+        m.get('next') is not None for m in matches)
+
+
+def round_order(bracket_data):
+    """Unique round names ordered by depth (ties keep page order)."""
+    rounds = bracket_data.get('rounds', [])
+    depths = bracket_data.get('round_depths') or [0] * len(rounds)
+    ordered = [name for _, _, name in sorted(zip(depths, range(len(rounds)), rounds))]
+    return list(dict.fromkeys(ordered))
+
+
+def final_match(bracket_data):
+    """The deepest match that nobody advances from and no loser drops into (the final)."""
+    matches = bracket_data.get('matches', [])
+    dropped_into = {m['loser_next'] for m in matches if m.get('loser_next') is not None}
+    candidates = [m for m in matches if m.get('next') is None and m.get('id') not in dropped_into]
+    if not candidates:
+        return None
+    # Latest match wins ties - the final is listed after the bronze bouts
+    return max(candidates, key=lambda m: (m.get('depth', 0), m.get('id', 0)))
+
+
+def path_to_final(bracket_data, match_id):
+    """Matches from match_id onwards, following the winner's next links."""
+    matches = bracket_data.get('matches', [])
+    path = []
+    while match_id is not None and 0 <= match_id < len(matches):
+        path.append(matches[match_id])
+        match_id = matches[match_id].get('next')
+    return path
+
+
+def athlete_path(bracket_data, name):
+    """An athlete's matches in the category, in bout order (winner links, then repechage)."""
+    matches = bracket_data.get('matches', [])
+
+    def fights_in(match):
+        return match is not None and name in (_corner_name(match, 'red'), _corner_name(match, 'blue'))
+
+    path = []
+    match = next((m for m in matches if fights_in(m)), None)
+    while match is not None:
+        path.append(match)
+        # Follow whichever link the athlete shows up in (a tied bout has no winner)
+        targets = [matches[t] for t in (match.get('next'), match.get('loser_next')) if t is not None]
+        match = next((m for m in targets if fights_in(m)), None)
+    return path
+
+
+if __name__ == "__main__":
+    from match_shards import load_event
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    event = load_event(sys.argv[1])
+    category = next((c for c in (event or {}).get('categories', []) if c.get('catid') == sys.argv[2]), None)
+    if category is None:
+        print(f"Category {sys.argv[2]} of event {sys.argv[1]} not found")
+        sys.exit(1)
+
+    if not has_links(category):
+        link_matches(category)
+
+    print(category.get('category', ''))
+    depths = dict(zip(category['rounds'], category['round_depths']))
+    for round_name in round_order(category):
+        print(f"\n[{depths[round_name]}] {round_name}")
+        for m in category['matches']:
+            if m.get('round') == round_name:
+                red, blue = _corner_name(m, 'red') or 'BYE', _corner_name(m, 'blue') or 'BYE'
+                print(f"  #{m['id']:<3} {red} vs {blue} -> {m.get('winner') or '?'}"
+                      f"  next={m['next']} loser_next={m['loser_next']} feeders={m['feeders']}")
+
+    final = final_match(category)
+    if final and final.get('winner'):
+        print(f"\nChampion: {final['winner']}")
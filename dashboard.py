@@ -5,15 +5,37 @@ Streamlit dashboard for analyzing JJIF athlete data with focus on Team Saudi.
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 import re
 import subprocess
 import sys
+import functools
 from pathlib import Path
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
 
+from match_store import (
+    load_match_table, events_from_table, table_to_all_data, MATCHES_TABLE, MATCHES_JSON
+)
+from match_shards import flatten_matches, MANIFEST_FILE as MATCH_MANIFEST
+from bracket_tree import has_links, final_match as bracket_final_match, round_order as bracket_round_order
+from athlete_db import (
+    connect_db, find_matches_by_athlete, query_category_matches, count_country_matches, DB_FILE, DB_SOURCES
+)
+from identity_index import load_identity_index, IDENTITY_FILE
+from h2h_index import load_h2h_index, load_bouts, BOUT_COLUMNS, META_FILE as H2H_META_FILE
+from profile_store import load_profiles, load_profile_index, load_facets, PROFILES_JSON, SHARD_INDEX, FACETS_FILE
+from profile_snapshot import SNAPSHOT_FILE
+from data_cache import load_profiles_fast
+from profile_facets import (
+    build_facets, has_facet, facet_values, extract_gender_from_categories, extract_weight_classes,
+    get_disciplines_competed, get_age_categories_competed, WEIGHT_GROUPS
+)
+from json_ingest import iter_items
+from file_watch import fingerprint, DirectoryWatcher
+
 # Configuration
 BASE_DIR = Path(__file__).parent
 RESULTS_DIR = BASE_DIR / "Results"
@@ -21,6 +43,20 @@ PROFILES_DIR = BASE_DIR / "Profiles"
 FLAG_URL_BASE = "https://flagcdn.com/48x36/"
 PHOTO_URL_BASE = ""
 
+SUMMARY_JSON = RESULTS_DIR / "dashboard_summary.json"
+SAUDI_MATCHES_JSON = RESULTS_DIR / "saudi_matches.json"
+
+# Seconds between checks of Results/ and Profiles/ for new data
+WATCH_INTERVAL = 10
+
+# Match table columns used by the bracket views
+BRACKET_VIEW_COLUMNS = [
+    'event', 'verid', 'category', 'catid', 'round',
+    'red_name', 'red_country', 'red_score',
+    'blue_name', 'blue_country', 'blue_score',
+    'winner_side', 'next_match', 'loser_next',
+]
+
 # Event codes for bracket access
 EVENT_CODES = {
     # 2025 Events
@@ -202,20 +238,46 @@ st.markdown(TEAM_SAUDI_CSS, unsafe_allow_html=True)
 # =============================================================================
 # DATA FUNCTIONS
 # =============================================================================
-@st.cache_data(ttl=300)
+def cached_on(*inputs, resource=False, max_entries=32):
+    """Cache a loader until one of its input files changes.
+
+    The fingerprint of the inputs (see file_watch.py) is part of the cache
+    key, so a loader re-runs right after a scrape rebuilds its files and
+    never while they are unchanged.
+    """
+    def decorator(func):
+        def cached(source_key, *args, **kwargs):
+            return func(*args, **kwargs)
+
+        # Streamlit keys cached functions by name - give each loader its own entry
+        cached.__module__ = func.__module__
+        cached.__name__ = func.__name__
+        cached.__qualname__ = func.__qualname__
+        cache = st.cache_resource if resource else st.cache_data
+        cached = cache(max_entries=max_entries)(cached)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cached(fingerprint(*inputs), *args, **kwargs)
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+
+@cached_on(SUMMARY_JSON)
 def load_dashboard_summary():
     """Load lightweight summary data for fast initial load (11KB vs 4.5MB)."""
-    summary_file = RESULTS_DIR / "dashboard_summary.json"
-    if summary_file.exists():
+    if SUMMARY_JSON.exists():
         try:
-            with open(summary_file, 'r', encoding='utf-8') as f:
+            with open(SUMMARY_JSON, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception:
             pass
     return None
 
 
-@st.cache_data(ttl=300)
+@cached_on(SUMMARY_JSON, PROFILES_JSON)
 def load_latest_data():
     """Load data for dashboard - uses lightweight summary for fast load."""
     # Try lightweight summary first (11KB vs 4.5MB = 400x faster)
@@ -258,14 +320,12 @@ def load_latest_data():
         return data
 
     # Fallback: Load full profiles if no summary (slower but complete)
-    all_profiles_file = RESULTS_DIR / "all_profiles.json"
+    all_profiles_file = PROFILES_JSON
     if all_profiles_file.exists():
         try:
-            with open(all_profiles_file, 'r', encoding='utf-8') as f:
-                profiles_data = json.load(f)
-            profiles = profiles_data.get('profiles', []) if isinstance(profiles_data, dict) else profiles_data
-
-            for p in profiles:
+            # Stream profiles one at a time, keeping only the summary fields
+            header = {}
+            for p in iter_items(all_profiles_file, 'profiles', header=header):
                 country = p.get('country_code', 'UNK')
                 data['athletes'].append({
                     'name': p.get('name', ''),
@@ -278,7 +338,7 @@ def load_latest_data():
                 data['athletes_by_country'][country] = data['athletes_by_country'].get(country, 0) + 1
 
             data['countries_scraped'] = len(data['athletes_by_country'])
-            data['timestamp'] = profiles_data.get('scraped_at', '') if isinstance(profiles_data, dict) else ''
+            data['timestamp'] = header.get('scraped_at', '')
             data['_file'] = 'all_profiles.json'
         except Exception:
             pass
@@ -286,30 +346,89 @@ def load_latest_data():
     return data if data['athletes'] else None
 
 
-@st.cache_data(ttl=300)
+@cached_on(SNAPSHOT_FILE, PROFILES_JSON, resource=True, max_entries=1)
+def load_profile_snapshot():
+    """Open the memory-mapped profile snapshot - one page cache shared by every session and worker.
+
+    Never builds it: None when the snapshot is missing, stale or damaged,
+    and callers fall back to all_profiles.json until data_cache.py runs.
+    """
+    try:
+        snapshot = load_profiles_fast()
+    except Exception:
+        return None
+    return snapshot if snapshot is not None and len(snapshot) else None
+
+
+@cached_on(SNAPSHOT_FILE, PROFILES_JSON)
 def load_full_profiles():
     """Load full profile data - only call when needed for detailed views."""
-    all_profiles_file = RESULTS_DIR / "all_profiles.json"
+    snapshot = load_profile_snapshot()
+    if snapshot is not None:
+        try:
+            return snapshot.profiles()
+        except Exception:
+            pass
+
+    # No usable snapshot - stream all_profiles.json
+    all_profiles_file = PROFILES_JSON
     if all_profiles_file.exists():
         try:
-            with open(all_profiles_file, 'r', encoding='utf-8') as f:
-                profiles_data = json.load(f)
-            return profiles_data.get('profiles', []) if isinstance(profiles_data, dict) else profiles_data
+            return list(iter_items(all_profiles_file, 'profiles'))
         except Exception:
             pass
     return []
 
 
-@st.cache_data(ttl=300)
+@cached_on(PROFILES_JSON, SHARD_INDEX)
+def load_country_profiles(country_code=None, exclude_country=None):
+    """Load profiles for one country (or all but one) - only those shards are read."""
+    try:
+        if country_code:
+            return load_profiles([country_code])
+        return load_profiles(exclude=[exclude_country] if exclude_country else None)
+    except Exception:
+        return []
+
+
+@cached_on(PROFILES_JSON, SHARD_INDEX, FACETS_FILE)
+def load_country_facets(country_code=None, exclude_country=None):
+    """Facet table aligned with load_country_profiles() - row i describes profile i."""
+    profiles = load_country_profiles(country_code, exclude_country)
+    try:
+        facets = load_facets([country_code] if country_code else None,
+                             exclude=[exclude_country] if exclude_country else None)
+        if facets is not None and len(facets) == len(profiles):
+            return facets
+    except Exception:
+        pass
+    # Shards without a facet table - compute the facets from the profiles
+    return build_facets(profiles)
+
+
+def select_profiles(profiles, mask):
+    """Profiles where a facet mask is True."""
+    return [profiles[i] for i in np.flatnonzero(np.asarray(mask))]
+
+
+@cached_on(PROFILES_JSON, SHARD_INDEX)
+def load_country_index():
+    """Load the profile shard index (countries, names and athlete counts)."""
+    try:
+        return load_profile_index() or {'total': 0, 'countries': {}}
+    except Exception:
+        return {'total': 0, 'countries': {}}
+
+
+@cached_on(MATCHES_TABLE, MATCH_MANIFEST, MATCHES_JSON)
 def load_match_data():
     """Load match/bracket data - only call when needed for bracket views."""
-    all_matches_file = RESULTS_DIR / "all_matches.json"
-    if all_matches_file.exists():
-        try:
-            with open(all_matches_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            pass
+    try:
+        df = load_match_table()
+        if df is not None:
+            return table_to_all_data(df)
+    except Exception:
+        pass
     return {'events': [], 'all_matches': []}
 
 
@@ -339,59 +458,58 @@ def load_athlete_profiles():
     return load_full_profiles()
 
 
-def fuzzy_name_match(name1, name2, country1=None, country2=None):
-    """
-    Match athlete names accounting for different name formats.
-    Handles: FIRSTNAME SURNAME vs SURNAME FIRSTNAME
-    Returns True if names likely match the same person.
-    """
-    if not name1 or not name2:
-        return False
-
-    n1 = name1.upper().strip()
-    n2 = name2.upper().strip()
-
-    # Exact match
-    if n1 == n2:
-        return True
+@cached_on(IDENTITY_FILE, PROFILES_JSON, MATCHES_TABLE, MATCH_MANIFEST, MATCHES_JSON)
+def load_identity():
+    """Load the athlete identity index (name forms -> canonical athlete ids)."""
+    try:
+        return load_identity_index()
+    except Exception:
+        return None
 
-    # If countries don't match, not the same person
-    if country1 and country2 and country1 != country2:
-        return False
 
-    # Split into name parts
-    parts1 = set(n1.replace('-', ' ').replace("'", '').split())
-    parts2 = set(n2.replace('-', ' ').replace("'", '').split())
+@cached_on(H2H_META_FILE, IDENTITY_FILE, MATCHES_TABLE, MATCH_MANIFEST, MATCHES_JSON, resource=True, max_entries=1)
+def load_h2h():
+    """Open the memory-mapped head-to-head index (shared, not copied per session)."""
+    try:
+        return load_h2h_index()
+    except Exception:
+        return None
 
-    # Remove common short words that might differ
-    skip_words = {'AL', 'EL', 'BIN', 'IBN', 'ABU', 'ABDUL', 'MOHAMMED', 'MOHAMMAD', 'AHMED', 'MUHAMMAD'}
 
-    # Check if at least 2 significant name parts match
-    # or all parts of shorter name are in longer name
-    common = parts1 & parts2
+@cached_on(DB_FILE, *DB_SOURCES, resource=True, max_entries=1)
+def load_db():
+    """One read-only connection to the athlete database, shared by every query and session.
 
-    # For short names (2 parts), require both to match
-    if len(parts1) <= 2 and len(parts2) <= 2:
-        return len(common) >= 2
+    Reopened when the database or its inputs change; None without data.
+    """
+    try:
+        return connect_db(check_same_thread=False)
+    except Exception:
+        return None
 
-    # For longer names, require at least 2 matches excluding common prefixes
-    significant_common = common - skip_words
 
-    if len(significant_common) >= 2:
-        return True
+@cached_on(SNAPSHOT_FILE, PROFILES_JSON)
+def load_profiles_by_id():
+    """Profiles keyed by profile_id, for identity index lookups."""
+    return {str(p.get('profile_id')): p for p in load_athlete_profiles() if p.get('profile_id')}
 
-    # Check if one name is substring of other (for partial matches)
-    if n1 in n2 or n2 in n1:
-        return True
 
-    return False
+def load_profile(profile_id):
+    """One profile by id - decoded from the shared snapshot, without loading the rest."""
+    if not profile_id:
+        return None
+    snapshot = load_profile_snapshot()
+    if snapshot is not None:
+        try:
+            return snapshot.profile_by_id(profile_id)
+        except Exception:
+            pass
+    return load_profiles_by_id().get(str(profile_id))
 
 
-@st.cache_data(ttl=300)
+@cached_on(MATCHES_TABLE, MATCH_MANIFEST, MATCHES_JSON, SAUDI_MATCHES_JSON)
 def load_bracket_data():
     """Load parsed bracket/match data."""
-    all_matches_file = RESULTS_DIR / "all_matches.json"
-    saudi_matches_file = RESULTS_DIR / "saudi_matches.json"
 
     data = {
         'all_matches': None,
@@ -400,18 +518,20 @@ def load_bracket_data():
         'total_matches': 0
     }
 
-    if all_matches_file.exists():
-        try:
-            with open(all_matches_file, 'r', encoding='utf-8') as f:
-                data['all_matches'] = json.load(f)
-                data['events'] = data['all_matches'].get('events', [])
-                data['total_matches'] = data['all_matches'].get('total_matches', 0)
-        except Exception:
-            pass
+    try:
+        # Columnar table - skip the federation columns the views never show
+        df = load_match_table(columns=BRACKET_VIEW_COLUMNS)
+        if df is not None and len(df):
+            data['events'] = events_from_table(df)
+            data['total_matches'] = len(df)
+            # Flat view shares its corner dicts with the nested events
+            data['all_matches'] = flatten_matches(data['events'])
+    except Exception:
+        pass
 
-    if saudi_matches_file.exists():
+    if SAUDI_MATCHES_JSON.exists():
         try:
-            with open(saudi_matches_file, 'r', encoding='utf-8') as f:
+            with open(SAUDI_MATCHES_JSON, 'r', encoding='utf-8') as f:
                 data['saudi_matches'] = json.load(f)
         except Exception:
             pass
@@ -452,57 +572,44 @@ def get_inferred_opponents(athlete_name, athlete_country, category_name, enriche
 def get_athlete_match_history(athlete_name, country='KSA'):
     """Get match history for a specific athlete from bracket data.
 
-    Uses fuzzy name matching to handle reversed name formats
-    (FIRSTNAME SURNAME vs SURNAME FIRSTNAME).
+    The name is resolved through the identity index, so reversed name
+    formats (FIRSTNAME SURNAME vs SURNAME FIRSTNAME) and AL/BIN particles
+    map to the same athlete. Without a country every athlete with that
+    name is included.
     """
-    bracket_data = load_bracket_data()
     matches = []
 
-    if not bracket_data['all_matches']:
+    identity = load_identity()
+    if identity is None:
         return matches
 
-    for event in bracket_data.get('events', []):
-        event_name = event.get('event_name', '')
-
-        for category in event.get('categories', []):
-            cat_name = category.get('category', '')
-
-            for match in category.get('matches', []):
-                red = match.get('red_corner') or {}
-                blue = match.get('blue_corner') or {}
-
-                red_name = red.get('name', '') or ''
-                blue_name = blue.get('name', '') or ''
-                red_country = red.get('country', '')
-                blue_country = blue.get('country', '')
+    athlete_ids = identity.resolve_all(athlete_name, country or None)
+    if not athlete_ids:
+        return matches
 
-                # Use fuzzy matching for name comparison
-                in_red = fuzzy_name_match(athlete_name, red_name, country, red_country)
-                in_blue = fuzzy_name_match(athlete_name, blue_name, country, blue_country)
+    conn = load_db()
+    if conn is None:
+        return matches
+    try:
+        bouts = find_matches_by_athlete(conn, athlete_ids)
+    except Exception:
+        return matches
 
-                if in_red or in_blue:
-                    winner = match.get('winner', '')
-                    winner_country = match.get('winner_country', '')
-
-                    if in_red:
-                        athlete_info = red
-                        opponent_info = blue
-                        won = fuzzy_name_match(athlete_name, winner, country, winner_country)
-                    else:
-                        athlete_info = blue
-                        opponent_info = red
-                        won = fuzzy_name_match(athlete_name, winner, country, winner_country)
-
-                    matches.append({
-                        'event': event_name,
-                        'category': cat_name,
-                        'round': match.get('round', ''),
-                        'opponent_name': opponent_info.get('name', 'Unknown') if opponent_info else 'BYE',
-                        'opponent_country': opponent_info.get('country', '') if opponent_info else '',
-                        'won': won,
-                        'athlete_score': athlete_info.get('score', 0) if athlete_info else 0,
-                        'opponent_score': opponent_info.get('score', 0) if opponent_info else 0
-                    })
+    for match in bouts:
+        side = 'red' if match['red_athlete'] in athlete_ids else 'blue'
+        athlete_info = match[side]
+        opponent_info = match['blue' if side == 'red' else 'red']
+
+        matches.append({
+            'event': match['event'],
+            'category': match['category'],
+            'round': match['round'],
+            'opponent_name': opponent_info.get('name', 'Unknown') if opponent_info else 'BYE',
+            'opponent_country': opponent_info.get('country', '') if opponent_info else '',
+            'won': match['winner_side'] == side,
+            'athlete_score': athlete_info.get('score', 0) if athlete_info else 0,
+            'opponent_score': opponent_info.get('score', 0) if opponent_info else 0
+        })
 
     return matches
 
@@ -512,48 +619,23 @@ def get_bracket_matches_by_category(event_name, category_name, country=None):
     Get all matches from a specific event/category.
     Used for matching athletes by competition context when names don't match directly.
     """
-    bracket_data = load_bracket_data()
-    matches = []
-
-    if not bracket_data['all_matches']:
-        return matches
-
-    event_upper = event_name.upper() if event_name else ''
-
-    for event in bracket_data.get('events', []):
-        ev_name = event.get('event_name', '').upper()
-
-        # Match event by keyword presence
-        if event_upper and not any(word in ev_name for word in event_upper.split()):
-            continue
-
-        for category in event.get('categories', []):
-            cat_name = category.get('category', '')
-
-            # Match category (weight class)
-            if category_name and category_name.upper() not in cat_name.upper():
-                continue
-
-            for match in category.get('matches', []):
-                red = match.get('red_corner') or {}
-                blue = match.get('blue_corner') or {}
-
-                # Filter by country if specified
-                if country:
-                    if red.get('country') != country and blue.get('country') != country:
-                        continue
-
-                matches.append({
-                    'event': event.get('event_name', ''),
-                    'category': cat_name,
-                    'round': match.get('round', ''),
-                    'red': red,
-                    'blue': blue,
-                    'winner': match.get('winner'),
-                    'winner_country': match.get('winner_country')
-                })
+    conn = load_db()
+    if conn is None:
+        return []
+    try:
+        matches = query_category_matches(conn, event_name, category_name, country)
+    except Exception:
+        return []
 
-    return matches
+    return [{
+        'event': m['event'],
+        'category': m['category'],
+        'round': m['round'],
+        'red': m['red'],
+        'blue': m['blue'],
+        'winner': m['winner'],
+        'winner_country': m['winner_country']
+    } for m in matches]
 
 
 def get_athlete_match_history_by_profile(profile):
@@ -682,10 +764,24 @@ def refresh_data():
             except Exception as e:
                 st.warning(f"Profile refresh: {e}")
 
-    st.cache_data.clear()
+    # Loaders are keyed on their input files, so only the ones whose data changed reload
     st.rerun()
 
 
+@st.fragment(run_every=WATCH_INTERVAL)
+def watch_data_files():
+    """Rerun the app when a scrape or cache rebuild changes Results/ or Profiles/."""
+    watcher = st.session_state.get('data_watcher')
+    if watcher is None:
+        st.session_state['data_watcher'] = DirectoryWatcher()
+        return
+
+    changed = watcher.poll()
+    if changed:
+        st.toast(f"🔄 {len(changed)} data file(s) updated - reloading")
+        st.rerun(scope='app')
+
+
 # =============================================================================
 # MAIN DASHBOARD
 # =============================================================================
@@ -712,6 +808,7 @@ def main():
         st.markdown("---")
         if st.button("🔄 REFRESH DATA", type="primary", use_container_width=True):
             refresh_data()
+        watch_data_files()
 
         st.markdown("---")
 
@@ -880,9 +977,10 @@ def render_saudi_athletes(df_saudi, all_athletes):
     """Render Saudi athletes page with profile cards and detailed analysis."""
     st.markdown('<p class="sub-header">🇸🇦 Saudi Arabia Athletes</p>', unsafe_allow_html=True)
 
-    # Load detailed profiles
-    profiles = load_athlete_profiles()
-    saudi_profiles = [p for p in profiles if p.get('country_code') == 'KSA' and p.get('categories')]
+    # Load detailed profiles - Saudi shard only
+    ksa_facets = load_country_facets('KSA')
+    saudi_profiles = select_profiles(load_country_profiles('KSA'), ksa_facets['has_data'])
+    saudi_facets = ksa_facets[ksa_facets['has_data']].reset_index(drop=True)
 
     if not saudi_profiles:
         st.warning("No Saudi athlete profiles found. Run the scraper to fetch detailed Saudi team data.")
@@ -965,8 +1063,8 @@ def render_saudi_athletes(df_saudi, all_athletes):
 
         with col1:
             # By gender
-            male_count = len([p for p in saudi_profiles if extract_gender_from_categories(p) == 'Male'])
-            female_count = len([p for p in saudi_profiles if extract_gender_from_categories(p) == 'Female'])
+            male_count = int((saudi_facets['gender'] == 'Male').sum())
+            female_count = int((saudi_facets['gender'] == 'Female').sum())
 
             gender_data = pd.DataFrame({
                 'Gender': ['Male', 'Female'],
@@ -980,9 +1078,8 @@ def render_saudi_athletes(df_saudi, all_athletes):
         with col2:
             # By discipline
             discipline_counts = {}
-            for p in saudi_profiles:
-                for disc in get_disciplines_competed(p):
-                    discipline_counts[disc] = discipline_counts.get(disc, 0) + 1
+            for disc in facet_values(saudi_facets, 'discipline'):
+                discipline_counts[disc] = int(has_facet(saudi_facets, 'discipline', disc).sum())
 
             if discipline_counts:
                 disc_data = pd.DataFrame({
@@ -1007,37 +1104,26 @@ def render_saudi_athletes(df_saudi, all_athletes):
             saudi_gender_filter = st.selectbox("👤 Gender", options=saudi_gender_options, index=0, key="sa_gender")
 
         with col3:
-            saudi_weight_options = ['All Weights', 'Lightweight (-62kg)', 'Middleweight (62-77kg)',
-                                    'Light Heavy (77-94kg)', 'Heavyweight (+94kg)']
+            saudi_weight_options = ['All Weights'] + list(WEIGHT_GROUPS)
             saudi_weight_filter = st.selectbox("⚖️ Weight", options=saudi_weight_options, index=0, key="sa_weight")
 
         with col4:
             saudi_sort_options = ['Medals (Most)', 'Win Rate', 'Form Score', 'Events', 'Name (A-Z)']
             saudi_sort_by = st.selectbox("📊 Sort By", options=saudi_sort_options, index=0, key="sa_sort")
 
-        # Apply filters
-        filtered_saudi = saudi_profiles.copy()
+        # Apply filters - masks over the precomputed facet table
+        mask = pd.Series(True, index=saudi_facets.index)
 
         if saudi_search:
-            filtered_saudi = [p for p in filtered_saudi if saudi_search.lower() in p.get('name', '').lower()]
+            mask &= saudi_facets['name'].fillna('').str.lower().str.contains(saudi_search.lower(), regex=False)
 
         if saudi_gender_filter != 'All':
-            filtered_saudi = [p for p in filtered_saudi if extract_gender_from_categories(p) == saudi_gender_filter]
+            mask &= saudi_facets['gender'] == saudi_gender_filter
 
         if saudi_weight_filter != 'All Weights':
-            def matches_weight(profile):
-                for cat in profile.get('categories', []):
-                    cat_name = cat.get('category', '').upper()
-                    if saudi_weight_filter == 'Lightweight (-62kg)' and any(w in cat_name for w in ['-56', '-62', '-48', '-52', '-57']):
-                        return True
-                    elif saudi_weight_filter == 'Middleweight (62-77kg)' and any(w in cat_name for w in ['-69', '-77', '-63', '-70']):
-                        return True
-                    elif saudi_weight_filter == 'Light Heavy (77-94kg)' and any(w in cat_name for w in ['-85', '-94']):
-                        return True
-                    elif saudi_weight_filter == 'Heavyweight (+94kg)' and '+94' in cat_name:
-                        return True
-                return False
-            filtered_saudi = [p for p in filtered_saudi if matches_weight(p)]
+            mask &= has_facet(saudi_facets, 'weight_group', saudi_weight_filter)
+
+        filtered_saudi = select_profiles(saudi_profiles, mask)
 
         # Sort
         if saudi_sort_by == 'Medals (Most)':
@@ -1377,25 +1463,25 @@ def render_athlete_profiles():
     """Render detailed athlete profiles page - ALL athletes with filters."""
     st.markdown('<p class="sub-header">👤 Athlete Profiles Database</p>', unsafe_allow_html=True)
 
-    profiles = load_athlete_profiles()
+    # Summary stats come from the shard index - profiles are loaded once a country is chosen
+    country_index = load_country_index()['countries']
 
-    if not profiles:
+    if not country_index:
         st.warning("⚠️ No athlete profiles found. Run the profile scraper to fetch athlete data.")
         st.code("python scrape_all_opponents.py --top16", language="bash")
         return
 
-    # Filter to profiles with actual competition data
-    profiles_with_data = [p for p in profiles if p.get('categories') and len(p.get('categories', [])) > 0]
-
     # Get unique countries from profiles
-    countries_in_db = sorted(set(p.get('country_code', 'UNK') for p in profiles if p.get('country_code')))
-    country_names = {p.get('country_code'): p.get('country', p.get('country_code')) for p in profiles}
+    countries_in_db = sorted(code for code in country_index if code != 'UNK')
+    country_names = {code: entry['country'] for code, entry in country_index.items()}
 
     # Summary stats
+    total_profiles = sum(entry['count'] for entry in country_index.values())
+    total_with_data = sum(entry['with_data'] for entry in country_index.values())
     total_countries = len(countries_in_db)
-    saudi_count = len([p for p in profiles if p.get('country_code') == 'KSA'])
+    saudi_count = country_index.get('KSA', {}).get('count', 0)
 
-    st.info(f"📊 **{len(profiles)}** athletes from **{total_countries}** countries | **{len(profiles_with_data)}** with competition history | **{saudi_count}** Saudi athletes")
+    st.info(f"📊 **{total_profiles}** athletes from **{total_countries}** countries | **{total_with_data}** with competition history | **{saudi_count}** Saudi athletes")
 
     # FILTERS SECTION
     st.markdown("### 🔍 Filter Athletes")
@@ -1414,8 +1500,7 @@ def render_athlete_profiles():
 
     with col3:
         # Weight class filter
-        weight_options = ['All Weights', 'Lightweight (-62kg)', 'Middleweight (62-77kg)',
-                          'Light Heavy (77-94kg)', 'Heavyweight (+94kg)']
+        weight_options = ['All Weights'] + list(WEIGHT_GROUPS)
         selected_weight = st.selectbox("⚖️ Weight Class", options=weight_options, index=0)
 
     with col4:
@@ -1447,39 +1532,25 @@ def render_athlete_profiles():
         sort_options = ['Win Rate (High)', 'Total Events', 'Total Medals', 'Name (A-Z)']
         selected_sort = st.selectbox("📈 Sort By", options=sort_options, index=0)
 
-    # Apply filters
-    filtered_profiles = profiles_with_data.copy()
+    # Apply filters - a single country only reads that country's shard; filters are
+    # masks over the precomputed facet table
+    profiles = load_country_profiles(selected_country_code)
+    facets = load_country_facets(selected_country_code)
 
-    # Country filter
-    if selected_country_code:
-        filtered_profiles = [p for p in filtered_profiles if p.get('country_code') == selected_country_code]
+    # Filter to profiles with actual competition data
+    mask = facets['has_data'].copy()
 
     # Gender filter
     if selected_gender != 'All':
-        filtered_profiles = [p for p in filtered_profiles if extract_gender_from_categories(p) == selected_gender]
+        mask &= facets['gender'] == selected_gender
 
     # Weight class filter
     if selected_weight != 'All Weights':
-        def matches_weight(profile):
-            for cat in profile.get('categories', []):
-                cat_name = cat.get('category', '').upper()
-                if selected_weight == 'Lightweight (-62kg)' and any(w in cat_name for w in ['-56', '-62', '-48', '-52', '-57']):
-                    return True
-                elif selected_weight == 'Middleweight (62-77kg)' and any(w in cat_name for w in ['-69', '-77', '-63', '-70']):
-                    return True
-                elif selected_weight == 'Light Heavy (77-94kg)' and any(w in cat_name for w in ['-85', '-94']):
-                    return True
-                elif selected_weight == 'Heavyweight (+94kg)' and '+94' in cat_name:
-                    return True
-            return False
-        filtered_profiles = [p for p in filtered_profiles if matches_weight(p)]
+        mask &= has_facet(facets, 'weight_group', selected_weight)
 
     # Discipline filter
     if selected_discipline != 'All Disciplines':
-        def matches_discipline(profile):
-            disciplines = get_disciplines_competed(profile)
-            return selected_discipline in disciplines
-        filtered_profiles = [p for p in filtered_profiles if matches_discipline(p)]
+        mask &= has_facet(facets, 'discipline', selected_discipline)
 
     # Event type filter - filter athletes who have competed in selected event type
     if selected_event_type != 'All Events':
@@ -1489,35 +1560,25 @@ def render_athlete_profiles():
             'World Games / Combat Games': 'WORLD GAMES',
             'A Class Tournament': 'A CLASS TOURNAMENT'
         }
-        target_type = event_type_map.get(selected_event_type, '')
-        def has_competed_in_event_type(profile):
-            for cat in profile.get('categories', []):
-                for comp in cat.get('competitions', []):
-                    if target_type in comp.get('event_type', '').upper():
-                        return True
-            return False
-        filtered_profiles = [p for p in filtered_profiles if has_competed_in_event_type(p)]
+        mask &= has_facet(facets, 'event_type', event_type_map.get(selected_event_type, ''))
 
     # Minimum events filter
     if selected_min_events != 'Any':
         min_val = int(selected_min_events.replace('+', ''))
-        filtered_profiles = [p for p in filtered_profiles
-                             if p.get('overall_stats', {}).get('total_events', 0) >= min_val]
+        mask &= facets['total_events'] >= min_val
 
     # Medal filter
     if selected_medal_filter != 'Any':
-        def matches_medal_filter(profile):
-            medals = profile.get('medal_summary', {})
-            if selected_medal_filter == 'Has Medals':
-                return medals.get('total', 0) > 0
-            elif selected_medal_filter == 'Has Gold':
-                return medals.get('gold', 0) > 0
-            elif selected_medal_filter == 'Has Silver':
-                return medals.get('silver', 0) > 0
-            elif selected_medal_filter == 'Has Bronze':
-                return medals.get('bronze', 0) > 0
-            return True
-        filtered_profiles = [p for p in filtered_profiles if matches_medal_filter(p)]
+        medal_column = {
+            'Has Medals': 'medals',
+            'Has Gold': 'gold',
+            'Has Silver': 'silver',
+            'Has Bronze': 'bronze'
+        }.get(selected_medal_filter)
+        if medal_column:
+            mask &= facets[medal_column] > 0
+
+    filtered_profiles = select_profiles(profiles, mask)
 
     # Sort
     if selected_sort == 'Win Rate (High)':
@@ -1727,93 +1788,10 @@ def scrape_opponent_profile(country_code, profile_id):
     return None
 
 
-def extract_gender_from_categories(profile):
-    """Extract gender from athlete's competition categories."""
-    categories = profile.get('categories', [])
-    for cat in categories:
-        cat_name = cat.get('category', '').upper()
-        if 'FEMALE' in cat_name:
-            return 'Female'
-        elif 'MALE' in cat_name:
-            return 'Male'
-    return 'Unknown'
-
-
-def extract_weight_classes(profile):
-    """Extract unique weight classes from athlete's categories."""
-    weights = set()
-    categories = profile.get('categories', [])
-    for cat in categories:
-        cat_name = cat.get('category', '')
-        # Extract weight like "-62 KG", "+94 KG", "-85 KG"
-        weight_match = re.search(r'([+-]?\d+\s*KG)', cat_name, re.IGNORECASE)
-        if weight_match:
-            weights.add(weight_match.group(1).upper())
-    return list(weights)
-
-
-def get_all_weight_classes(profiles):
-    """Get all unique weight classes from profiles."""
-    all_weights = set()
-    for p in profiles:
-        weights = extract_weight_classes(p)
-        all_weights.update(weights)
-    # Sort weights numerically
-    def weight_sort_key(w):
-        num = re.search(r'(\d+)', w)
-        return int(num.group(1)) if num else 0
-    return sorted(all_weights, key=weight_sort_key)
-
-
 # =============================================================================
 # JIU JITSU EXPERT ANALYSIS FUNCTIONS
 # =============================================================================
 
-def extract_discipline(category_name):
-    """Extract Jiu Jitsu discipline from category name.
-
-    JJIF disciplines:
-    - Fighting (traditional gi competition)
-    - Ne-Waza (ground fighting only)
-    - Duo (choreographed pairs)
-    - Contact Ju-Jitsu (full contact striking + grappling)
-    """
-    cat_upper = category_name.upper()
-    if 'NE-WAZA' in cat_upper or 'NEWAZA' in cat_upper or 'NE WAZA' in cat_upper:
-        return 'Ne-Waza'
-    elif 'DUO' in cat_upper or 'SHOW' in cat_upper:
-        return 'Duo'
-    elif 'CONTACT' in cat_upper:
-        return 'Contact'
-    else:
-        return 'Fighting'
-
-
-def extract_age_category(category_name):
-    """Extract age category from category name.
-
-    JJIF age categories:
-    - U16 (Under 16)
-    - U18 (Under 18) / Cadets
-    - U21 (Under 21) / Juniors
-    - Adults / Seniors
-    - Masters (30+)
-    """
-    cat_upper = category_name.upper()
-    if 'U16' in cat_upper or 'UNDER 16' in cat_upper or 'U-16' in cat_upper:
-        return 'U16'
-    elif 'U18' in cat_upper or 'UNDER 18' in cat_upper or 'U-18' in cat_upper or 'CADET' in cat_upper:
-        return 'U18'
-    elif 'U21' in cat_upper or 'UNDER 21' in cat_upper or 'U-21' in cat_upper or 'JUNIOR' in cat_upper:
-        return 'U21'
-    elif 'MASTER' in cat_upper or 'VETERAN' in cat_upper:
-        return 'Masters'
-    elif 'ADULT' in cat_upper or 'SENIOR' in cat_upper:
-        return 'Adults'
-    else:
-        return 'Adults'  # Default
-
-
 def extract_event_tier(event_type):
     """Extract event tier from event type string.
 
@@ -2047,24 +2025,6 @@ def find_peak_performance(profile):
     return peak_year, dict(yearly_stats[peak_year]), trajectory
 
 
-def get_disciplines_competed(profile):
-    """Get all disciplines athlete has competed in."""
-    disciplines = set()
-    for cat in profile.get('categories', []):
-        discipline = extract_discipline(cat.get('category', ''))
-        disciplines.add(discipline)
-    return list(disciplines)
-
-
-def get_age_categories_competed(profile):
-    """Get all age categories athlete has competed in."""
-    age_cats = set()
-    for cat in profile.get('categories', []):
-        age_cat = extract_age_category(cat.get('category', ''))
-        age_cats.add(age_cat)
-    return list(age_cats)
-
-
 def generate_tactical_report(saudi_athlete, opponent):
     """Generate comprehensive tactical analysis for head-to-head matchup.
 
@@ -2198,20 +2158,13 @@ def render_opponent_scouting():
     """Render opponent scouting page - view and analyze pre-scraped opponents."""
     st.markdown('<p class="sub-header">🎯 Opponent Scouting</p>', unsafe_allow_html=True)
 
-    # Load all profiles (pre-scraped data)
-    all_profiles = load_athlete_profiles()
+    # Load Saudi and opponent profiles (pre-scraped data) from the per-country profile shards
+    saudi_profiles = load_country_profiles('KSA')
+    opponent_profiles = load_country_profiles(exclude_country='KSA')
 
-    # Separate Saudi and opponent profiles
-    saudi_profiles = [p for p in all_profiles if p.get('country_code') == 'KSA']
-    opponent_profiles = [p for p in all_profiles if p.get('country_code') != 'KSA']
-
-    # Get unique countries with opponents
-    countries_with_data = {}
-    for p in opponent_profiles:
-        cc = p.get('country_code', 'UNK')
-        if cc not in countries_with_data:
-            countries_with_data[cc] = []
-        countries_with_data[cc].append(p)
+    # Opponent count per country
+    countries_with_data = {code: entry['count'] for code, entry in load_country_index()['countries'].items()
+                           if code != 'KSA'}
 
     # Summary metrics
     col1, col2, col3 = st.columns(3)
@@ -2242,7 +2195,8 @@ def render_opponent_scouting():
     st.markdown("### 🔍 Filter Opponents")
 
     # Get all available weight classes
-    all_weights = get_all_weight_classes(opponent_profiles)
+    opponent_facets = load_country_facets(exclude_country='KSA')
+    all_weights = facet_values(opponent_facets, 'weight')
 
     # Filter row 1: Country, Gender, Weight, Discipline
     col1, col2, col3, col4 = st.columns(4)
@@ -2254,7 +2208,7 @@ def render_opponent_scouting():
             "🌍 Country",
             options=country_options,
             format_func=lambda x: f"All Countries ({len(opponent_profiles)})" if x == 'ALL'
-                        else f"{x} - {COMPETITOR_COUNTRIES.get(x, x)} ({len(countries_with_data.get(x, []))})"
+                        else f"{x} - {COMPETITOR_COUNTRIES.get(x, x)} ({countries_with_data.get(x, 0)})"
         )
 
     with col2:
@@ -2284,24 +2238,29 @@ def render_opponent_scouting():
     if selected_gender == 'All':
         st.warning("⚠️ Showing both Male and Female athletes. For competition scouting, select a specific gender.")
 
-    # Apply filters
-    filtered_opponents = opponent_profiles.copy()
-
-    # Country filter
+    # Apply filters - the country reads one shard, the rest are masks over the facet table
     if selected_country != 'ALL':
-        filtered_opponents = [p for p in filtered_opponents if p.get('country_code') == selected_country]
+        filtered_opponents = load_country_profiles(selected_country)
+        facets = load_country_facets(selected_country)
+    else:
+        filtered_opponents = opponent_profiles
+        facets = opponent_facets
+
+    mask = pd.Series(True, index=facets.index)
 
     # Gender filter
     if selected_gender != 'All':
-        filtered_opponents = [p for p in filtered_opponents if extract_gender_from_categories(p) == selected_gender]
+        mask &= facets['gender'] == selected_gender
 
     # Weight class filter
     if selected_weight != 'All':
-        filtered_opponents = [p for p in filtered_opponents if selected_weight in extract_weight_classes(p)]
+        mask &= has_facet(facets, 'weight', selected_weight)
 
     # Discipline filter
     if selected_discipline != 'All':
-        filtered_opponents = [p for p in filtered_opponents if selected_discipline in get_disciplines_competed(p)]
+        mask &= has_facet(facets, 'discipline', selected_discipline)
+
+    filtered_opponents = select_profiles(filtered_opponents, mask)
 
     st.markdown("---")
 
@@ -2527,41 +2486,20 @@ def render_top_athletes_tab(bracket_data, region="Asian"):
 
     # Initialize analyzer and load matches
     analyzer = LossChainAnalyzer()
-    matches_file = RESULTS_DIR / "all_matches.json"
 
-    if not matches_file.exists():
+    if not MATCHES_TABLE.exists() and not MATCHES_JSON.exists():
         st.warning("No match data available. Run the bracket parser first.")
         st.code("python parse_bracket_html.py --all", language="bash")
         return
 
-    count = analyzer.load_matches(matches_file)
+    count = analyzer.load_matches()
 
     if count == 0:
         st.warning("No matches found in data.")
         return
 
-    # Load athlete profiles for photos
-    profiles = load_athlete_profiles()
-    profile_lookup = {}
-    for p in profiles:
-        # Create lookup by name (normalized) and country
-        name = p.get('name', '').upper().strip()
-        country = p.get('country_code', '').upper()
-        if name:
-            profile_lookup[f"{name}_{country}"] = p
-            # Also try without country for looser matching
-            if name not in profile_lookup:
-                profile_lookup[name] = p
-            # Also store reversed name (LAST FIRST -> FIRST LAST) for match data compatibility
-            parts = name.split()
-            if len(parts) >= 2:
-                # Try "LAST FIRST" format (match data uses this)
-                reversed_name = ' '.join(parts[1:]) + ' ' + parts[0]
-                profile_lookup[f"{reversed_name}_{country}"] = p
-                if reversed_name not in profile_lookup:
-                    profile_lookup[reversed_name] = p
-                # Also try just last name for looser matching
-                profile_lookup[f"{parts[-1]}_{country}"] = p
+    # Athlete profiles for photos, looked up through the identity index
+    identity = load_identity()
 
     # Generate report based on region
     if region == "Asian":
@@ -2652,7 +2590,8 @@ def render_top_athletes_tab(bracket_data, region="Asian"):
                 athlete_country = athlete['country'].upper().strip()
 
                 # Look up profile
-                profile = profile_lookup.get(f"{athlete_name}_{athlete_country}") or profile_lookup.get(athlete_name)
+                athlete_id = identity.resolve(athlete_name, athlete_country) if identity else None
+                profile = load_profile(identity.profile_id(athlete_id)) if athlete_id else None
                 photo_url = profile.get('photo_url', '') if profile else ''
                 flag_url = f"{FLAG_URL_BASE}{athlete_country}.png"
 
@@ -2734,10 +2673,8 @@ def render_asian_top_20_page():
     st.markdown("Top 20 Asian athletes per weight category with their **losses** - study who beat them!")
 
     # Load bracket data for the tab function
-    matches_file = RESULTS_DIR / "all_matches.json"
-    if matches_file.exists():
-        with open(matches_file, 'r', encoding='utf-8') as f:
-            bracket_data = json.load(f)
+    if MATCHES_TABLE.exists() or MATCHES_JSON.exists():
+        bracket_data = load_bracket_data()
         render_top_athletes_tab(bracket_data, region="Asian")
     else:
         st.warning("No match data available. Run the bracket parser first.")
@@ -2750,10 +2687,8 @@ def render_world_top_20_page():
     st.markdown("Top 20 World athletes per weight category with their **losses** - study who beat them!")
 
     # Load bracket data for the tab function
-    matches_file = RESULTS_DIR / "all_matches.json"
-    if matches_file.exists():
-        with open(matches_file, 'r', encoding='utf-8') as f:
-            bracket_data = json.load(f)
+    if MATCHES_TABLE.exists() or MATCHES_JSON.exists():
+        bracket_data = load_bracket_data()
         render_top_athletes_tab(bracket_data, region="World")
     else:
         st.warning("No match data available. Run the bracket parser first.")
@@ -2950,28 +2885,34 @@ def render_visual_bracket(bracket_data):
     # Display info
     st.info(f"**{len(cat_matches)} matches** across **{len(rounds_dict)} rounds**")
 
-    # Define round order (progression from early rounds to final)
-    round_order = [
-        "Round 1", "Round 2", "Round of 16", "Round of 8",
-        "Quarter-Final", "Quarter-Finals", "Quarterfinal",
-        "Semi-Final", "Semi-Finals", "Semifinal",
-        "Bronze Match", "3rd Place", "Bronze",
-        "Final", "Gold Medal Match"
-    ]
-
-    # Sort rounds by tournament progression
-    def get_round_order(rname):
-        rname_lower = rname.lower()
-        for i, r in enumerate(round_order):
-            if r.lower() in rname_lower or rname_lower in r.lower():
-                return i
-        if 'pool' in rname_lower or 'round' in rname_lower:
-            nums = re.findall(r'\d+', rname)
-            if nums:
-                return int(nums[-1])
-        return 50
-
-    sorted_rounds = sorted(rounds_dict.keys(), key=get_round_order)
+    # Parsed brackets carry round depths and the final's position in the tree
+    final = None
+    if has_links(selected_cat):
+        sorted_rounds = [r for r in bracket_round_order(selected_cat) if r in rounds_dict]
+        final = bracket_final_match(selected_cat)
+    else:
+        # Define round order (progression from early rounds to final)
+        round_order = [
+            "Round 1", "Round 2", "Round of 16", "Round of 8",
+            "Quarter-Final", "Quarter-Finals", "Quarterfinal",
+            "Semi-Final", "Semi-Finals", "Semifinal",
+            "Bronze Match", "3rd Place", "Bronze",
+            "Final", "Gold Medal Match"
+        ]
+
+        # Sort rounds by tournament progression
+        def get_round_order(rname):
+            rname_lower = rname.lower()
+            for i, r in enumerate(round_order):
+                if r.lower() in rname_lower or rname_lower in r.lower():
+                    return i
+            if 'pool' in rname_lower or 'round' in rname_lower:
+                nums = re.findall(r'\d+', rname)
+                if nums:
+                    return int(nums[-1])
+            return 50
+
+        sorted_rounds = sorted(rounds_dict.keys(), key=get_round_order)
 
     # Build horizontal bracket view with columns for each round
     num_rounds = len(sorted_rounds)
@@ -3037,16 +2978,21 @@ def render_visual_bracket(bracket_data):
                     """, unsafe_allow_html=True)
 
                 # Show final winner at end of bracket
-                if 'final' in round_name.lower() and round_matches:
-                    final_match = round_matches[-1]
-                    champion = final_match.get('winner', '')
-                    champion_country = final_match.get('winner_country', '')
+                if final is not None:
+                    final_in_round = final if final.get('round') == round_name else None
+                elif 'final' in round_name.lower() and round_matches:
+                    final_in_round = round_matches[-1]
+                else:
+                    final_in_round = None
+                if final_in_round:
+                    champion = final_in_round.get('winner', '')
+                    champion_country = final_in_round.get('winner_country', '')
                     if not champion_country:
                         # Try to get country from winner's corner
-                        if champion == final_match.get('red_corner', {}).get('name'):
-                            champion_country = final_match.get('red_corner', {}).get('country', '')
-                        elif champion == final_match.get('blue_corner', {}).get('name'):
-                            champion_country = final_match.get('blue_corner', {}).get('country', '')
+                        if champion == (final_in_round.get('red_corner') or {}).get('name'):
+                            champion_country = final_in_round['red_corner'].get('country', '')
+                        elif champion == (final_in_round.get('blue_corner') or {}).get('name'):
+                            champion_country = final_in_round['blue_corner'].get('country', '')
                     if champion:
                         is_saudi = champion_country in ['KSA', 'SAU']
                         medal_color = '#006c35' if is_saudi else '#ffc107'
@@ -3496,13 +3442,12 @@ def render_event_brackets():
     with col4:
         # Count Saudi matches from actual match data
         saudi_match_count = 0
-        for event in bracket_data.get('events', []):
-            for cat in event.get('categories', []):
-                for match in cat.get('matches', []):
-                    red = match.get('red_corner') or {}
-                    blue = match.get('blue_corner') or {}
-                    if red.get('country') in ['KSA', 'SAU'] or blue.get('country') in ['KSA', 'SAU']:
-                        saudi_match_count += 1
+        conn = load_db()
+        if conn is not None:
+            try:
+                saudi_match_count = count_country_matches(conn, ['KSA', 'SAU'])
+            except Exception:
+                pass
         st.metric("Saudi Matches", saudi_match_count)
 
     st.markdown("---")
@@ -4308,11 +4253,15 @@ def render_head_to_head():
     Athletes are automatically filtered to show **same-gender opponents only**.
     """)
 
-    profiles = load_athlete_profiles()
+    profiles = load_country_profiles()
+    facets = load_country_facets()
 
     # Split into Saudi and opponents
-    saudi_profiles = [p for p in profiles if p.get('country_code') == 'KSA' and p.get('categories')]
-    opponent_profiles = [p for p in profiles if p.get('country_code') != 'KSA' and p.get('categories')]
+    is_saudi = facets['country_code'] == 'KSA'
+    saudi_profiles = select_profiles(profiles, facets['has_data'] & is_saudi)
+    opponent_mask = facets['has_data'] & ~is_saudi
+    opponent_profiles = select_profiles(profiles, opponent_mask)
+    opponent_facets = facets[opponent_mask].reset_index(drop=True)
 
     if not saudi_profiles:
         st.warning("No Saudi athlete profiles with competition data found.")
@@ -4338,14 +4287,15 @@ def render_head_to_head():
     saudi_gender = extract_gender_from_categories(saudi_athlete) if saudi_athlete else 'Unknown'
 
     # Filter opponents to SAME GENDER ONLY
-    gender_matched_opponents = [
-        p for p in opponent_profiles
-        if extract_gender_from_categories(p) == saudi_gender or saudi_gender == 'Unknown'
-    ]
+    if saudi_gender != 'Unknown':
+        gender_mask = opponent_facets['gender'] == saudi_gender
+    else:
+        gender_mask = pd.Series(True, index=opponent_facets.index)
+    gender_matched_opponents = select_profiles(opponent_profiles, gender_mask)
+    gender_matched_facets = opponent_facets[gender_mask].reset_index(drop=True)
 
     # Further filter by overlapping weight categories for better matchups
-    if saudi_athlete:
-        saudi_weights = set(extract_weight_classes(saudi_athlete))
+    saudi_weights = set(extract_weight_classes(saudi_athlete)) if saudi_athlete else set()
 
     with col2:
         st.markdown("### 🎯 Opponent")
@@ -4356,19 +4306,18 @@ def render_head_to_head():
         else:
             st.caption(f"Showing all opponents ({len(gender_matched_opponents)} athletes)")
 
-        # Sort opponents by relevance (overlapping weight categories first)
-        def opponent_relevance(opp):
-            opp_weights = set(extract_weight_classes(opp))
-            overlap = len(saudi_weights & opp_weights) if saudi_athlete else 0
-            medals = opp.get('medal_summary', {})
-            medal_score = medals.get('gold', 0) * 3 + medals.get('silver', 0) * 2 + medals.get('bronze', 0)
-            return (overlap, medal_score)
+        # Sort opponents by relevance (overlapping weight categories first, then medals)
+        overlap = np.zeros(len(gender_matched_facets), dtype=np.int32)
+        for weight in saudi_weights:
+            overlap += has_facet(gender_matched_facets, 'weight', weight).to_numpy()
+        order = np.lexsort((-gender_matched_facets['medal_score'].to_numpy(), -overlap))
 
-        sorted_opponents = sorted(gender_matched_opponents, key=opponent_relevance, reverse=True)
+        sorted_opponents = [gender_matched_opponents[i] for i in order]
+        opp_weights = gender_matched_facets['weights'].to_numpy()
 
         opp_names = {
-            p.get('profile_id'): f"{p.get('name', 'Unknown')} ({p.get('country_code')}) - {', '.join(extract_weight_classes(p)) or 'N/A'}"
-            for p in sorted_opponents
+            p.get('profile_id'): f"{p.get('name', 'Unknown')} ({p.get('country_code')}) - {opp_weights[i] or 'N/A'}"
+            for p, i in zip(sorted_opponents, order)
         }
         selected_opp = st.selectbox(
             "Select Opponent",
@@ -4429,6 +4378,64 @@ def render_head_to_head():
             st.metric("Total Events", stats.get('total_events', 'N/A'))
             st.metric("Total Wins", stats.get('total_wins', 'N/A'))
 
+        # Bout history from the head-to-head index
+        st.markdown("---")
+        st.markdown("### 🥊 Bout History")
+
+        h2h = load_h2h()
+        saudi_id = str(saudi_athlete.get('profile_id'))
+        opp_id = str(opponent.get('profile_id'))
+        bout_table = load_match_table(columns=BOUT_COLUMNS) if h2h else None
+        bouts = load_bouts(h2h.bouts_between(saudi_id, opp_id), bout_table) if h2h else []
+
+        if bouts:
+            saudi_wins = sum(1 for b in bouts if b['winner_side'] == h2h.side_of(b['row'], saudi_id))
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Bouts", len(bouts))
+            with col2:
+                st.metric("🇸🇦 Saudi Wins", saudi_wins)
+            with col3:
+                st.metric("🎯 Opponent Wins", len(bouts) - saudi_wins)
+
+            for bout in bouts:
+                side = h2h.side_of(bout['row'], saudi_id)
+                other = 'blue' if side == 'red' else 'red'
+                won = bout['winner_side'] == side
+                result_color = "#006C35" if won else "#dc3545"
+                st.markdown(f"""
+                <div style="padding: 10px; margin: 6px 0; background: white; border-radius: 8px;
+                            border-left: 4px solid {result_color};">
+                    <strong>{'WIN' if won else 'LOSS'}</strong> {bout[side].get('score', '-')} - {bout[other].get('score', '-')}
+                    <small style="color: #666;">| {bout['event']} | {bout['category']} | {bout['round']}</small>
+                </div>
+                """, unsafe_allow_html=True)
+        else:
+            st.info("These athletes have not met in the parsed bracket data.")
+
+        # Common opponents - how each fared against the same athletes
+        if h2h:
+            saudi_opps = dict(h2h.opponents_of(saudi_id))
+            opp_opps = dict(h2h.opponents_of(opp_id))
+            common = sorted(set(saudi_opps) & set(opp_opps))
+
+            if common:
+                identity = load_identity()
+
+                def record_against(athlete_id, rival_id):
+                    results = [b['winner_side'] == h2h.side_of(b['row'], athlete_id)
+                               for b in load_bouts(h2h.bouts_between(athlete_id, rival_id), bout_table)]
+                    return f"{sum(results)}-{len(results) - sum(results)}"
+
+                st.markdown("#### Common Opponents")
+                st.dataframe(pd.DataFrame([{
+                    'Opponent': identity.athletes.get(rival_id, {}).get('name', rival_id) if identity else rival_id,
+                    'Country': identity.athletes.get(rival_id, {}).get('country', '') if identity else '',
+                    'Saudi (W-L)': record_against(saudi_id, rival_id),
+                    'Opponent (W-L)': record_against(opp_id, rival_id)
+                } for rival_id in common]), use_container_width=True, hide_index=True)
+
         # Category overlap analysis
         st.markdown("---")
         st.markdown("### ⚖️ Shared Weight Categories")
@@ -5,41 +5,201 @@ Pre-aggregates and caches data for fast dashboard loading.
 Run periodically or after scraping to update the cache.
 
 Usage:
-    python data_cache.py              # Build all caches
-    python data_cache.py --profiles   # Only profile cache
-    python data_cache.py --matches    # Only match cache
+    python data_cache.py                  # Build all caches
+    python data_cache.py --incremental    # Only reprocess changed profiles/events
+    python data_cache.py --profiles       # Only profile cache
+    python data_cache.py --matches        # Only match cache
 """
 
 import json
-import pickle
+import hashlib
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
 import sys
 
+import pandas as pd
+
+from match_store import load_match_table
+from athlete_db import build_database, database_is_stale
+from identity_index import build_identity_index, load_identity_index
+from profile_snapshot import write_snapshot, open_snapshot, SnapshotError, SNAPSHOT_FILE
+from profile_store import load_profile_index, load_shard, PROFILES_JSON, SHARD_DIR
+from h2h_index import build_h2h_index, load_h2h_index, h2h_index_is_stale
+
 sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
 BASE_DIR = Path(__file__).parent
-PROFILES_DIR = BASE_DIR / "Profiles"
 RESULTS_DIR = BASE_DIR / "Results"
 CACHE_DIR = BASE_DIR / "Cache"
 CACHE_DIR.mkdir(exist_ok=True)
 
+MANIFEST_FILE = CACHE_DIR / "manifest.json"
+MANIFEST_VERSION = 1
 
-def build_profile_cache():
-    """Build aggregated profile cache for fast loading."""
-    print("Building profile cache...")
+# Asian countries
+ASIAN_CODES = [
+    'KSA', 'UAE', 'KUW', 'BRN', 'QAT', 'JOR', 'IRI', 'KAZ', 'UZB',
+    'THA', 'JPN', 'KOR', 'MGL', 'INA', 'PHI', 'VIE', 'MAS', 'SGP',
+    'IND', 'PAK', 'TJK', 'KGZ', 'TKM', 'LBN', 'SYR', 'IRQ', 'AFG',
+    'NPL', 'CHN', 'TPE', 'HKG'
+]
 
-    profiles = []
-    profile_files = list(PROFILES_DIR.glob("*.json"))
 
-    for pf in profile_files:
+# =============================================================================
+# MANIFEST - input fingerprints for incremental rebuilds
+# =============================================================================
+def load_manifest():
+    """Load the input manifest (empty if missing or from another version)."""
+    if MANIFEST_FILE.exists():
         try:
-            with open(pf, 'r', encoding='utf-8') as f:
-                profile = json.load(f)
-                profiles.append(profile)
-        except Exception as e:
-            print(f"  Error loading {pf.name}: {e}")
+            with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest
+        except Exception:
+            pass
+    return {'version': MANIFEST_VERSION, 'profiles': {}, 'events': {}}
+
+
+def save_manifest(manifest):
+    """Save the input manifest."""
+    manifest['updated_at'] = datetime.now().isoformat()
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+
+def file_fingerprint(path, previous=None):
+    """Content hash, mtime and size of a file.
+
+    The hash is reused from the previous fingerprint when mtime and size
+    are unchanged, so unchanged files are never re-read.
+    """
+    stat = path.stat()
+    if previous and previous.get('mtime') == stat.st_mtime and previous.get('size') == stat.st_size:
+        return previous
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+    return {'sha1': digest.hexdigest(), 'mtime': stat.st_mtime, 'size': stat.st_size}
+
+
+def _country_stats(athletes):
+    """Summary stats for one country's athletes."""
+    total_gold = sum(a.get('medal_summary', {}).get('gold', 0) for a in athletes)
+    total_silver = sum(a.get('medal_summary', {}).get('silver', 0) for a in athletes)
+    total_bronze = sum(a.get('medal_summary', {}).get('bronze', 0) for a in athletes)
+
+    # Top performers
+    top_by_winrate = sorted(
+        [a for a in athletes if a.get('overall_stats', {}).get('total_events', 0) >= 3],
+        key=lambda x: float(str(x.get('overall_stats', {}).get('win_rate', '0%')).replace('%', '') or 0),
+        reverse=True
+    )[:10]
+
+    return {
+        'total_athletes': len(athletes),
+        'total_gold': total_gold,
+        'total_silver': total_silver,
+        'total_bronze': total_bronze,
+        'total_medals': total_gold + total_silver + total_bronze,
+        'top_performers': [
+            {
+                'name': a.get('name'),
+                'win_rate': a.get('overall_stats', {}).get('win_rate'),
+                'events': a.get('overall_stats', {}).get('total_events'),
+                'medals': a.get('medal_summary', {})
+            }
+            for a in top_by_winrate
+        ]
+    }
+
+
+def _index_profile(search_index, p):
+    """Add a profile to the search index."""
+    name = p.get('name', '').lower()
+    profile_id = p.get('profile_id', '')
+    search_index[name] = profile_id
+    # Also index partial names
+    parts = name.split()
+    for part in parts:
+        if part not in search_index:
+            search_index[part] = []
+        if isinstance(search_index[part], list):
+            search_index[part].append(profile_id)
+
+
+def _unindex_profile(search_index, p):
+    """Remove a profile's entries from the search index."""
+    name = p.get('name', '').lower()
+    profile_id = p.get('profile_id', '')
+    if search_index.get(name) == profile_id:
+        del search_index[name]
+    for part in name.split():
+        ids = search_index.get(part)
+        if isinstance(ids, list) and profile_id in ids:
+            ids.remove(profile_id)
+            if not ids:
+                del search_index[part]
+
+
+
+def build_profile_cache(incremental=False):
+    """Build aggregated profile cache for fast loading.
+
+    Profiles come from the per-country shards of Results/all_profiles.json
+    (see profile_store.py), the same source as the athlete database and the
+    identity index. With incremental=True only shards whose content hash
+    changed are re-read, and the country stats and search index are patched
+    in place. The returned cache carries a 'delta' of affected
+    countries/categories.
+    """
+    print("Building profile cache...")
+
+    manifest = load_manifest()
+    previous = manifest.get('profiles', {}) if incremental else {}
+    old_cache = None
+    if incremental:
+        try:
+            old_cache = open_snapshot()
+        except SnapshotError as e:
+            print(f"  {e} - doing a full rebuild")
+    if old_cache is None:
+        previous = {}
+
+    index = load_profile_index()
+    shard_files = sorted(entry['file'] for entry in index['countries'].values()) if index else []
+    fingerprints = {}
+    changed = []
+    for name in shard_files:
+        fingerprints[name] = file_fingerprint(SHARD_DIR / name, previous.get(name))
+        if name not in previous or fingerprints[name]['sha1'] != previous[name]['sha1']:
+            changed.append(name)
+    removed = [name for name in previous if name not in fingerprints]
+
+    profiles_by_file = {}
+    if old_cache:
+        for name in old_cache.get('files', {}):
+            if name in fingerprints and name not in changed:
+                profiles_by_file[name] = old_cache.file_profiles(name)
+
+    # Old versions of changed/removed shards
+    stale_profiles = []
+    if old_cache:
+        for name in removed + changed:
+            stale_profiles.extend(old_cache.file_profiles(name))
+
+    new_profiles = []
+    for name in changed:
+        profiles_by_file[name] = load_shard(Path(name).stem, index)
+        new_profiles.extend(profiles_by_file[name])
+
+    # Keep shard order stable
+    profiles_by_file = {name: profiles_by_file.get(name, []) for name in shard_files}
+    profiles = [p for file_profiles in profiles_by_file.values() for p in file_profiles]
 
     # Aggregate by country
     by_country = defaultdict(list)
@@ -47,50 +207,32 @@ def build_profile_cache():
         country = p.get('country_code', 'UNK')
         by_country[country].append(p)
 
+    touched = stale_profiles + new_profiles
+    affected_countries = {p.get('country_code', 'UNK') for p in touched}
+    affected_categories = {cat.get('category', '') for p in touched for cat in p.get('categories', [])}
+
     # Build summary stats
-    country_stats = {}
-    for country, athletes in by_country.items():
-        total_gold = sum(a.get('medal_summary', {}).get('gold', 0) for a in athletes)
-        total_silver = sum(a.get('medal_summary', {}).get('silver', 0) for a in athletes)
-        total_bronze = sum(a.get('medal_summary', {}).get('bronze', 0) for a in athletes)
-
-        # Top performers
-        top_by_winrate = sorted(
-            [a for a in athletes if a.get('overall_stats', {}).get('total_events', 0) >= 3],
-            key=lambda x: float(str(x.get('overall_stats', {}).get('win_rate', '0%')).replace('%', '') or 0),
-            reverse=True
-        )[:10]
-
-        country_stats[country] = {
-            'total_athletes': len(athletes),
-            'total_gold': total_gold,
-            'total_silver': total_silver,
-            'total_bronze': total_bronze,
-            'total_medals': total_gold + total_silver + total_bronze,
-            'top_performers': [
-                {
-                    'name': a.get('name'),
-                    'win_rate': a.get('overall_stats', {}).get('win_rate'),
-                    'events': a.get('overall_stats', {}).get('total_events'),
-                    'medals': a.get('medal_summary', {})
-                }
-                for a in top_by_winrate
-            ]
-        }
+    if old_cache:
+        country_stats = dict(old_cache['country_stats'])
+        for country in affected_countries:
+            if country in by_country:
+                country_stats[country] = _country_stats(by_country[country])
+            else:
+                country_stats.pop(country, None)
+    else:
+        country_stats = {country: _country_stats(athletes) for country, athletes in by_country.items()}
 
     # Create searchable index
-    search_index = {}
-    for p in profiles:
-        name = p.get('name', '').lower()
-        profile_id = p.get('profile_id', '')
-        search_index[name] = profile_id
-        # Also index partial names
-        parts = name.split()
-        for part in parts:
-            if part not in search_index:
-                search_index[part] = []
-            if isinstance(search_index[part], list):
-                search_index[part].append(profile_id)
+    if old_cache:
+        search_index = old_cache['search_index']
+        for p in stale_profiles:
+            _unindex_profile(search_index, p)
+        for p in new_profiles:
+            _index_profile(search_index, p)
+    else:
+        search_index = {}
+        for p in profiles:
+            _index_profile(search_index, p)
 
     cache = {
         'timestamp': datetime.now().isoformat(),
@@ -98,67 +240,201 @@ def build_profile_cache():
         'countries': list(by_country.keys()),
         'country_stats': country_stats,
         'search_index': search_index,
-        'profiles': profiles  # Full profiles for detail views
+        'profiles': profiles,  # Full profiles for detail views
+        'profiles_by_file': profiles_by_file  # Same objects, keyed by shard file
     }
 
-    # Save as pickle for fastest loading
-    cache_file = CACHE_DIR / "profiles_cache.pkl"
-    with open(cache_file, 'wb') as f:
-        pickle.dump(cache, f)
+    # Versioned snapshot - readers mmap it and decode single profiles
+    if old_cache:
+        old_cache.close()
+    write_snapshot(profiles, {k: v for k, v in cache.items() if k not in ('profiles', 'profiles_by_file')},
+                   files=profiles_by_file)
+
+    legacy_file = CACHE_DIR / "profiles_cache.pkl"
+    if legacy_file.exists():
+        legacy_file.unlink()
 
     # Also save JSON for debugging
-    json_cache = {k: v for k, v in cache.items() if k != 'profiles'}
+    json_cache = {k: v for k, v in cache.items() if k not in ('profiles', 'profiles_by_file')}
     json_cache['profile_count'] = len(profiles)
     with open(CACHE_DIR / "profiles_summary.json", 'w', encoding='utf-8') as f:
         json.dump(json_cache, f, indent=2, ensure_ascii=False)
 
+    manifest['profiles'] = fingerprints
+    save_manifest(manifest)
+
+    if old_cache:
+        print(f"  {len(changed)} changed, {len(removed)} removed country shards "
+              f"({len(affected_countries)} countries patched)")
     print(f"  Cached {len(profiles)} profiles from {len(by_country)} countries")
-    return cache
 
+    cache['delta'] = {
+        'full': old_cache is None,
+        'countries': sorted(affected_countries),
+        'categories': sorted(affected_categories)
+    }
+    return cache
 
-def build_match_cache():
-    """Build aggregated match cache for fast loading."""
-    print("Building match cache...")
 
-    # Load all_matches.json if exists
-    matches_file = BASE_DIR / "all_matches.json"
-    if not matches_file.exists():
-        print("  No all_matches.json found")
+def _match_records(df):
+    """Match dicts (red/blue/winner layout) from match table rows."""
+    records = []
+    for row in df.to_dict('records'):
+        corners = {}
+        for side in ('red', 'blue'):
+            score = row[f'{side}_score']
+            corners[side] = {
+                'name': row[f'{side}_name'] if isinstance(row[f'{side}_name'], str) else '',
+                'country': row[f'{side}_country'] if isinstance(row[f'{side}_country'], str) else '',
+                'federation': row[f'{side}_federation'] if isinstance(row[f'{side}_federation'], str) else '',
+                'score': None if pd.isna(score) else int(score)
+            }
+
+        side = row['winner_side'] if isinstance(row['winner_side'], str) else None
+        records.append({
+            'event': row['event'],
+            'verid': row['verid'],
+            'category': row['category'],
+            'catid': row['catid'],
+            'round': row['round'],
+            'red': corners['red'],
+            'blue': corners['blue'],
+            'winner': corners[side]['name'] if side else None,
+            'winner_country': corners[side]['country'] if side else None
+        })
+    return records
+
+
+def _event_digest(df):
+    """Content hash of one event's match rows."""
+    hashed = pd.util.hash_pandas_object(df, index=False)
+    return hashlib.sha1(hashed.values.tobytes()).hexdigest()
+
+
+def load_match_events():
+    """Load the match table grouped by event with a content digest per event.
+
+    Returns {verid: {'digest': ..., 'rows': DataFrame}} or None if there is
+    no match data. Match records are only built for events a consumer needs.
+    """
+    df = load_match_table()
+    if df is None:
         return None
 
-    with open(matches_file, 'r', encoding='utf-8') as f:
-        matches = json.load(f)
+    return {
+        verid: {'digest': _event_digest(group), 'rows': group}
+        for verid, group in df.groupby('verid', observed=True, sort=False)
+    }
 
-    # Aggregate by event
-    by_event = defaultdict(list)
-    by_category = defaultdict(list)
-    saudi_matches = []
 
+def _event_records(event):
+    """Match records for one event (built once, shared by consumers)."""
+    if 'records' not in event:
+        event['records'] = _match_records(event['rows'])
+    return event['records']
+
+
+def _event_changes(match_events, manifest, consumer, incremental):
+    """Events changed/removed since `consumer` last ran; records new digests."""
+    events_manifest = manifest.setdefault('events', {})
+    previous = events_manifest.get(consumer, {}) if incremental else {}
+
+    digests = {verid: ev['digest'] for verid, ev in match_events.items()}
+    changed = [verid for verid, digest in digests.items() if previous.get(verid) != digest]
+    removed = [verid for verid in previous if verid not in digests]
+
+    events_manifest[consumer] = digests
+    return changed, removed
+
+
+def _is_saudi_match(m):
+    """Check for Saudi involvement in a match record."""
+    red = m.get('red', {})
+    blue = m.get('blue', {})
+    if any(c in str(red.get('country', '')) for c in ['KSA', 'Saudi', 'SAU']):
+        return True
+    return any(c in str(blue.get('country', '')) for c in ['KSA', 'Saudi', 'SAU'])
+
+
+def _event_match_summary(matches):
+    """Per-event aggregates, folded into the match cache."""
+    by_category = defaultdict(int)
     for m in matches:
-        event = m.get('event', 'Unknown')
-        category = m.get('category', 'Unknown')
-        by_event[event].append(m)
-        by_category[category].append(m)
-
-        # Check for Saudi involvement
-        red = m.get('red', {})
-        blue = m.get('blue', {})
-        if any(c in str(red.get('country', '')) for c in ['KSA', 'Saudi', 'SAU']):
-            saudi_matches.append(m)
-        elif any(c in str(blue.get('country', '')) for c in ['KSA', 'Saudi', 'SAU']):
-            saudi_matches.append(m)
-
-    # Calculate Saudi stats
+        by_category[m.get('category', 'Unknown')] += 1
+
+    saudi_matches = [m for m in matches if _is_saudi_match(m)]
     saudi_wins = sum(1 for m in saudi_matches
                      if any(c in str(m.get('winner', '')) for c in ['KSA', 'Saudi']))
 
+    return {
+        'event': matches[0].get('event', 'Unknown') if matches else 'Unknown',
+        'total_matches': len(matches),
+        'matches_by_category': dict(by_category),
+        'saudi_matches': saudi_matches,
+        'saudi_wins': saudi_wins
+    }
+
+
+def build_match_cache(incremental=False, match_events=None):
+    """Build aggregated match cache for fast loading.
+
+    Per-event summaries are kept in matches_state.json; an incremental build
+    only recomputes the events whose rows changed.
+    """
+    print("Building match cache...")
+
+    if match_events is None:
+        match_events = load_match_events()
+
+    if match_events is None:
+        print("  No match table found")
+        return None
+
+    state_file = CACHE_DIR / "matches_state.json"
+    incremental = incremental and state_file.exists()
+    per_event = {}
+    if incremental:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            per_event = json.load(f)
+
+    manifest = load_manifest()
+    changed, removed = _event_changes(match_events, manifest, 'matches', incremental)
+
+    for verid in removed:
+        per_event.pop(verid, None)
+    for verid in changed:
+        per_event[verid] = _event_match_summary(_event_records(match_events[verid]))
+
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump(per_event, f, ensure_ascii=False)
+    save_manifest(manifest)
+
+    # State from before the JSON format
+    legacy_state = CACHE_DIR / "matches_state.pkl"
+    if legacy_state.exists():
+        legacy_state.unlink()
+
+    # Fold per-event summaries
+    by_event = defaultdict(int)
+    by_category = defaultdict(int)
+    saudi_matches = []
+    saudi_wins = 0
+    for summary in per_event.values():
+        by_event[summary['event']] += summary['total_matches']
+        for cat, n in summary['matches_by_category'].items():
+            by_category[cat] += n
+        saudi_matches.extend(summary['saudi_matches'])
+        saudi_wins += summary['saudi_wins']
+
+    total_matches = sum(by_event.values())
+
     cache = {
         'timestamp': datetime.now().isoformat(),
-        'total_matches': len(matches),
+        'total_matches': total_matches,
         'events': list(by_event.keys()),
         'categories': list(by_category.keys()),
-        'matches_by_event': {k: len(v) for k, v in by_event.items()},
-        'matches_by_category': {k: len(v) for k, v in by_category.items()},
+        'matches_by_event': dict(by_event),
+        'matches_by_category': dict(by_category),
         'saudi_matches_count': len(saudi_matches),
         'saudi_wins': saudi_wins,
         'saudi_win_rate': f"{(saudi_wins/len(saudi_matches)*100):.1f}%" if saudi_matches else "N/A"
@@ -172,42 +448,22 @@ def build_match_cache():
     with open(CACHE_DIR / "saudi_matches.json", 'w', encoding='utf-8') as f:
         json.dump(saudi_matches, f, indent=2, ensure_ascii=False)
 
-    print(f"  Cached {len(matches)} matches, {len(saudi_matches)} Saudi matches")
+    if incremental:
+        print(f"  {len(changed)} changed, {len(removed)} removed events")
+    print(f"  Cached {total_matches} matches, {len(saudi_matches)} Saudi matches")
     return cache
 
 
-def build_rankings_cache():
-    """Build Asian and World rankings cache."""
-    print("Building rankings cache...")
-
-    # Load profiles
-    cache_file = CACHE_DIR / "profiles_cache.pkl"
-    if not cache_file.exists():
-        print("  Building profiles first...")
-        build_profile_cache()
-
-    with open(cache_file, 'rb') as f:
-        profile_cache = pickle.load(f)
-
-    profiles = profile_cache.get('profiles', [])
-
-    # Asian countries
-    asian_codes = [
-        'KSA', 'UAE', 'KUW', 'BRN', 'QAT', 'JOR', 'IRI', 'KAZ', 'UZB',
-        'THA', 'JPN', 'KOR', 'MGL', 'INA', 'PHI', 'VIE', 'MAS', 'SGP',
-        'IND', 'PAK', 'TJK', 'KGZ', 'TKM', 'LBN', 'SYR', 'IRQ', 'AFG',
-        'NPL', 'CHN', 'TPE', 'HKG'
-    ]
-
-    # Filter Asian athletes
-    asian_athletes = [p for p in profiles if p.get('country_code') in asian_codes]
-
-    # Build rankings by category
+def _category_rankings(profiles, cat_names=None):
+    """Ranked entries per category, optionally only for the given categories."""
     rankings = defaultdict(list)
 
     for p in profiles:
         for cat in p.get('categories', []):
             cat_name = cat.get('category', '')
+            if cat_names is not None and cat_name not in cat_names:
+                continue
+
             rank = cat.get('rank')
             points = cat.get('points', 0)
 
@@ -220,30 +476,58 @@ def build_rankings_cache():
                     'profile_id': p.get('profile_id')
                 })
 
+    return rankings
+
+
+def build_rankings_cache(incremental=False, delta=None):
+    """Build Asian and World rankings cache.
+
+    With incremental=True and a profile delta, only the categories touched
+    by changed profiles are re-ranked.
+    """
+    print("Building rankings cache...")
+
+    # Load profiles
+    snapshot = load_profiles_fast()
+    if snapshot is None:
+        print("  Building profiles first...")
+        build_profile_cache()
+        snapshot = load_profiles_fast()
+
+    profiles = snapshot.profiles() if snapshot is not None else []
+
+    # Filter Asian athletes
+    asian_athletes = [p for p in profiles if p.get('country_code') in ASIAN_CODES]
+
+    rankings_file = CACHE_DIR / "rankings_cache.json"
+    patch = incremental and delta is not None and not delta.get('full') and rankings_file.exists()
+    cat_names = set(delta['categories']) if patch else None
+
+    # Build rankings by category
+    rankings = _category_rankings(profiles, cat_names)
+
     # Sort each category by rank
     for cat in rankings:
         rankings[cat] = sorted(rankings[cat], key=lambda x: x['rank'])[:50]  # Top 50
 
     # Asian-only rankings
-    asian_rankings = defaultdict(list)
-    for p in asian_athletes:
-        for cat in p.get('categories', []):
-            cat_name = cat.get('category', '')
-            rank = cat.get('rank')
-            points = cat.get('points', 0)
-
-            if rank and points:
-                asian_rankings[cat_name].append({
-                    'name': p.get('name'),
-                    'country': p.get('country_code'),
-                    'rank': rank,
-                    'points': points,
-                    'profile_id': p.get('profile_id')
-                })
+    asian_rankings = _category_rankings(asian_athletes, cat_names)
 
     for cat in asian_rankings:
         asian_rankings[cat] = sorted(asian_rankings[cat], key=lambda x: x['rank'])[:20]
 
+    if patch:
+        with open(rankings_file, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+        world = old.get('world_rankings', {})
+        asian = old.get('asian_rankings', {})
+        for cat in cat_names:
+            world.pop(cat, None)
+            asian.pop(cat, None)
+        world.update(rankings)
+        asian.update(asian_rankings)
+        rankings, asian_rankings = world, asian
+
     cache = {
         'timestamp': datetime.now().isoformat(),
         'world_rankings': dict(rankings),
@@ -251,61 +535,70 @@ def build_rankings_cache():
         'categories': list(rankings.keys())
     }
 
-    with open(CACHE_DIR / "rankings_cache.json", 'w', encoding='utf-8') as f:
+    with open(rankings_file, 'w', encoding='utf-8') as f:
         json.dump(cache, f, indent=2, ensure_ascii=False)
 
+    if patch:
+        print(f"  Re-ranked {len(cat_names)} categories")
     print(f"  Cached rankings for {len(rankings)} categories")
     return cache
 
 
-def build_head_to_head_index():
-    """Build head-to-head match index for quick lookups."""
-    print("Building head-to-head index...")
-
-    matches_file = BASE_DIR / "all_matches.json"
-    if not matches_file.exists():
-        print("  No all_matches.json found")
-        return None
-
-    with open(matches_file, 'r', encoding='utf-8') as f:
-        matches = json.load(f)
+def build_head_to_head_index(incremental=False, match_events=None):
+    """Build the binary head-to-head index (see h2h_index.py).
 
-    # Build athlete pair index
-    h2h_index = defaultdict(list)
+    The index stores match table row positions, which move whenever any
+    event changes, so it is rebuilt whole - an incremental run only skips
+    it when no event changed.
+    """
+    if match_events is None:
+        match_events = load_match_events()
 
-    for m in matches:
-        red = m.get('red', {}).get('name', '')
-        blue = m.get('blue', {}).get('name', '')
+    if match_events is None:
+        print("Building head-to-head index...")
+        print("  No match table found")
+        return None
 
-        if red and blue:
-            # Create consistent key (alphabetically sorted)
-            key = tuple(sorted([red.lower(), blue.lower()]))
-            h2h_index[str(key)].append(m)
+    manifest = load_manifest()
+    changed, removed = _event_changes(match_events, manifest, 'h2h', incremental)
 
-    # Save index
-    with open(CACHE_DIR / "h2h_index.json", 'w', encoding='utf-8') as f:
-        json.dump({
-            'timestamp': datetime.now().isoformat(),
-            'total_pairs': len(h2h_index),
-            'index': {k: v for k, v in h2h_index.items()}
-        }, f, indent=2, ensure_ascii=False)
+    if incremental and not changed and not removed and not h2h_index_is_stale():
+        print("Building head-to-head index...")
+        print("  No changed events - index is current")
+        return load_h2h_index()
 
-    print(f"  Indexed {len(h2h_index)} athlete pairs")
-    return h2h_index
+    index = build_h2h_index()
+    save_manifest(manifest)
+    return index
 
 
-def build_all_caches():
+def build_all_caches(incremental=False):
     """Build all caches."""
     print("=" * 50)
-    print("BUILDING ALL DATA CACHES")
+    print("BUILDING ALL DATA CACHES" + (" (INCREMENTAL)" if incremental else ""))
     print("=" * 50)
 
     start = datetime.now()
 
-    build_profile_cache()
-    build_match_cache()
-    build_rankings_cache()
-    build_head_to_head_index()
+    profile_cache = build_profile_cache(incremental)
+
+    # Read the match table once for both match consumers
+    match_events = load_match_events()
+
+    build_match_cache(incremental, match_events)
+    build_rankings_cache(incremental, profile_cache.get('delta'))
+    # Identity index: reused when profiles and matches haven't changed
+    if incremental:
+        load_identity_index()
+    else:
+        build_identity_index()
+    build_head_to_head_index(incremental, match_events)
+    # The database stores the fingerprint of its inputs - skip it when they haven't changed
+    if incremental and not database_is_stale():
+        print("Building athlete/match database...")
+        print("  No changed inputs - database is current")
+    else:
+        build_database()
 
     elapsed = (datetime.now() - start).total_seconds()
 
@@ -316,13 +609,30 @@ def build_all_caches():
 
 
 # Quick load functions for dashboard
+def profile_snapshot_is_stale():
+    """True if the snapshot is missing or older than all_profiles.json (False without it)."""
+    if not PROFILES_JSON.exists():
+        return False
+    if not SNAPSHOT_FILE.exists():
+        return True
+    return PROFILES_JSON.stat().st_mtime > SNAPSHOT_FILE.stat().st_mtime
+
+
 def load_profiles_fast():
-    """Load profiles from cache (fast)."""
-    cache_file = CACHE_DIR / "profiles_cache.pkl"
-    if cache_file.exists():
-        with open(cache_file, 'rb') as f:
-            return pickle.load(f)
-    return None
+    """Open the profile snapshot (fast - memory-mapped, profiles decoded on access).
+
+    Only opens an existing snapshot: returns None when it is missing, older
+    than all_profiles.json, damaged or from another format version, and the
+    caller falls back to all_profiles.json. Rebuilding is left to
+    build_profile_cache() (python data_cache.py).
+    """
+    if profile_snapshot_is_stale():
+        return None
+    try:
+        return open_snapshot()
+    except SnapshotError as e:
+        print(f"  {e} - run: python data_cache.py --profiles")
+        return None
 
 
 def load_saudi_matches_fast():
@@ -351,16 +661,18 @@ if __name__ == "__main__":
     parser.add_argument('--matches', action='store_true', help='Only build match cache')
     parser.add_argument('--rankings', action='store_true', help='Only build rankings cache')
     parser.add_argument('--h2h', action='store_true', help='Only build head-to-head index')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help='Only reprocess profiles/events that changed since the last build')
 
     args = parser.parse_args()
 
     if args.profiles:
-        build_profile_cache()
+        build_profile_cache(args.incremental)
     elif args.matches:
-        build_match_cache()
+        build_match_cache(args.incremental)
     elif args.rankings:
         build_rankings_cache()
     elif args.h2h:
-        build_head_to_head_index()
+        build_head_to_head_index(args.incremental)
     else:
-        build_all_caches()
+        build_all_caches(args.incremental)
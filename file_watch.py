@@ -0,0 +1,140 @@
+"""
+File Watch
+==========
+Source file fingerprints and a polling watcher for the data directories.
+
+A fingerprint is (name, mtime_ns, size, content digest). The digest is
+only recomputed when mtime or size changes, so checking an unchanged file
+costs one stat() call, and a file rewritten with identical content keeps
+its fingerprint. The dashboard uses fingerprints as cache keys: a loader
+re-runs exactly when one of its input files changes.
+
+DirectoryWatcher polls the source inputs in Results/ and Profiles/ and
+reports which files were added, modified or removed since the previous
+poll. Derived outputs (profile shards, match shards and table, parse
+report, scraper progress files) are not watched: some are rebuilt by the
+dashboard's own loaders, and a rebuild must not look like new data.
+
+Usage:
+    python file_watch.py                  # Show fingerprints of the data files
+    python file_watch.py --watch          # Print changes as they happen
+"""
+import os
+import sys
+import time
+import hashlib
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+RESULTS_DIR = BASE_DIR / "Results"
+PROFILES_DIR = BASE_DIR / "Profiles"
+
+WATCH_DIRS = [RESULTS_DIR, PROFILES_DIR]
+WATCH_SUFFIXES = ('.json',)
+
+# Derived outputs in the watched directories - subdirectories such as
+# Results/profiles/ and Results/matches/ are never scanned either
+DERIVED_FILES = ('all_matches.parquet', 'parse_report.json')
+DERIVED_SUFFIXES = ('_progress.json',)
+
+DIGEST_CHUNK = 1 << 20
+
+# path -> ((mtime_ns, size), digest), kept for the life of the process
+_digests = {}
+
+
+def _digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_fingerprint(path):
+    """(name, mtime_ns, size, digest) of a file, or (name, None) if it doesn't exist."""
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        _digests.pop(str(path), None)
+        return (path.name, None)
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _digests.get(str(path))
+    if cached is None or cached[0] != key:
+        cached = (key, _digest(path))
+        _digests[str(path)] = cached
+    return (path.name, stat.st_mtime_ns, stat.st_size, cached[1])
+
+
+def is_source_file(name, suffixes=WATCH_SUFFIXES):
+    """True if a file in a watched directory is a source input, not a derived output."""
+    return name.endswith(suffixes) and name not in DERIVED_FILES and not name.endswith(DERIVED_SUFFIXES)
+
+
+def fingerprint(*paths):
+    """Combined fingerprint of several files - changes when any of them does.
+
+    mtime is left out so a file rewritten with the same content keeps its key.
+    """
+    parts = []
+    for path in paths:
+        fp = file_fingerprint(path)
+        parts.append((fp[0], fp[2], fp[3]) if fp[1] is not None else fp)
+    return tuple(parts)
+
+
+class DirectoryWatcher:
+    """Polls the source files directly in some directories and reports changes since the last poll."""
+
+    def __init__(self, dirs=None, suffixes=WATCH_SUFFIXES):
+        self.dirs = [Path(d) for d in (dirs or WATCH_DIRS)]
+        self.suffixes = suffixes
+        self.state = self.scan()
+
+    def scan(self):
+        """{path: (mtime_ns, size)} for every watched file (subdirectories are skipped)."""
+        state = {}
+        for d in self.dirs:
+            if not d.is_dir():
+                continue
+            with os.scandir(d) as entries:
+                for entry in entries:
+                    if entry.is_file() and is_source_file(entry.name, self.suffixes):
+                        stat = entry.stat()
+                        state[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def poll(self):
+        """Paths added, modified or removed since the previous poll (sorted)."""
+        state = self.scan()
+        changed = {path for path, key in state.items() if self.state.get(path) != key}
+        changed.update(path for path in self.state if path not in state)
+        self.state = state
+        return sorted(changed)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Fingerprint and watch the data files')
+    parser.add_argument('--watch', action='store_true', help='Print changes as they happen')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls')
+    args = parser.parse_args()
+
+    watcher = DirectoryWatcher()
+    if args.watch:
+        print(f"Watching {len(watcher.state)} files in: {', '.join(str(d) for d in watcher.dirs)}")
+        while True:
+            time.sleep(args.interval)
+            for path in watcher.poll():
+                fp = file_fingerprint(path)
+                status = 'removed' if fp[1] is None else f"{fp[2] / 1024:.1f} KB {fp[3][:12]}"
+                print(f"  {time.strftime('%H:%M:%S')}  {os.path.relpath(path, BASE_DIR)}  {status}")
+    else:
+        for path in sorted(watcher.state):
+            _, _, size, digest = file_fingerprint(path)
+            print(f"  {digest[:12]}  {size / 1024:>10.1f} KB  {os.path.relpath(path, BASE_DIR)}")
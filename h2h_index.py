@@ -0,0 +1,319 @@
+"""
+Head-to-Head Index
+==================
+Binary head-to-head index keyed by canonical athlete-id pairs.
+
+Every match whose corners both resolve to a canonical athlete (see
+identity_index.py) is indexed by its pair. The index holds row positions
+into Results/all_matches.parquet rather than copies of the matches, and is
+stored as flat .npy arrays in Cache/h2h/ that are opened memory-mapped:
+
+    meta.json          version, match table fingerprint, athlete ids
+    pair_keys.npy      int64  sorted pair keys (low_code * n_athletes + high_code)
+    pair_offsets.npy   int32  start of each pair's rows in rows.npy
+    rows.npy           int32  match table row positions, grouped by pair
+    opp_offsets.npy    int32  start of each athlete's opponents
+    opponents.npy      int32  opponent codes, grouped by athlete
+    opp_bouts.npy      int32  bouts against each opponent
+    red_codes.npy      int32  red corner athlete code per match row (-1 unknown)
+    blue_codes.npy     int32  blue corner athlete code per match row (-1 unknown)
+
+Usage:
+    python h2h_index.py                      # Rebuild Cache/h2h/
+    python h2h_index.py --info               # Show index size
+    python h2h_index.py --pair ID_A ID_B     # Bouts between two athletes
+"""
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from match_store import load_match_table, MATCHES_TABLE
+from identity_index import load_identity_index, IDENTITY_FILE
+
+BASE_DIR = Path(__file__).parent
+H2H_DIR = BASE_DIR / "Cache" / "h2h"
+META_FILE = H2H_DIR / "meta.json"
+
+INDEX_VERSION = 1
+
+ARRAYS = [
+    'pair_keys', 'pair_offsets', 'rows', 'opp_offsets', 'opponents', 'opp_bouts',
+    'red_codes', 'blue_codes',
+]
+
+CORNER_COLUMNS = [
+    'red_name', 'red_country', 'red_federation',
+    'blue_name', 'blue_country', 'blue_federation',
+]
+
+BOUT_COLUMNS = [
+    'event', 'category', 'round',
+    'red_name', 'red_country', 'red_score',
+    'blue_name', 'blue_country', 'blue_score',
+    'winner_side',
+]
+
+
+def table_fingerprint():
+    """(mtime_ns, size) of the match table - row references are only valid for it."""
+    if not MATCHES_TABLE.exists():
+        return None
+    stat = MATCHES_TABLE.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _corner_codes(df, side, identity, codes):
+    """Athlete code per row for one corner (-1 when the name doesn't resolve)."""
+    resolved = {}
+    out = np.full(len(df), -1, dtype=np.int32)
+
+    corners = df[[f'{side}_name', f'{side}_country', f'{side}_federation']]
+    for i, (name, country, federation) in enumerate(corners.itertuples(index=False)):
+        if not isinstance(name, str) or not name:
+            continue
+        key = (name, country, federation)
+        if key not in resolved:
+            athlete_id = identity.resolve(name, country if isinstance(country, str) else '',
+                                          federation if isinstance(federation, str) else None)
+            if athlete_id is not None and athlete_id not in codes:
+                codes[athlete_id] = len(codes)
+            resolved[key] = codes.get(athlete_id, -1) if athlete_id is not None else -1
+        out[i] = resolved[key]
+
+    return out
+
+
+def _write_replace(path, write):
+    """Write a file via a private temp file in its directory and os.replace it into place.
+
+    Dashboard processes keep the old arrays memory-mapped; replacing
+    (instead of truncating) leaves their files intact until they reopen.
+    """
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix='.tmp',
+                                     delete=False) as f:
+        tmp_file = Path(f.name)
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            tmp_file.unlink(missing_ok=True)
+            raise
+    os.chmod(tmp_file, 0o644)
+    os.replace(tmp_file, path)
+
+
+def build_h2h_index(output_dir=None):
+    """Build the binary head-to-head index from the match table."""
+    output_dir = Path(output_dir) if output_dir else H2H_DIR
+    print("Building head-to-head index...")
+
+    df = load_match_table(columns=CORNER_COLUMNS)
+    if df is None:
+        print("  No match table found")
+        return None
+
+    identity = load_identity_index()
+    codes = {}
+    red = _corner_codes(df, 'red', identity, codes)
+    blue = _corner_codes(df, 'blue', identity, codes)
+    n_athletes = len(codes)
+
+    # Pairs: both corners known and different
+    valid = (red >= 0) & (blue >= 0) & (red != blue)
+    rows = np.nonzero(valid)[0].astype(np.int32)
+    low = np.minimum(red[valid], blue[valid]).astype(np.int64)
+    high = np.maximum(red[valid], blue[valid]).astype(np.int64)
+    keys = low * max(n_athletes, 1) + high
+
+    # Stable sort keeps each pair's bouts in table order
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    rows = rows[order]
+    pair_keys, starts = np.unique(keys, return_index=True)
+    pair_offsets = np.append(starts, len(keys)).astype(np.int32)
+
+    # Opponent lists: each pair seen from both sides
+    bouts = np.diff(pair_offsets).astype(np.int32)
+    pair_low = (pair_keys // max(n_athletes, 1)).astype(np.int32)
+    pair_high = (pair_keys % max(n_athletes, 1)).astype(np.int32)
+    src = np.concatenate([pair_low, pair_high])
+    dst = np.concatenate([pair_high, pair_low])
+    counts = np.concatenate([bouts, bouts])
+    order = np.lexsort((dst, src))
+    src = src[order]
+    opp_offsets = np.searchsorted(src, np.arange(n_athletes + 1)).astype(np.int32)
+
+    arrays = {
+        'pair_keys': pair_keys.astype(np.int64),
+        'pair_offsets': pair_offsets,
+        'rows': rows,
+        'opp_offsets': opp_offsets,
+        'opponents': dst[order].astype(np.int32),
+        'opp_bouts': counts[order].astype(np.int32),
+        'red_codes': red,
+        'blue_codes': blue,
+    }
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, values in arrays.items():
+        _write_replace(output_dir / f"{name}.npy", lambda f, values=values: np.save(f, values))
+
+    athletes = [None] * n_athletes
+    for athlete_id, code in codes.items():
+        athletes[code] = athlete_id
+
+    # Meta is written last - it is what makes the arrays current
+    meta = {
+        'version': INDEX_VERSION,
+        'built_at': datetime.now().isoformat(),
+        'table': table_fingerprint(),
+        'total_pairs': len(pair_keys),
+        'total_bouts': len(rows),
+        'athletes': athletes
+    }
+    _write_replace(output_dir / META_FILE.name,
+                   lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode('utf-8')))
+
+    print(f"  Indexed {len(pair_keys)} athlete pairs ({len(rows)} bouts, {n_athletes} athletes)")
+    return HeadToHeadIndex(output_dir)
+
+
+def h2h_index_is_stale(index_dir=None):
+    """True if the index is missing, from an old version, or built for another match table."""
+    index_dir = Path(index_dir) if index_dir else H2H_DIR
+    meta_file = index_dir / META_FILE.name
+    if not meta_file.exists():
+        return True
+
+    with open(meta_file, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+
+    if meta.get('version') != INDEX_VERSION or meta.get('table') != table_fingerprint():
+        return True
+    if IDENTITY_FILE.exists() and IDENTITY_FILE.stat().st_mtime > meta_file.stat().st_mtime:
+        return True
+    return any(not (index_dir / f"{name}.npy").exists() for name in ARRAYS)
+
+
+class HeadToHeadIndex:
+    """Memory-mapped pair and opponent lookups over the match table."""
+
+    def __init__(self, index_dir=None):
+        index_dir = Path(index_dir) if index_dir else H2H_DIR
+        with open(index_dir / META_FILE.name, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+        self.athletes = self.meta['athletes']
+        self.codes = {athlete_id: code for code, athlete_id in enumerate(self.athletes)}
+        for name in ARRAYS:
+            setattr(self, name, np.load(index_dir / f"{name}.npy", mmap_mode='r'))
+
+    def bouts_between(self, athlete_a, athlete_b):
+        """Match table row positions of every bout between two athletes."""
+        a = self.codes.get(str(athlete_a))
+        b = self.codes.get(str(athlete_b))
+        if a is None or b is None or a == b:
+            return []
+
+        key = min(a, b) * max(len(self.athletes), 1) + max(a, b)
+        i = int(np.searchsorted(self.pair_keys, key))
+        if i >= len(self.pair_keys) or self.pair_keys[i] != key:
+            return []
+        return self.rows[self.pair_offsets[i]:self.pair_offsets[i + 1]].tolist()
+
+    def side_of(self, row, athlete):
+        """'red' or 'blue' - the corner the athlete fought from in a match row."""
+        code = self.codes.get(str(athlete))
+        if code is None:
+            return None
+        if self.red_codes[row] == code:
+            return 'red'
+        if self.blue_codes[row] == code:
+            return 'blue'
+        return None
+
+    def opponents_of(self, athlete):
+        """[(opponent_id, bouts)] for every athlete this athlete has faced."""
+        code = self.codes.get(str(athlete))
+        if code is None:
+            return []
+
+        start, end = self.opp_offsets[code], self.opp_offsets[code + 1]
+        return [(self.athletes[opp], int(n))
+                for opp, n in zip(self.opponents[start:end], self.opp_bouts[start:end])]
+
+
+def load_h2h_index(index_dir=None):
+    """Open the head-to-head index, rebuilding it first if it is stale.
+
+    Returns None when there is no match data.
+    """
+    if h2h_index_is_stale(index_dir):
+        if build_h2h_index(index_dir) is None:
+            return None
+    return HeadToHeadIndex(index_dir)
+
+
+def load_bouts(rows, df=None):
+    """Match dicts for match table row positions (as returned by bouts_between)."""
+    if not rows:
+        return []
+    if df is None:
+        df = load_match_table(columns=BOUT_COLUMNS)
+
+    rows = list(rows)
+    bouts = []
+    for position, row in zip(rows, df.iloc[rows].to_dict('records')):
+        bout = {
+            'row': int(position),
+            'event': row['event'],
+            'category': row['category'],
+            'round': row['round'],
+            'winner_side': row['winner_side'] if isinstance(row['winner_side'], str) else None
+        }
+        for side in ('red', 'blue'):
+            score = row[f'{side}_score']
+            bout[side] = {
+                'name': row[f'{side}_name'],
+                'country': row[f'{side}_country'],
+                'score': None if pd.isna(score) else int(score)
+            }
+        bouts.append(bout)
+    return bouts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Build the binary head-to-head index')
+    parser.add_argument('--info', action='store_true', help='Show index size')
+    parser.add_argument('--pair', nargs=2, metavar='ID', help='Show bouts between two athlete ids')
+    args = parser.parse_args()
+
+    if args.info or args.pair:
+        index = load_h2h_index()
+        if index is None:
+            print("No match data found")
+        elif args.pair:
+            for bout in load_bouts(index.bouts_between(*args.pair)):
+                red, blue = bout['red'], bout['blue']
+                print(f"{bout['event']} | {bout['category']} | {bout['round']}: "
+                      f"{red['name']} ({red['country']}) {red['score']} - "
+                      f"{blue['score']} {blue['name']} ({blue['country']})")
+        else:
+            size = sum((H2H_DIR / f"{name}.npy").stat().st_size for name in ARRAYS)
+            print(f"Index: {H2H_DIR}")
+            print(f"Athletes: {len(index.athletes)}")
+            print(f"Pairs: {index.meta['total_pairs']}")
+            print(f"Bouts: {index.meta['total_bouts']}")
+            print(f"Size: {size / 1024:.1f} KB")
+    else:
+        build_h2h_index()
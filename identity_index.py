@@ -0,0 +1,262 @@
+"""
+Athlete Identity Index
+======================
+Maps every name form an athlete appears under to one canonical athlete id.
+
+Profiles and bracket names are reduced to normalized forms (token-sorted,
+particles like AL/BIN stripped, federation text removed). Each form plus
+country points to a canonical id - the profile_id when a profile exists,
+otherwise a bracket-only id shared by every spelling of that name. Lookups
+are dictionary hits instead of pairwise fuzzy name comparisons.
+
+Usage:
+    python identity_index.py              # Rebuild Cache/identity_index.json
+    python identity_index.py --report     # Show coverage and unresolved bracket names
+"""
+import os
+import re
+import sys
+import json
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+from match_store import load_match_table, MATCHES_TABLE, MATCHES_JSON
+from profile_store import load_profiles, PROFILES_JSON
+
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = BASE_DIR / "Cache"
+IDENTITY_FILE = CACHE_DIR / "identity_index.json"
+
+INDEX_VERSION = 2
+
+# Name particles that come and go between sources
+PARTICLES = {'AL', 'EL', 'BIN', 'BINT', 'IBN', 'ABU'}
+
+
+def name_forms(name, federation=None):
+    """Normalized forms of a name, most specific first.
+
+    'Saeed AL-Kaabi' -> ['AL KAABI SAEED', 'KAABI SAEED']
+    """
+    if not name:
+        return []
+
+    text = name.upper()
+    if federation and federation.upper() in text:
+        text = text.replace(federation.upper(), ' ')
+    text = re.sub(r'\(.*?\)', ' ', text)
+
+    tokens = text.replace('-', ' ').replace("'", '').replace(',', ' ').split()
+    if not tokens:
+        return []
+
+    forms = [' '.join(sorted(tokens))]
+    significant = [t for t in tokens if t not in PARTICLES]
+    if significant and len(significant) < len(tokens):
+        forms.append(' '.join(sorted(significant)))
+    return forms
+
+
+def _key(country, form):
+    return f"{country or ''}|{form}"
+
+
+class IdentityIndex:
+    """Constant-time name + country -> canonical athlete id lookups."""
+
+    def __init__(self, data):
+        self.forms = data['forms']
+        self.names = data['names']
+        self.athletes = data['athletes']
+        self.unresolved = data.get('unresolved', [])
+        self.coverage = data.get('coverage', {})
+
+    def resolve(self, name, country=None, federation=None):
+        """Canonical id for a name (and country), or None if unknown/ambiguous."""
+        ids = self.resolve_all(name, country, federation)
+        return ids[0] if len(ids) == 1 else None
+
+    def resolve_all(self, name, country=None, federation=None):
+        """All canonical ids a name can refer to (any country if none given)."""
+        form_list = name_forms(name, federation)
+        if country is not None:
+            athlete_id = _lookup(self.forms, country, form_list)
+            return [athlete_id] if athlete_id else []
+
+        for form in form_list:
+            if self.names.get(form):
+                return self.names[form]
+        return []
+
+    def profile_id(self, athlete_id):
+        """profile_id behind a canonical id (None for bracket-only athletes)."""
+        athlete = self.athletes.get(athlete_id)
+        return athlete.get('profile_id') if athlete else None
+
+
+def _register(forms, names, country, form_list, athlete_id, ambiguous):
+    """Point each form at athlete_id; forms claimed by two athletes become ambiguous.
+
+    An ambiguous form is dropped from forms at once, so neither athlete
+    resolves through it - in the profile and the bracket-name phase alike.
+    """
+    for form in form_list:
+        key = _key(country, form)
+        existing = forms.get(key)
+        if existing and existing != athlete_id:
+            ambiguous.add(key)
+            del forms[key]
+        elif key not in ambiguous:
+            forms[key] = athlete_id
+
+        ids = names.setdefault(form, [])
+        if athlete_id not in ids:
+            ids.append(athlete_id)
+
+
+def _lookup(forms, country, form_list):
+    """First canonical id any of the forms resolves to for this country."""
+    for form in form_list:
+        athlete_id = forms.get(_key(country, form))
+        if athlete_id:
+            return athlete_id
+    return None
+
+
+def build_identity_index(output_file=None):
+    """Build the identity index from profiles and the match table."""
+    output_file = Path(output_file) if output_file else IDENTITY_FILE
+    output_file.parent.mkdir(exist_ok=True)
+    print("Building identity index...")
+
+    forms = {}
+    names = {}
+    athletes = {}
+    ambiguous = set()
+
+    # Profiles own their forms - bracket names resolve onto them
+    for p in load_profiles():
+        profile_id = str(p.get('profile_id') or '')
+        if not profile_id or not p.get('name'):
+            continue
+        athletes[profile_id] = {
+            'name': p.get('name'),
+            'country': p.get('country_code', ''),
+            'profile_id': profile_id
+        }
+        _register(forms, names, p.get('country_code'), name_forms(p.get('name')), profile_id, ambiguous)
+
+    # Bracket names: link to a profile, or give the name its own id
+    bracket_names = {}
+    df = load_match_table(columns=['red_name', 'red_country', 'red_federation',
+                                   'blue_name', 'blue_country', 'blue_federation'])
+    if df is not None:
+        for side in ('red', 'blue'):
+            corners = df[[f'{side}_name', f'{side}_country', f'{side}_federation']].dropna(subset=[f'{side}_name'])
+            for name, country, federation in corners.drop_duplicates().itertuples(index=False):
+                country = country if isinstance(country, str) else ''
+                federation = federation if isinstance(federation, str) else ''
+                bracket_names[(name, country)] = federation
+
+    resolved = 0
+    unresolved = []
+    for (name, country), federation in sorted(bracket_names.items()):
+        form_list = name_forms(name, federation)
+        if not form_list:
+            continue
+
+        athlete_id = _lookup(forms, country, form_list)
+        if athlete_id and athletes[athlete_id]['profile_id']:
+            resolved += 1
+        else:
+            unresolved.append({'name': name, 'country': country})
+            if not athlete_id:
+                athlete_id = f"{country}:{form_list[0]}"
+                athletes[athlete_id] = {'name': name, 'country': country, 'profile_id': None}
+
+        _register(forms, names, country, form_list, athlete_id, ambiguous)
+
+    total = resolved + len(unresolved)
+    data = {
+        'version': INDEX_VERSION,
+        'built_at': datetime.now().isoformat(),
+        'forms': forms,
+        'names': names,
+        'athletes': athletes,
+        'unresolved': unresolved,
+        'coverage': {
+            'bracket_names': total,
+            'resolved': resolved,
+            'unresolved': len(unresolved),
+            'ambiguous_forms': len(ambiguous),
+            'rate': round(resolved / total * 100, 1) if total else 0.0
+        }
+    }
+
+    # Replaced, not rewritten in place - a dashboard thread may be loading the old index
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=output_file.parent, prefix=f"{output_file.stem}.",
+                                     suffix='.tmp', delete=False) as f:
+        tmp_file = Path(f.name)
+        try:
+            json.dump(data, f, ensure_ascii=False)
+        except BaseException:
+            f.close()
+            tmp_file.unlink(missing_ok=True)
+            raise
+    os.chmod(tmp_file, 0o644)
+    os.replace(tmp_file, output_file)
+
+    print(f"  {len(athletes)} athletes, {len(forms)} name forms")
+    print(f"  Bracket names linked to profiles: {resolved}/{total} ({data['coverage']['rate']}%)")
+    return IdentityIndex(data)
+
+
+def identity_index_is_stale(index_file=None):
+    """True if the index is missing or older than the profiles or match table."""
+    index_file = Path(index_file) if index_file else IDENTITY_FILE
+    if not index_file.exists():
+        return True
+
+    index_mtime = index_file.stat().st_mtime
+    return any(source.exists() and source.stat().st_mtime > index_mtime
+               for source in (PROFILES_JSON, MATCHES_TABLE, MATCHES_JSON))
+
+
+def load_identity_index(index_file=None):
+    """Load the identity index, rebuilding it first if it is stale."""
+    index_file = Path(index_file) if index_file else IDENTITY_FILE
+
+    if identity_index_is_stale(index_file):
+        return build_identity_index(index_file)
+
+    with open(index_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if data.get('version') != INDEX_VERSION:
+        return build_identity_index(index_file)
+    return IdentityIndex(data)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Build the athlete identity index')
+    parser.add_argument('--report', action='store_true', help='Show coverage and unresolved bracket names')
+    args = parser.parse_args()
+
+    if args.report:
+        index = load_identity_index()
+        cov = index.coverage
+        print(f"Bracket names: {cov['bracket_names']}")
+        print(f"Linked to profiles: {cov['resolved']} ({cov['rate']}%)")
+        print(f"Unresolved: {cov['unresolved']}")
+        print(f"Ambiguous name forms: {cov['ambiguous_forms']}")
+        if index.unresolved:
+            print("\nUnresolved bracket names:")
+            for entry in sorted(index.unresolved, key=lambda e: (e['country'], e['name'])):
+                print(f"  {entry['country']:<5} {entry['name']}")
+    else:
+        build_identity_index()
@@ -0,0 +1,221 @@
+"""
+Streaming JSON Ingestion
+========================
+Iterate the items of large JSON files without loading the whole document.
+
+Results files are a top-level object holding one big array (profiles,
+events, categories) next to a few scalar fields. iter_items() reads the
+file in chunks and yields one array item at a time, so memory is bounded
+by the largest single item rather than the file size. Values under other
+keys are scanned past bracket by bracket without being decoded.
+
+Usage:
+    python json_ingest.py FILE [KEY]     # Count items (and show header fields)
+"""
+import re
+import sys
+import json
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+# skip(): the characters that matter outside and inside a string
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_END = re.compile(r'["\\]')
+
+
+class _Stream:
+    """Chunked character buffer with raw_decode-based value parsing."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=0):
+        """Read another chunk, or size characters if more; returns False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(max(size, CHUNK_SIZE))
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text so the buffer only holds the current value
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, got {self.peek()!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode one complete JSON value.
+
+        A value cut off by the end of the buffer is retried once the buffer
+        has doubled, so a large value costs a few decode attempts rather
+        than one per chunk.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill(len(self.buf) - self.pos):
+                    continue
+                raise
+            # A number cut off by the end of the buffer continues in the next chunk
+            if (isinstance(value, (int, float)) and not self.eof
+                    and (end == len(self.buf) or self.buf[end] in _NUMBER_CHARS) and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Yield the items of the array starting at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+
+    def skip(self):
+        """Move past the next value without decoding it.
+
+        Arrays and objects are scanned for brackets and string quotes only,
+        so nothing inside them is built.
+        """
+        if self.peek() not in '[{':
+            self.value()
+            return
+
+        depth = 0
+        in_string = False
+        while True:
+            if in_string:
+                match = _STRING_END.search(self.buf, self.pos)
+                if match and match.group() == '"':
+                    in_string = False
+                    self.pos = match.end()
+                    continue
+                if match and match.end() < len(self.buf):
+                    # Backslash escape - jump over the escaped character
+                    self.pos = match.end() + 1
+                    continue
+                # Keep a trailing backslash for the next chunk
+                self.pos = match.start() if match else len(self.buf)
+            else:
+                match = _STRUCTURE.search(self.buf, self.pos)
+                if match:
+                    self.pos = match.end()
+                    char = match.group()
+                    if char == '"':
+                        in_string = True
+                    elif char in '[{':
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            return
+                    continue
+                self.pos = len(self.buf)
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def pairs(self):
+        """Yield the keys of the object at the current position.
+
+        The caller must consume (value() / items() / skip()) each key's value
+        before asking for the next key.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' in JSON object, got {char!r}")
+
+
+def iter_items(path, key=None, header=None):
+    """Yield the items of a JSON array one at a time.
+
+    key selects the array inside a top-level object ('profiles', 'events',
+    ...). A file that is itself an array is streamed whatever the key.
+    If a header dict is given, the object's scalar fields (before and after
+    the array) are stored in it once the generator is exhausted.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _Stream(f)
+
+        if stream.peek() == '[':
+            yield from stream.items()
+            return
+
+        for name in stream.pairs():
+            if name == key and stream.peek() == '[':
+                yield from stream.items()
+            elif header is not None and stream.peek() not in '[{':
+                header[name] = stream.value()
+            else:
+                stream.skip()
+
+
+def count_items(path, key=None):
+    """Number of items in a JSON array (see iter_items for key)."""
+    return sum(1 for _ in iter_items(path, key))
+
+
+def read_header(path):
+    """Top-level scalar fields of a JSON object, streaming past any arrays."""
+    header = {}
+    for _ in iter_items(path, key=None, header=header):
+        pass
+    return header
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    json_file = Path(sys.argv[1])
+    array_key = sys.argv[2] if len(sys.argv) > 2 else None
+
+    fields = {}
+    n = sum(1 for _ in iter_items(json_file, array_key, header=fields))
+    print(f"{json_file.name}: {n} items" + (f" in '{array_key}'" if array_key else ''))
+    for name, value in fields.items():
+        print(f"  {name}: {value}")
@@ -21,6 +21,11 @@ from typing import Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass, asdict, field
 from collections import defaultdict
 
+import pandas as pd
+
+from match_store import load_match_table, MATCHES_TABLE
+from match_shards import load_events, COMBINED_JSON
+
 # Force UTF-8 output
 sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
@@ -38,6 +43,14 @@ ASIAN_COUNTRIES = {
     'JOR', 'KUW', 'BRN', 'QAT', 'OMA', 'YEM', 'SYR', 'LBN', 'IRQ'
 }
 
+# Match table columns needed to build win/loss records
+MATCH_TABLE_COLUMNS = [
+    'event', 'category', 'round',
+    'red_name', 'red_country', 'red_score',
+    'blue_name', 'blue_country', 'blue_score',
+    'winner_side', 'outcome', 'stage',
+]
+
 
 @dataclass
 class MatchResult:
@@ -51,6 +64,8 @@ class MatchResult:
     category: Optional[str] = None
     round: Optional[str] = None
     date: Optional[str] = None
+    outcome: Optional[str] = None  # score, submission, disqualification, walkover, decision, progression
+    stage: Optional[str] = None    # main, pool, repechage, bronze, final
 
 
 @dataclass
@@ -94,18 +109,21 @@ class LossChainAnalyzer:
         self.win_graph: Dict[str, Set[str]] = defaultdict(set)   # who_won -> {who_they_beat}
 
     def load_matches(self, filepath: Path = None) -> int:
-        """Load match data from JSON file."""
-        filepath = filepath or RESULTS_DIR / "all_matches.json"
+        """Load match data from the columnar match table (or the match shards / a JSON file)."""
+        if filepath is None or Path(filepath).suffix == '.parquet':
+            df = load_match_table(columns=MATCH_TABLE_COLUMNS, table_file=filepath)
+            if df is not None:
+                return self._load_match_table(df, Path(filepath or MATCHES_TABLE))
 
-        if not filepath.exists():
+        events = load_events(filepath)
+        filepath = Path(filepath) if filepath else COMBINED_JSON
+
+        if not events and not filepath.exists():
             print(f"Match file not found: {filepath}")
             return 0
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
         count = 0
-        for event in data.get('events', []):
+        for event in events:
             event_name = event.get('event_name', '')
             verid = event.get('verid', '')
 
@@ -139,7 +157,9 @@ class LossChainAnalyzer:
                         score=f"{red.get('score', 0)}-{blue.get('score', 0)}",
                         event=event_name,
                         category=cat_name,
-                        round=match.get('round', 'Unknown')
+                        round=match.get('round', 'Unknown'),
+                        outcome=match.get('outcome'),
+                        stage=match.get('stage')
                     )
 
                     self.matches.append(result)
@@ -149,6 +169,48 @@ class LossChainAnalyzer:
         print(f"Loaded {count} matches from {filepath.name}")
         return count
 
+    def _load_match_table(self, df, filepath: Path) -> int:
+        """Load matches from match table columns."""
+        count = 0
+        for row in df.itertuples(index=False):
+            red_name = row.red_name if isinstance(row.red_name, str) else ''
+            blue_name = row.blue_name if isinstance(row.blue_name, str) else ''
+
+            if not isinstance(row.winner_side, str) or not red_name or not blue_name:
+                continue
+
+            red_country = row.red_country if isinstance(row.red_country, str) else ''
+            blue_country = row.blue_country if isinstance(row.blue_country, str) else ''
+            red_score = None if pd.isna(row.red_score) else int(row.red_score)
+            blue_score = None if pd.isna(row.blue_score) else int(row.blue_score)
+
+            if row.winner_side == 'red':
+                winner, winner_country = red_name, red_country
+                loser, loser_country = blue_name, blue_country
+            else:
+                winner, winner_country = blue_name, blue_country
+                loser, loser_country = red_name, red_country
+
+            result = MatchResult(
+                winner=winner,
+                winner_country=winner_country,
+                loser=loser,
+                loser_country=loser_country,
+                score=f"{red_score}-{blue_score}",
+                event=row.event if isinstance(row.event, str) else '',
+                category=row.category if isinstance(row.category, str) else '',
+                round=row.round if isinstance(row.round, str) else 'Unknown',
+                outcome=row.outcome if isinstance(row.outcome, str) else None,
+                stage=row.stage if isinstance(row.stage, str) else None
+            )
+
+            self.matches.append(result)
+            self._update_records(result)
+            count += 1
+
+        print(f"Loaded {count} matches from {filepath.name}")
+        return count
+
     def _update_records(self, match: MatchResult):
         """Update athlete records and graphs."""
         # Update winner record
@@ -0,0 +1,180 @@
+"""
+Match Outcome
+=============
+How a bout was decided, from the markers on the bracket page.
+
+The score cell doesn't always hold a number: sportdata marks
+disqualifications (DQ, HSK), walkovers (WO, FF, DNS), submissions (SUB,
+IPPON) and referee decisions (DEC, HANTEI) there, and the winning corner
+can carry a *winner* class. decide_outcome() turns these into a winner
+and a method:
+
+    score             higher score wins
+    submission        submission / ippon marker
+    disqualification  the other corner was disqualified
+    walkover          the other corner didn't fight (walkover, forfeit, withdrawal)
+    decision          referee decision, or a winner marker on a tied score
+    progression       tied score with no marker - the athlete who fought on won
+    bye               only one corner (no winner recorded, not a bout)
+    None              tied and unresolved
+
+Each match also gets a stage from its round name (main, pool, repechage,
+bronze, final), so analytics can tell a repechage loss from a main tree
+one without re-deriving it.
+
+Usage:
+    python match_outcome.py                # Show outcome methods across the match shards
+"""
+import re
+import sys
+
+# Score-cell markers (compared without dots, slashes, dashes or spaces)
+LOSS_MARKS = {
+    'DQ': 'disqualification', 'DSQ': 'disqualification', 'DISQ': 'disqualification',
+    'HSK': 'disqualification', 'HANSOKU': 'disqualification', 'HANSOKUMAKE': 'disqualification',
+    'WO': 'walkover', 'FF': 'walkover', 'FORFEIT': 'walkover', 'DNS': 'walkover',
+    'WD': 'walkover', 'WITHDRAWN': 'walkover', 'KIKEN': 'walkover', 'ABS': 'walkover',
+}
+WIN_MARKS = {
+    'SUB': 'submission', 'SUBMISSION': 'submission', 'IPPON': 'submission', 'TAP': 'submission',
+    'DEC': 'decision', 'DECISION': 'decision', 'HANTEI': 'decision', 'REF': 'decision',
+}
+
+OUTCOME_METHODS = ['score', 'submission', 'disqualification', 'walkover', 'decision', 'progression', 'bye']
+STAGES = ['main', 'pool', 'repechage', 'bronze', 'final']
+
+
+def read_score(competitor, score_text):
+    """Set score (and mark, for a marker like 'DQ') from the score cell text."""
+    text = score_text.strip()
+    try:
+        competitor['score'] = int(text)
+        return competitor
+    except ValueError:
+        pass
+
+    number = re.search(r'-?\d+', text)
+    competitor['score'] = int(number.group()) if number else 0
+
+    for token in re.findall(r'[A-Za-z][A-Za-z./\- ]*', text):
+        mark = re.sub(r'[./\- ]', '', token).upper()
+        if mark in LOSS_MARKS or mark in WIN_MARKS:
+            competitor['mark'] = mark
+            break
+    return competitor
+
+
+def round_stage(round_name):
+    """Stage of a round from its title."""
+    name = (round_name or '').lower()
+    if 'repech' in name:
+        return 'repechage'
+    if 'bronze' in name or '3rd' in name or 'third place' in name:
+        return 'bronze'
+    if 'final' in name and not any(w in name for w in ('semi', 'quarter', '1/')):
+        return 'final'
+    if 'pool' in name and 'tree' not in name:
+        return 'pool'
+    return 'main'
+
+
+def _only(flags):
+    """'red' or 'blue' if exactly one corner has the flag, else None."""
+    red, blue = flags
+    if red and not blue:
+        return 'red'
+    if blue and not red:
+        return 'blue'
+    return None
+
+
+def decide_outcome(match):
+    """Set winner, winner_country, outcome and stage on a parsed match."""
+    match['stage'] = round_stage(match.get('round'))
+    red, blue = match.get('red_corner'), match.get('blue_corner')
+    match['winner'] = None
+    match.pop('winner_country', None)
+
+    if not red or not blue:
+        match['outcome'] = 'bye' if (red or blue) else None
+        return match
+
+    side, method = None, None
+    marks = (red.get('mark'), blue.get('mark'))
+    lost = _only([m in LOSS_MARKS for m in marks])
+    won = _only([m in WIN_MARKS for m in marks])
+    flagged = _only([red.get('marked_winner'), blue.get('marked_winner')])
+    red_score = red.get('score', 0) or 0
+    blue_score = blue.get('score', 0) or 0
+
+    if lost:
+        side = 'blue' if lost == 'red' else 'red'
+        method = LOSS_MARKS[marks[0] if lost == 'red' else marks[1]]
+    elif won:
+        side = won
+        method = WIN_MARKS[marks[0] if won == 'red' else marks[1]]
+    elif flagged:
+        side = flagged
+        method = 'decision' if red_score == blue_score else 'score'
+    elif red_score != blue_score:
+        side = 'red' if red_score > blue_score else 'blue'
+        method = 'score'
+
+    match['outcome'] = method
+    if side:
+        winner = red if side == 'red' else blue
+        match['winner'] = winner['name']
+        match['winner_country'] = winner['country']
+    return match
+
+
+def resolve_ties(bracket_data):
+    """Give tied bouts to the corner that fought on; returns how many were resolved.
+
+    Needs the next links from bracket_tree.link_matches(): for a bout with
+    no winner it points at the later bout the only continuing corner is in.
+    """
+    matches = bracket_data.get('matches', [])
+    resolved = 0
+    for match in matches:
+        red, blue = match.get('red_corner'), match.get('blue_corner')
+        if match.get('winner') or not red or not blue or match.get('next') is None:
+            continue
+        following = matches[match['next']]
+        names = {(following.get('red_corner') or {}).get('name'), (following.get('blue_corner') or {}).get('name')}
+        side = _only([red['name'] in names, blue['name'] in names])
+        if side:
+            winner = red if side == 'red' else blue
+            match['winner'] = winner['name']
+            match['winner_country'] = winner['country']
+            match['outcome'] = 'progression'
+            resolved += 1
+    return resolved
+
+
+if __name__ == "__main__":
+    from collections import Counter
+    from match_shards import iter_events
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    methods = Counter()
+    stages = Counter()
+    for event in iter_events():
+        for category in event['categories']:
+            for match in category['matches']:
+                methods[match.get('outcome', 'n/a')] += 1
+                stages[match.get('stage', 'n/a')] += 1
+
+    if not methods:
+        print("No match shards found - run: python parse_bracket_html.py --all")
+        sys.exit(1)
+
+    total = sum(methods.values())
+    print(f"Matches: {total}")
+    print("\nOutcome:")
+    for method, n in methods.most_common():
+        print(f"  {str(method):<18} {n:>7}  {n / total:6.1%}")
+    print("\nStage:")
+    for stage, n in stages.most_common():
+        print(f"  {stage:<18} {n:>7}  {n / total:6.1%}")
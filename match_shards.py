@@ -0,0 +1,261 @@
+"""
+Match Shards
+============
+Per-event match files written while the brackets are being parsed.
+
+Each event is written out as soon as all of its categories are parsed,
+so the parser only ever holds one event in memory. Shards go to pending
+files first and are renamed to Results/matches/{verid}.json by close(),
+right before manifest.json - a run that fails part-way leaves the
+previous shards and manifest untouched. manifest.json lists the events
+in order with their names, category and match counts; it is written last
+and is the commit point for readers. The combined Results/all_matches.json can be written
+alongside - it is streamed together from the shards, never built in
+memory.
+
+Matches are stored once, inside events -> categories -> matches. The flat
+all_matches view (one entry per match with its event and category) is
+derived at load time by flatten_matches() / load_all_matches() instead of
+being written to disk a second time.
+
+Usage:
+    python match_shards.py               # Show the manifest
+    python match_shards.py --combined    # Rebuild all_matches.json from the shards
+"""
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+BASE_DIR = Path(__file__).parent
+RESULTS_DIR = BASE_DIR / "Results"
+SHARD_DIR = RESULTS_DIR / "matches"
+MANIFEST_FILE = SHARD_DIR / "manifest.json"
+COMBINED_JSON = RESULTS_DIR / "all_matches.json"
+
+MANIFEST_VERSION = 1
+
+# all_matches.json layout: 2 = events only (1 also stored the flat all_matches copy)
+COMBINED_FORMAT = 2
+
+
+def _write_json(path, data, **kwargs):
+    """Write JSON via a temp file so readers never see a half-written file."""
+    tmp_file = path.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+    os.replace(tmp_file, path)
+
+
+def _event_matches(event):
+    return sum(len(c.get('matches', [])) for c in event.get('categories', []))
+
+
+class MatchShardWriter:
+    """Writes parsed events one at a time, then the manifest.
+
+    replace=True starts a new manifest (events not written are dropped,
+    along with their shards); replace=False updates the given events in
+    the existing manifest and keeps the rest (e.g. a --verid run).
+    """
+
+    def __init__(self, shard_dir=None, combined_file=None, replace=True):
+        self.shard_dir = Path(shard_dir) if shard_dir else SHARD_DIR
+        self.combined_file = Path(combined_file) if combined_file else None
+        self.replace = replace
+        self.events = {}
+        # shard file name -> pending file, renamed into place by close()
+        self.pending = {}
+
+        if not replace:
+            manifest = load_manifest(self.shard_dir)
+            if manifest:
+                self.events = {e['verid']: e for e in manifest['events']}
+
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+
+    def write_event(self, event):
+        """Write one event ({verid, event_name, categories}) to a pending shard."""
+        verid = event['verid']
+        shard_file = f"{verid}.json"
+        # A private name - the live shard keeps matching the live manifest until close()
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.shard_dir, prefix=f"{verid}.",
+                                         suffix='.part', delete=False) as f:
+            self.pending[shard_file] = Path(f.name)
+            json.dump(event, f, ensure_ascii=False)
+
+        self.events[verid] = {
+            'verid': verid,
+            'event_name': event.get('event_name', ''),
+            'file': shard_file,
+            'categories': len(event.get('categories', [])),
+            'matches': _event_matches(event)
+        }
+
+    def discard(self):
+        """Drop the pending shards of a run that is not going to be closed."""
+        for pending_file in self.pending.values():
+            pending_file.unlink(missing_ok=True)
+        self.pending = {}
+
+    def close(self):
+        """Move the pending shards into place, then write the manifest (and the combined file).
+
+        Returns the manifest.
+        """
+        for shard_file, pending_file in self.pending.items():
+            os.chmod(pending_file, 0o644)
+            os.replace(pending_file, self.shard_dir / shard_file)
+        self.pending = {}
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'parsed_at': datetime.now().isoformat(),
+            'total_events': len(self.events),
+            'total_matches': sum(e['matches'] for e in self.events.values()),
+            'events': list(self.events.values())
+        }
+
+        # Manifest is written last - readers treat it as the commit point
+        _write_json(self.shard_dir / MANIFEST_FILE.name, manifest, indent=2)
+
+        # Drop shards of events that are no longer in the manifest
+        live = {e['file'] for e in manifest['events']}
+        for old_file in self.shard_dir.glob("*.json"):
+            if old_file.name != MANIFEST_FILE.name and old_file.name not in live:
+                old_file.unlink()
+
+        if self.combined_file:
+            write_combined(self.combined_file, self.shard_dir)
+
+        return manifest
+
+
+def load_manifest(shard_dir=None):
+    """Load the shard manifest, or None if no shards have been written."""
+    manifest_file = (Path(shard_dir) if shard_dir else SHARD_DIR) / MANIFEST_FILE.name
+    if not manifest_file.exists():
+        return None
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+
+def load_event(verid, shard_dir=None, manifest=None):
+    """Load a single event by verid (None if it has no shard)."""
+    shard_dir = Path(shard_dir) if shard_dir else SHARD_DIR
+    manifest = manifest if manifest is not None else load_manifest(shard_dir)
+    if not manifest:
+        return None
+
+    for entry in manifest['events']:
+        if entry['verid'] == str(verid):
+            with open(shard_dir / entry['file'], 'r', encoding='utf-8') as f:
+                return json.load(f)
+    return None
+
+
+def iter_events(shard_dir=None, manifest=None):
+    """Yield every event in manifest order, one shard in memory at a time."""
+    shard_dir = Path(shard_dir) if shard_dir else SHARD_DIR
+    manifest = manifest if manifest is not None else load_manifest(shard_dir)
+    if not manifest:
+        return
+
+    for entry in manifest['events']:
+        with open(shard_dir / entry['file'], 'r', encoding='utf-8') as f:
+            yield json.load(f)
+
+
+def write_combined(output_file=None, shard_dir=None):
+    """Stream all_matches.json (parsed_at, events, total_matches) from the shards."""
+    output_file = Path(output_file) if output_file else COMBINED_JSON
+    manifest = load_manifest(shard_dir)
+    if not manifest:
+        return None
+
+    def dump(value):
+        return json.dumps(value, ensure_ascii=False)
+
+    tmp_file = output_file.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write('{\n"format": ' + dump(COMBINED_FORMAT) +
+                ',\n"parsed_at": ' + dump(manifest['parsed_at']) + ',\n"events": [')
+        for i, event in enumerate(iter_events(shard_dir, manifest)):
+            f.write((',\n' if i else '\n') + dump(event))
+        f.write('\n],\n"total_matches": ' + dump(manifest['total_matches']) + '\n}\n')
+    os.replace(tmp_file, output_file)
+
+    return output_file
+
+
+def flatten_matches(events):
+    """Flat view of the matches: one entry per match with its event and category.
+
+    Entries are shallow copies - the corner dicts are shared with the
+    nested events, not duplicated.
+    """
+    all_matches = []
+    for event in events:
+        for category in event.get('categories', []):
+            for match in category.get('matches', []):
+                all_matches.append({
+                    'event': event.get('event_name', ''),
+                    'verid': event.get('verid', ''),
+                    'category': category.get('category', ''),
+                    'catid': category.get('catid', ''),
+                    **match
+                })
+    return all_matches
+
+
+def load_events(json_file=None):
+    """All events from the shards, or from all_matches.json when there are none."""
+    if json_file is None:
+        manifest = load_manifest()
+        if manifest:
+            return list(iter_events(manifest=manifest))
+    json_file = Path(json_file) if json_file else COMBINED_JSON
+    if not json_file.exists():
+        return []
+    with open(json_file, 'r', encoding='utf-8') as f:
+        return json.load(f).get('events', [])
+
+
+def load_all_matches(json_file=None):
+    """The all_matches.json layout with both views: nested events and the flat all_matches list."""
+    events = load_events(json_file)
+    all_matches = flatten_matches(events)
+    return {
+        'events': events,
+        'all_matches': all_matches,
+        'total_matches': len(all_matches)
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Inspect the per-event match shards')
+    parser.add_argument('--combined', action='store_true', help='Rebuild all_matches.json from the shards')
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+    if manifest is None:
+        print(f"No match shards at {SHARD_DIR} - run: python parse_bracket_html.py --all")
+        sys.exit(1)
+
+    if args.combined:
+        print(f"Saved to: {write_combined()}")
+    else:
+        print(f"Shards: {SHARD_DIR}")
+        print(f"Parsed: {manifest['parsed_at']}")
+        print(f"Events: {manifest['total_events']}")
+        print(f"Total matches: {manifest['total_matches']}")
+        for entry in manifest['events']:
+            print(f"  {entry['verid']:>6}  {entry['categories']:>4} categories  "
+                  f"{entry['matches']:>6} matches  {entry['event_name']}")
@@ -0,0 +1,373 @@
+"""
+Match Store
+===========
+Columnar match table built from parsed bracket data.
+
+One row per match with typed columns, written next to all_matches.json as
+Parquet. The source is the per-event shards in Results/matches/ (see
+match_shards.py), or all_matches.json when there are no shards. Readers load only the columns they need instead of decoding the
+whole nested JSON and walking events -> categories -> matches.
+
+The table is streamed: events are flattened and written as row groups
+under a fixed schema, so building it never holds more than one row group.
+
+Usage:
+    python match_store.py              # Rebuild all_matches.parquet from the shards / all_matches.json
+    python match_store.py --info       # Show table size and columns
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from json_ingest import iter_items
+from bracket_tree import restore_links
+from match_shards import iter_events, load_manifest, flatten_matches, MANIFEST_FILE
+
+BASE_DIR = Path(__file__).parent
+RESULTS_DIR = BASE_DIR / "Results"
+MATCHES_JSON = RESULTS_DIR / "all_matches.json"
+MATCHES_TABLE = RESULTS_DIR / "all_matches.parquet"
+
+# Column order of the match table
+MATCH_COLUMNS = [
+    'event', 'verid', 'category', 'catid', 'round',
+    'red_name', 'red_country', 'red_federation', 'red_score',
+    'blue_name', 'blue_country', 'blue_federation', 'blue_score',
+    'winner_side', 'outcome', 'stage', 'next_match', 'loser_next',
+]
+
+# Low-cardinality text columns - stored dictionary-encoded
+CATEGORICAL_COLUMNS = [
+    'event', 'verid', 'category', 'catid', 'round',
+    'red_country', 'red_federation', 'blue_country', 'blue_federation',
+    'winner_side', 'outcome', 'stage',
+]
+
+SCORE_COLUMNS = ['red_score', 'blue_score']
+
+# Bracket links - row position of the target match within its category (see bracket_tree.py)
+LINK_COLUMNS = ['next_match', 'loser_next']
+
+# Matches per Parquet row group - an event larger than this is one group of its own
+ROW_GROUP_ROWS = 50_000
+
+
+def _winner_side(match):
+    """Return 'red', 'blue' or None for a parsed match dict."""
+    winner = match.get('winner')
+    if not winner:
+        return None
+    red = match.get('red_corner') or {}
+    if winner == red.get('name'):
+        return 'red'
+    return 'blue'
+
+
+def _append_event(rows, event):
+    """Append one event's matches to the column lists in rows."""
+    event_name = event.get('event_name', '')
+    verid = event.get('verid', '')
+
+    for category in event.get('categories', []):
+        cat_name = category.get('category', '')
+        catid = category.get('catid', '')
+
+        for match in category.get('matches', []):
+            red = match.get('red_corner')
+            blue = match.get('blue_corner')
+
+            rows['event'].append(event_name)
+            rows['verid'].append(verid)
+            rows['category'].append(cat_name)
+            rows['catid'].append(catid)
+            rows['round'].append(match.get('round', ''))
+
+            for side, corner in (('red', red), ('blue', blue)):
+                # A missing corner (BYE) is stored as all-null
+                corner = corner if corner is not None else {}
+                rows[f'{side}_name'].append(corner.get('name'))
+                rows[f'{side}_country'].append(corner.get('country'))
+                rows[f'{side}_federation'].append(corner.get('federation'))
+                rows[f'{side}_score'].append(corner.get('score'))
+
+            rows['winner_side'].append(_winner_side(match))
+            # How the bout was decided and which part of the bracket it is in (match_outcome.py)
+            rows['outcome'].append(match.get('outcome'))
+            rows['stage'].append(match.get('stage'))
+            rows['next_match'].append(match.get('next'))
+            rows['loser_next'].append(match.get('loser_next'))
+
+
+def _typed_frame(rows):
+    """DataFrame with the table's column dtypes from column lists."""
+    df = pd.DataFrame(rows, columns=MATCH_COLUMNS)
+
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].astype('category')
+    for col in SCORE_COLUMNS + LINK_COLUMNS:
+        df[col] = df[col].astype('Int16')
+    for col in ('red_name', 'blue_name'):
+        df[col] = df[col].astype('string')
+
+    return df
+
+
+def build_match_table(all_data):
+    """Flatten parsed bracket data (all_matches.json layout) into a DataFrame."""
+    rows = {col: [] for col in MATCH_COLUMNS}
+
+    for event in all_data.get('events', []):
+        _append_event(rows, event)
+
+    return _typed_frame(rows)
+
+
+def match_schema():
+    """Arrow schema of the Parquet table.
+
+    Fixed up front so every row group has the same types; the pandas
+    metadata makes read_parquet return the same dtypes as build_match_table.
+    """
+    fields = []
+    for col in MATCH_COLUMNS:
+        if col in CATEGORICAL_COLUMNS:
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+        elif col in SCORE_COLUMNS + LINK_COLUMNS:
+            fields.append(pa.field(col, pa.int16()))
+        else:
+            fields.append(pa.field(col, pa.string()))
+
+    pandas_meta = pa.Schema.from_pandas(build_match_table({}), preserve_index=False).metadata
+    return pa.schema(fields, metadata=pandas_meta)
+
+
+def write_match_table(all_data, output_file=None):
+    """Stream parsed events into the Parquet table, one row group at a time.
+
+    all_data['events'] may be any iterable (e.g. iter_events()): events are
+    flattened until ROW_GROUP_ROWS matches are buffered, then written, so
+    memory stays bounded by a row group or the largest event. The table is
+    written to a temp file and replaces the old one only when complete.
+    """
+    output_file = Path(output_file) if output_file else MATCHES_TABLE
+    schema = match_schema()
+
+    def flush(writer, rows):
+        writer.write_table(pa.Table.from_pandas(_typed_frame(rows), schema=schema, preserve_index=False))
+        return {col: [] for col in MATCH_COLUMNS}
+
+    with tempfile.NamedTemporaryFile(dir=output_file.parent, prefix=f"{output_file.stem}.", suffix='.tmp',
+                                     delete=False) as f:
+        tmp_file = Path(f.name)
+        try:
+            with pq.ParquetWriter(f, schema, compression='zstd') as writer:
+                rows = {col: [] for col in MATCH_COLUMNS}
+                groups = 0
+                for event in all_data.get('events', []):
+                    _append_event(rows, event)
+                    if len(rows['event']) >= ROW_GROUP_ROWS:
+                        rows = flush(writer, rows)
+                        groups += 1
+                # An empty table still gets its (empty) row group
+                if rows['event'] or not groups:
+                    flush(writer, rows)
+        except BaseException:
+            f.close()
+            tmp_file.unlink(missing_ok=True)
+            raise
+    # NamedTemporaryFile is private (0600) - keep the table readable like the other caches
+    os.chmod(tmp_file, 0o644)
+    os.replace(tmp_file, output_file)
+    return output_file
+
+
+def rebuild_match_table(json_file=None, output_file=None):
+    """Rebuild the Parquet table from the match shards or an existing all_matches.json."""
+    if json_file is None and load_manifest():
+        # Shards are read one event at a time
+        return write_match_table({'events': iter_events()}, output_file)
+
+    json_file = Path(json_file) if json_file else MATCHES_JSON
+    if not json_file.exists():
+        return None
+
+    # Stream the events one at a time - the flat all_matches list is skipped
+    return write_match_table({'events': iter_items(json_file, 'events')}, output_file)
+
+
+def match_table_is_stale(table_file=None, json_file=None):
+    """True if the table is missing or older than the shard manifest / all_matches.json."""
+    table_file = Path(table_file) if table_file else MATCHES_TABLE
+    sources = [Path(json_file)] if json_file else [MANIFEST_FILE, MATCHES_JSON]
+    sources = [s for s in sources if s.exists()]
+
+    if not table_file.exists():
+        return bool(sources)
+    if any(s.stat().st_mtime > table_file.stat().st_mtime for s in sources):
+        return True
+    # A table written before a column was added is rebuilt
+    return bool(sources) and not set(MATCH_COLUMNS) <= set(pq.read_schema(table_file).names)
+
+
+def load_match_table(columns=None, table_file=None):
+    """Load the match table, reading only the requested columns.
+
+    Rebuilds the table from the match data first if it is missing or stale.
+    Returns None when no match data exists.
+    """
+    table_file = Path(table_file) if table_file else MATCHES_TABLE
+
+    if table_file == MATCHES_TABLE and match_table_is_stale():
+        try:
+            rebuild_match_table()
+        except Exception as e:
+            print(f"  Could not rebuild match table: {e}")
+
+    if not table_file.exists():
+        return None
+
+    return pd.read_parquet(table_file, columns=list(columns) if columns else None)
+
+
+def _value(v):
+    """Convert a pandas cell to a plain Python value (NA -> None)."""
+    if v is None or v is pd.NA:
+        return None
+    try:
+        if pd.isna(v):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return int(v) if hasattr(v, 'item') and not isinstance(v, str) else v
+
+
+def _corner(row, side):
+    """Rebuild a corner dict from a table row (None for a BYE)."""
+    name = _value(row[f'{side}_name'])
+    country = _value(row[f'{side}_country'])
+    if name is None and country is None:
+        return None
+    return {
+        'name': name or '',
+        'country': country or '',
+        'federation': _value(row.get(f'{side}_federation')) or '',
+        'score': _value(row[f'{side}_score']),
+    }
+
+
+def events_from_table(df):
+    """Rebuild the nested events -> categories -> matches view from the table.
+
+    Row order is preserved, so events, categories, rounds and matches come
+    back in the order the parser wrote them. When the link columns are
+    loaded, matches get their bracket links (ids, feeders, depths) back.
+    """
+    events = {}
+
+    for row in df.to_dict('records'):
+        verid = _value(row['verid'])
+        catid = _value(row['catid'])
+
+        event = events.get(verid)
+        if event is None:
+            event = events[verid] = {
+                'verid': verid,
+                'event_name': _value(row['event']) or '',
+                'categories': {}
+            }
+
+        category = event['categories'].get(catid)
+        if category is None:
+            category = event['categories'][catid] = {
+                'catid': catid,
+                'category': _value(row['category']) or '',
+                'rounds': [],
+                'matches': [],
+                'athletes': []
+            }
+
+        round_name = _value(row['round']) or ''
+        if round_name not in category['rounds']:
+            category['rounds'].append(round_name)
+
+        red = _corner(row, 'red')
+        blue = _corner(row, 'blue')
+        match = {
+            'round': round_name,
+            'red_corner': red,
+            'blue_corner': blue,
+            'winner': None
+        }
+
+        side = _value(row['winner_side'])
+        if side:
+            winner = red if side == 'red' else blue
+            match['winner'] = winner['name']
+            match['winner_country'] = winner['country']
+
+        for col in ('outcome', 'stage'):
+            if col in row:
+                match[col] = _value(row[col])
+
+        if 'next_match' in row:
+            match['next'] = _value(row['next_match'])
+            match['loser_next'] = _value(row.get('loser_next'))
+
+        if red and blue:
+            for corner in (red, blue):
+                if corner['name'] and corner['name'] not in category['athletes']:
+                    category['athletes'].append(corner['name'])
+
+        category['matches'].append(match)
+
+    result = []
+    for event in events.values():
+        event['categories'] = list(event['categories'].values())
+        for category in event['categories']:
+            if any('next' in m for m in category['matches']):
+                restore_links(category)
+        result.append(event)
+    return result
+
+
+def table_to_all_data(df):
+    """Rebuild the all_matches.json layout (events + flat list) from the table."""
+    events = events_from_table(df)
+    all_matches = flatten_matches(events)
+
+    return {
+        'events': events,
+        'all_matches': all_matches,
+        'total_matches': len(all_matches)
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Build the columnar match table')
+    parser.add_argument('--info', action='store_true', help='Show table size and columns')
+    args = parser.parse_args()
+
+    if args.info:
+        df = load_match_table()
+        if df is None:
+            print("No match data found")
+        else:
+            print(f"Table: {MATCHES_TABLE}")
+            print(f"Size: {MATCHES_TABLE.stat().st_size / 1024:.1f} KB")
+            print(f"Matches: {len(df)}")
+            print(df.dtypes.to_string())
+    else:
+        output = rebuild_match_table()
+        if output:
+            print(f"Saved to: {output}")
+        else:
+            print(f"No {MATCHES_JSON.name} found")
@@ -6,23 +6,71 @@ Extracts match results including:
 - Countries
 - Scores
 - Round information
-- Winners (determined by score comparison)
+- Winners and how the bout was decided: score, submission, DQ, walkover,
+  referee decision, or who fought on after a tie (match_outcome.py)
+- Bracket links: match ids, feeder matches, next match and round depth (bracket_tree.py)
+
+Usage:
+    python parse_bracket_html.py                  # Parse the newest bracket file
+    python parse_bracket_html.py --all            # Parse every bracket into Results/matches/ + all_matches.json
+    python parse_bracket_html.py --all --jobs 8   # Same, spread over 8 worker processes
+    python parse_bracket_html.py --all --no-combined  # Per-event shards only, skip all_matches.json
+    python parse_bracket_html.py --all --no-cache # Re-parse files even if their HTML is unchanged
+    python parse_bracket_html.py --all --backend lxml   # Use the lxml fast path
+    python parse_bracket_html.py --compare-backends     # Check lxml output against bs4 and time both
+
+Every --all/--verid run writes Results/parse_report.json: per-file parse
+time, match/competitor counts, unresolved winners and errors, with
+percentiles (python parse_report.py shows it).
 """
 import sys
 sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
+import os
 import re
 import json
+import time
+import functools
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+from match_store import write_match_table
+from match_shards import MatchShardWriter, iter_events, COMBINED_JSON, SHARD_DIR
+from bracket_cache import BracketCache
+from parse_report import ParseReport, format_summary
+from bracket_tree import link_matches
+from match_outcome import decide_outcome, read_score, resolve_ties
+
 BRACKETS_DIR = Path(__file__).parent / "Brackets"
 RESULTS_DIR = Path(__file__).parent / "Results"
 
+# Bump when parse_bracket_html() output changes - invalidates the parse cache
+PARSER_VERSION = 3
+
+# 'bs4' = BeautifulSoup + html.parser, 'lxml' = compiled libxml2 tree + XPath
+BACKENDS = ['bs4', 'lxml']
+DEFAULT_BACKEND = 'bs4'
+
+
+def parse_bracket_html(html_content, backend=None):
+    """Parse bracket HTML and extract match data.
+
+    backend='lxml' uses the compiled parser (same output, much faster); it
+    falls back to BeautifulSoup when lxml is missing or can't read the page.
+    """
+    if (backend or DEFAULT_BACKEND) == 'lxml' and etree is not None:
+        try:
+            return _link(_parse_bracket_lxml(html_content))
+        except (ValueError, etree.ParserError):
+            pass
 
-def parse_bracket_html(html_content):
-    """Parse bracket HTML and extract match data."""
     soup = BeautifulSoup(html_content, 'html.parser')
 
     bracket_data = {
@@ -30,7 +78,7 @@ def parse_bracket_html(html_content):
         'category': '',
         'rounds': [],
         'matches': [],
-        'athletes': set()
+        'athletes': {}
     }
 
     # Get event/category title
@@ -38,13 +86,7 @@ def parse_bracket_html(html_content):
     if title_div:
         h3 = title_div.find('h3')
         if h3:
-            title_text = h3.get_text(separator='\n').strip()
-            lines = title_text.split('\n')
-            if len(lines) >= 2:
-                bracket_data['event_name'] = lines[0].strip()
-                bracket_data['category'] = lines[1].strip()
-            else:
-                bracket_data['category'] = title_text
+            _set_title(bracket_data, h3.get_text(separator='\n'))
 
     # Find all rounds
     rounds = soup.find_all('div', class_='tournament-bracket__round')
@@ -65,41 +107,63 @@ def parse_bracket_html(html_content):
             red_item = items[i] if i < len(items) else None
             blue_item = items[i + 1] if i + 1 < len(items) else None
 
-            match = {
-                'round': round_name,
-                'red_corner': extract_competitor(red_item) if red_item else None,
-                'blue_corner': extract_competitor(blue_item) if blue_item else None,
-                'winner': None
-            }
-
-            # Determine winner by score
-            if match['red_corner'] and match['blue_corner']:
-                red_score = match['red_corner'].get('score', 0) or 0
-                blue_score = match['blue_corner'].get('score', 0) or 0
-
-                if red_score > blue_score:
-                    match['winner'] = match['red_corner']['name']
-                    match['winner_country'] = match['red_corner']['country']
-                elif blue_score > red_score:
-                    match['winner'] = match['blue_corner']['name']
-                    match['winner_country'] = match['blue_corner']['country']
-
-                # Add athletes
-                if match['red_corner']['name']:
-                    bracket_data['athletes'].add(match['red_corner']['name'])
-                if match['blue_corner']['name']:
-                    bracket_data['athletes'].add(match['blue_corner']['name'])
-
-            # Only add valid matches
-            if match['red_corner'] or match['blue_corner']:
-                bracket_data['matches'].append(match)
-
-    # Convert set to list for JSON
+            _add_match(bracket_data, round_name,
+                       extract_competitor(red_item) if red_item else None,
+                       extract_competitor(blue_item) if blue_item else None)
+
+    # Convert to list for JSON
     bracket_data['athletes'] = list(bracket_data['athletes'])
 
+    return _link(bracket_data)
+
+
+def _link(bracket_data):
+    """Match ids, winner/loser progression links and round depths.
+
+    Tied bouts are given to the corner that fought on, then relinked so
+    their loser_next is set too.
+    """
+    link_matches(bracket_data)
+    if resolve_ties(bracket_data):
+        link_matches(bracket_data)
     return bracket_data
 
 
+def _set_title(bracket_data, title_text):
+    """Split the header title into event name and category."""
+    title_text = title_text.strip()
+    lines = title_text.split('\n')
+    if len(lines) >= 2:
+        bracket_data['event_name'] = lines[0].strip()
+        bracket_data['category'] = lines[1].strip()
+    else:
+        bracket_data['category'] = title_text
+
+
+def _add_match(bracket_data, round_name, red_corner, blue_corner):
+    """Decide the winner of one red/blue pair and add it to bracket_data."""
+    match = {
+        'round': round_name,
+        'red_corner': red_corner,
+        'blue_corner': blue_corner,
+        'winner': None
+    }
+
+    # Winner, outcome method and stage from scores and markers
+    decide_outcome(match)
+
+    if match['red_corner'] and match['blue_corner']:
+        # Add athletes (dict keeps first-seen order, so output is reproducible)
+        if match['red_corner']['name']:
+            bracket_data['athletes'][match['red_corner']['name']] = True
+        if match['blue_corner']['name']:
+            bracket_data['athletes'][match['blue_corner']['name']] = True
+
+    # Only add valid matches
+    if match['red_corner'] or match['blue_corner']:
+        bracket_data['matches'].append(match)
+
+
 def extract_competitor(item):
     """Extract competitor info from a bracket item."""
     if not item:
@@ -123,40 +187,171 @@ def extract_competitor(item):
 
         # Remove the federation info part to get just the name
         info_span = caption.find('span', class_='tournament-bracket__caption_info2')
-        if info_span:
-            info_text = info_span.get_text().strip()
-            # Format: "FEDERATION NAME,COUNTRY"
-            parts = info_text.rsplit(',', 1)
-            if len(parts) == 2:
-                competitor['federation'] = parts[0].strip()
-                competitor['country'] = parts[1].strip()
-            # Remove federation text from name
-            raw_text = raw_text.replace(info_text, '').strip()
-
-        # Clean up name - remove extra whitespace and special chars
-        name = re.sub(r'\s+', ' ', raw_text).strip()
-        # Remove trailing non-name characters
-        name = re.sub(r'[\s\u00a0]+$', '', name)
-        competitor['name'] = name
+        _set_name(competitor, raw_text, info_span.get_text() if info_span else None)
 
     # Get country code from abbr (more reliable)
     abbr = item.find('abbr', class_='tournament-bracket__code')
     if abbr:
         competitor['country'] = abbr.get('title', '') or abbr.get_text().strip()
 
-    # Get score
+    # Get score (or a DQ/WO/SUB/... marker in its place)
     score_span = item.find('span', class_='tournament-bracket__number')
     if score_span:
-        score_text = score_span.get_text().strip()
-        try:
-            competitor['score'] = int(score_text)
-        except ValueError:
-            competitor['score'] = 0
+        read_score(competitor, score_span.get_text())
+
+    # Winning corner highlighted by the page
+    if _is_winner_class(item.get('class')) or item.find(class_=_is_winner_class):
+        competitor['marked_winner'] = True
 
     # Return if we have at least a name or country
     return competitor if (competitor['name'] or competitor['country']) else None
 
 
+def _is_winner_class(class_value):
+    """True for a class attribute value like 'tournament-bracket__team--winner'."""
+    if isinstance(class_value, list):
+        class_value = ' '.join(class_value)
+    return bool(class_value) and 'winner' in class_value
+
+
+def _set_name(competitor, raw_text, info_text):
+    """Fill name, federation and country from the caption and its info span text."""
+    if info_text is not None:
+        info_text = info_text.strip()
+        # Format: "FEDERATION NAME,COUNTRY"
+        parts = info_text.rsplit(',', 1)
+        if len(parts) == 2:
+            competitor['federation'] = parts[0].strip()
+            competitor['country'] = parts[1].strip()
+        # Remove federation text from name
+        raw_text = raw_text.replace(info_text, '').strip()
+
+    # Clean up name - remove extra whitespace and special chars
+    name = re.sub(r'\s+', ' ', raw_text).strip()
+    # Remove trailing non-name characters
+    name = re.sub(r'[\s\u00a0]+$', '', name)
+    competitor['name'] = name
+
+
+# =============================================================================
+# LXML BACKEND - same output as the BeautifulSoup functions above
+# =============================================================================
+def _class_xpath(path, class_name):
+    """Compile an XPath that matches class_name anywhere in the class attribute (like bs4 class_=)."""
+    return etree.XPath(path.format(
+        cls=f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"))
+
+
+if etree is not None:
+    _HTML_PARSER = etree.HTMLParser(encoding='utf-8')
+    _XP_TITLE = _class_xpath("(//div[{cls}])[1]//h3", 'newsheader')
+    _XP_ROUNDS = _class_xpath("//div[{cls}]", 'tournament-bracket__round')
+    _XP_ROUND_TITLE = _class_xpath("(.//h3[{cls}])[1]", 'tournament-bracket__round-title')
+    _XP_ITEMS = _class_xpath(".//li[{cls}]", 'tournament-bracket__item')
+    _XP_CAPTION_TD = _class_xpath("(.//td[{cls}])[1]", 'tournament-bracket__caption_info')
+    _XP_CAPTION = _class_xpath("(.//*[{cls}])[1]", 'tournament-bracket__caption_info')
+    _XP_INFO = _class_xpath("(.//span[{cls}])[1]", 'tournament-bracket__caption_info2')
+    _XP_CODE = _class_xpath("(.//abbr[{cls}])[1]", 'tournament-bracket__code')
+    _XP_SCORE = _class_xpath("(.//span[{cls}])[1]", 'tournament-bracket__number')
+    _XP_WINNER = etree.XPath("descendant-or-self::*[contains(@class, 'winner')][1]")
+
+# bs4 keeps the text of these tags out of get_text()
+_NON_TEXT_TAGS = {'script', 'style', 'template', 'rt', 'rp'}
+
+
+def _strings(el, out):
+    """Collect the text nodes under el in document order (what bs4's get_text() joins)."""
+    if el.text and el.tag not in _NON_TEXT_TAGS:
+        out.append(el.text)
+    for child in el:
+        # Comments and processing instructions have no string tag; their tails still count
+        if isinstance(child.tag, str) and child.tag not in _NON_TEXT_TAGS:
+            _strings(child, out)
+        if child.tail:
+            out.append(child.tail)
+    return out
+
+
+def _get_text(el, separator=''):
+    return separator.join(_strings(el, []))
+
+
+def _first(xpath, el):
+    found = xpath(el)
+    return found[0] if found else None
+
+
+def _parse_bracket_lxml(html_content):
+    """parse_bracket_html() on an lxml tree with precompiled XPath selectors."""
+    root = etree.fromstring(html_content.encode('utf-8'), _HTML_PARSER)
+    if root is None:
+        raise ValueError("empty document")
+
+    bracket_data = {
+        'event_name': '',
+        'category': '',
+        'rounds': [],
+        'matches': [],
+        'athletes': {}
+    }
+
+    # First h3 inside the first newsheader div
+    h3 = _first(_XP_TITLE, root)
+    if h3 is not None:
+        _set_title(bracket_data, _get_text(h3, '\n'))
+
+    for round_div in _XP_ROUNDS(root):
+        round_title = _first(_XP_ROUND_TITLE, round_div)
+        round_name = _get_text(round_title).strip() if round_title is not None else 'Unknown Round'
+
+        bracket_data['rounds'].append(round_name)
+
+        items = _XP_ITEMS(round_div)
+        for i in range(0, len(items), 2):
+            red_item = items[i]
+            blue_item = items[i + 1] if i + 1 < len(items) else None
+
+            _add_match(bracket_data, round_name,
+                       _extract_competitor_lxml(red_item),
+                       _extract_competitor_lxml(blue_item) if blue_item is not None else None)
+
+    bracket_data['athletes'] = list(bracket_data['athletes'])
+
+    return bracket_data
+
+
+def _extract_competitor_lxml(item):
+    """extract_competitor() for an lxml element."""
+    competitor = {
+        'name': '',
+        'country': '',
+        'federation': '',
+        'score': None
+    }
+
+    caption = _first(_XP_CAPTION_TD, item)
+    if caption is None:
+        caption = _first(_XP_CAPTION, item)
+
+    if caption is not None:
+        info_span = _first(_XP_INFO, caption)
+        _set_name(competitor, _get_text(caption, ' ').strip(),
+                  _get_text(info_span) if info_span is not None else None)
+
+    abbr = _first(_XP_CODE, item)
+    if abbr is not None:
+        competitor['country'] = abbr.get('title', '') or _get_text(abbr).strip()
+
+    score_span = _first(_XP_SCORE, item)
+    if score_span is not None:
+        read_score(competitor, _get_text(score_span))
+
+    if _XP_WINNER(item):
+        competitor['marked_winner'] = True
+
+    return competitor if (competitor['name'] or competitor['country']) else None
+
+
 def find_athlete_matches(bracket_data, athlete_name):
     """Find all matches for a specific athlete."""
     athlete_matches = []
@@ -241,79 +436,198 @@ def format_bracket_summary(bracket_data):
     return '\n'.join(lines)
 
 
-def parse_all_brackets(verid_filter=None):
-    """Parse all bracket HTML files and save to all_matches.json."""
-    all_data = {
-        'parsed_at': datetime.now().isoformat(),
-        'events': {},
-        'all_matches': [],
-        'total_matches': 0
-    }
-
-    # Get bracket files
+def bracket_ids(bracket_file):
+    """(verid, catid) from a bracket_{verid}_{catid}.html name, or None."""
+    parts = bracket_file.stem.split('_')
+    if len(parts) < 3:
+        return None
+    return parts[1], parts[2]
+
+
+def parse_bracket_file(bracket_file, backend=None):
+    """Parse one bracket_{verid}_{catid}.html file.
+
+    Returns (verid, catid, parsed, error, seconds) - runs in worker
+    processes with --jobs, so seconds is the parse time alone.
+    """
+    ids = bracket_ids(bracket_file)
+    if ids is None:
+        return None, None, None, None, None
+
+    verid, catid = ids
+    start = time.perf_counter()
+    try:
+        with open(bracket_file, 'r', encoding='utf-8') as f:
+            html = f.read()
+        parsed = parse_bracket_html(html, backend)
+        return verid, catid, parsed, None, time.perf_counter() - start
+    except Exception as e:
+        return verid, catid, None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+
+def add_parsed_category(event, catid, parsed):
+    """Append one parsed category to its event dict."""
+    # Update event name if found
+    if parsed.get('event_name'):
+        event['event_name'] = parsed['event_name']
+
+    # Add category data
+    event['categories'].append({
+        'catid': catid,
+        'category': parsed.get('category', f'Category {catid}'),
+        'rounds': parsed.get('rounds', []),
+        'round_depths': parsed.get('round_depths', []),
+        'matches': parsed.get('matches', []),
+        'athletes': parsed.get('athletes', [])
+    })
+
+
+def iter_bracket_events(verid_filter=None, jobs=1, use_cache=True, backend=None, report=None):
+    """Parse bracket HTML files and yield one event at a time.
+
+    Files whose HTML hash is already in the parse cache are read back from
+    it; only new or changed files are parsed. With jobs > 1 they are parsed
+    in a process pool. Files are handled in name order either way, so the
+    output doesn't depend on jobs or on what was cached. Both backends
+    produce the same output, so they share the cache.
+
+    Sorted names keep each event's bracket_{verid}_*.html files together,
+    so an event is complete - and yielded - as soon as the next one starts.
+    Every file is recorded in report (a ParseReport), if given.
+    """
+    # Get bracket files - sorted so events and categories come out in a stable order
     pattern = f"bracket_{verid_filter}_*.html" if verid_filter else "bracket_*.html"
-    bracket_files = list(BRACKETS_DIR.glob(pattern))
+    bracket_files = [bf for bf in sorted(BRACKETS_DIR.glob(pattern)) if bracket_ids(bf)]
 
     print(f"Found {len(bracket_files)} bracket files")
 
-    for bf in bracket_files:
-        # Parse filename: bracket_verid_catid.html
-        parts = bf.stem.split('_')
-        if len(parts) < 3:
-            continue
-
-        verid = parts[1]
-        catid = parts[2]
-
-        try:
-            with open(bf, 'r', encoding='utf-8') as f:
-                html = f.read()
-
-            parsed = parse_bracket_html(html)
-
-            # Initialize event if needed
-            if verid not in all_data['events']:
-                all_data['events'][verid] = {
+    # Unchanged HTML comes straight from the parse cache
+    cache = BracketCache(PARSER_VERSION)
+    fingerprints = {bf.name: cache.fingerprint(bf) for bf in bracket_files}
+    cached = {bf.name for bf in bracket_files if use_cache and cache.has(fingerprints[bf.name])}
+
+    to_parse = [bf for bf in bracket_files if bf.name not in cached]
+    print(f"Parse cache: {len(cached)} unchanged, {len(to_parse)} to parse")
+
+    parse_file = functools.partial(parse_bracket_file, backend=backend)
+    start = time.perf_counter()
+    pool = None
+    if jobs > 1 and len(to_parse) > 1:
+        print(f"Parsing with {jobs} worker processes")
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        # map() yields results in submission order
+        chunksize = max(1, len(to_parse) // (jobs * 8))
+        parsed_files = pool.map(parse_file, to_parse, chunksize=chunksize)
+    else:
+        parsed_files = map(parse_file, to_parse)
+
+    event = None
+    try:
+        for bf in bracket_files:
+            size = fingerprints[bf.name]['size']
+            parsed = cache.get(fingerprints[bf.name]) if bf.name in cached else None
+            if parsed is not None:
+                verid, catid = bracket_ids(bf)
+                error, seconds = None, None
+            else:
+                # Parsed in order; a fragment that vanished from the cache is parsed here
+                verid, catid, parsed, error, seconds = next(parsed_files) if bf.name not in cached else parse_file(bf)
+                if parsed is not None:
+                    cache.put(fingerprints[bf.name], parsed)
+                else:
+                    # Not cached - a failed file is retried next run
+                    del fingerprints[bf.name]
+
+            if report is not None:
+                source = 'error' if error else ('parsed' if seconds is not None else 'cached')
+                report.add(bf.name, verid, catid, source, seconds, size, parsed, error)
+
+            if error:
+                print(f"Error parsing {bf.name}: {error}")
+                continue
+
+            if event is not None and event['verid'] != verid:
+                yield event
+                event = None
+            if event is None:
+                event = {
                     'verid': verid,
                     'event_name': parsed.get('event_name', f'Event {verid}'),
                     'categories': []
                 }
+            add_parsed_category(event, catid, parsed)
+
+        if event is not None:
+            yield event
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    if to_parse:
+        elapsed = time.perf_counter() - start
+        rate = len(to_parse) / elapsed if elapsed > 0 else 0
+        print(f"Parsed {len(to_parse)} files ({backend or DEFAULT_BACKEND}) in {elapsed:.2f}s ({rate:.1f} files/sec)")
+
+    # A --verid run only refreshes its own files in the cache index
+    cache.save(fingerprints, replace=not verid_filter)
+
+
+def parse_all_brackets(verid_filter=None, jobs=1, use_cache=True, backend=None, combined=True, report=None):
+    """Parse all bracket HTML files into Results/matches/ (one shard per event).
+
+    Each event is written as soon as it is complete, so memory is bounded
+    by the largest event. combined=True also streams the legacy
+    Results/all_matches.json. A --verid run replaces only that event's
+    shard. Files are recorded in report, if given. Returns the shard manifest.
+    """
+    writer = MatchShardWriter(combined_file=COMBINED_JSON if combined else None,
+                              replace=not verid_filter)
+    # Shards stay pending until close() - an error part-way leaves the previous
+    # shards, manifest and combined file as they were
+    try:
+        for event in iter_bracket_events(verid_filter, jobs, use_cache, backend, report):
+            writer.write_event(event)
+    except BaseException:
+        writer.discard()
+        raise
+    manifest = writer.close()
+    if report is not None:
+        report.finish()
+    return manifest
+
+
+def compare_backends(verid_filter=None):
+    """Parse every bracket file with both backends; report differences and timings."""
+    pattern = f"bracket_{verid_filter}_*.html" if verid_filter else "bracket_*.html"
+    bracket_files = [bf for bf in sorted(BRACKETS_DIR.glob(pattern)) if bracket_ids(bf)]
+    print(f"Comparing backends on {len(bracket_files)} bracket files")
 
-            # Update event name if found
-            if parsed.get('event_name'):
-                all_data['events'][verid]['event_name'] = parsed['event_name']
-
-            # Add category data
-            category_data = {
-                'catid': catid,
-                'category': parsed.get('category', f'Category {catid}'),
-                'rounds': parsed.get('rounds', []),
-                'matches': parsed.get('matches', []),
-                'athletes': parsed.get('athletes', [])
-            }
-
-            all_data['events'][verid]['categories'].append(category_data)
-
-            # Add to all_matches flat list
-            for match in parsed.get('matches', []):
-                match_entry = {
-                    'event': parsed.get('event_name', ''),
-                    'verid': verid,
-                    'category': parsed.get('category', ''),
-                    'catid': catid,
-                    **match
-                }
-                all_data['all_matches'].append(match_entry)
-
-            all_data['total_matches'] += len(parsed.get('matches', []))
-
-        except Exception as e:
-            print(f"Error parsing {bf.name}: {e}")
-
-    # Convert events dict to list
-    all_data['events'] = list(all_data['events'].values())
-
-    return all_data
+    timings = dict.fromkeys(BACKENDS, 0.0)
+    mismatches = []
+    for bf in bracket_files:
+        with open(bf, 'r', encoding='utf-8') as f:
+            html = f.read()
+        outputs = {}
+        for backend in BACKENDS:
+            start = time.perf_counter()
+            outputs[backend] = parse_bracket_html(html, backend)
+            timings[backend] += time.perf_counter() - start
+        if outputs['bs4'] != outputs['lxml']:
+            mismatches.append(bf.name)
+
+    for backend, elapsed in timings.items():
+        rate = len(bracket_files) / elapsed if elapsed > 0 else 0
+        print(f"  {backend:<5} {elapsed:8.2f}s ({rate:.1f} files/sec)")
+    if timings['lxml'] > 0:
+        print(f"  lxml speedup: {timings['bs4'] / timings['lxml']:.1f}x")
+
+    if mismatches:
+        print(f"\n{len(mismatches)} files parse differently:")
+        for name in mismatches[:20]:
+            print(f"  {name}")
+    else:
+        print("\nIdentical output for every file")
+    return mismatches
 
 
 def main():
@@ -323,24 +637,53 @@ def main():
     parser = argparse.ArgumentParser(description='Parse bracket HTML files')
     parser.add_argument('--all', action='store_true', help='Parse all bracket files')
     parser.add_argument('--verid', type=str, help='Parse specific event verid')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Worker processes for --all/--verid (0 = one per CPU core)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Re-parse every file instead of reusing cached results')
+    parser.add_argument('--no-combined', action='store_true',
+                        help='Only write the per-event shards, not the combined all_matches.json')
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help='HTML parser: bs4 (BeautifulSoup) or lxml (compiled, needs lxml installed)')
+    parser.add_argument('--compare-backends', action='store_true',
+                        help='Parse every file with both backends and report differences and timings')
     args = parser.parse_args()
 
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    if (args.backend == 'lxml' or args.compare_backends) and etree is None:
+        print("lxml is not installed (pip install lxml) - using bs4")
+        args.backend = 'bs4'
+        if args.compare_backends:
+            return
+
+    if args.compare_backends:
+        sys.exit(1 if compare_backends(args.verid) else 0)
+
     if args.all or args.verid:
         # Parse all brackets
         print("=" * 60)
         print("PARSING ALL BRACKETS")
         print("=" * 60)
 
-        all_data = parse_all_brackets(args.verid)
+        report = ParseReport(backend=args.backend, jobs=jobs, verid_filter=args.verid)
+        manifest = parse_all_brackets(args.verid, jobs=jobs, use_cache=not args.no_cache,
+                                      backend=args.backend, combined=not args.no_combined, report=report)
+        report_file = report.write()
+
+        # Columnar copy for the dashboard and analyzers - streamed from the shards
+        table_file = write_match_table({'events': iter_events()})
 
-        # Save to all_matches.json
-        output_file = RESULTS_DIR / "all_matches.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_data, f, indent=2, ensure_ascii=False)
+        print(f"\nSaved to: {SHARD_DIR}")
+        if not args.no_combined:
+            print(f"Combined file: {COMBINED_JSON}")
+        print(f"Match table: {table_file}")
+        print(f"Events: {manifest['total_events']}")
+        print(f"Total matches: {manifest['total_matches']}")
 
-        print(f"\nSaved to: {output_file}")
-        print(f"Events: {len(all_data['events'])}")
-        print(f"Total matches: {all_data['total_matches']}")
+        print(f"\nParse report: {report_file}")
+        for line in format_summary(report.summary()):
+            print(f"  {line}")
         return
 
     # Default: parse single file
@@ -358,7 +701,7 @@ def main():
     with open(bracket_files[0], 'r', encoding='utf-8') as f:
         html_content = f.read()
 
-    bracket_data = parse_bracket_html(html_content)
+    bracket_data = parse_bracket_html(html_content, args.backend)
 
     # Print summary
     print("\n" + "=" * 60)
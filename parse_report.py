@@ -0,0 +1,239 @@
+"""
+Parse Report
+============
+Per-file record of a bracket parse run, written to Results/parse_report.json.
+
+For every Brackets/ file the report keeps where its result came from
+(parsed, cached or error), the parse time, the HTML size, how many
+matches and competitors it yielded, how many bouts were left without a
+winner, and the exception of a file that failed. The summary adds
+percentiles of the parse time and match counts, so slow or pathological
+brackets can be found and re-scraped. A file is flagged as suspect when
+it failed, yielded no matches, has unresolved winners, or has fewer
+bouts than its competitors need (n competitors fight at least n - 1
+bouts).
+
+Usage:
+    python parse_report.py                # Summary of the last parse run
+    python parse_report.py --slowest 20   # The 20 slowest files
+    python parse_report.py --suspect      # Files to check or re-scrape
+    python parse_report.py --errors       # Files that failed, with the exception
+"""
+import sys
+import json
+import time
+from pathlib import Path
+from datetime import datetime
+
+BASE_DIR = Path(__file__).parent
+RESULTS_DIR = BASE_DIR / "Results"
+REPORT_FILE = RESULTS_DIR / "parse_report.json"
+
+REPORT_VERSION = 1
+PERCENTILES = [50, 90, 95, 99]
+SLOWEST = 10
+
+
+def _percentile(values, q):
+    """Linearly interpolated q-th percentile of sorted values."""
+    if not values:
+        return None
+    pos = (len(values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def distribution(values, digits=2):
+    """Mean, percentiles and max of a list of numbers (None entries skipped)."""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return {}
+    stats = {'mean': round(sum(values) / len(values), digits)}
+    for q in PERCENTILES:
+        stats[f'p{q}'] = round(_percentile(values, q), digits)
+    stats['max'] = round(values[-1], digits)
+    return stats
+
+
+def bracket_counts(parsed):
+    """Matches, competitors, unresolved winners and byes of one parsed bracket."""
+    names = set()
+    unresolved = byes = 0
+    for match in parsed.get('matches', []):
+        corners = [c for c in (match.get('red_corner'), match.get('blue_corner')) if c]
+        names.update(c['name'] for c in corners if c.get('name'))
+        if len(corners) == 2 and not match.get('winner'):
+            unresolved += 1
+        elif len(corners) == 1:
+            byes += 1
+    return {
+        'matches': len(parsed.get('matches', [])),
+        'competitors': len(names),
+        'unresolved': unresolved,
+        'byes': byes
+    }
+
+
+def suspect_reasons(entry):
+    """Why a file entry looks wrong (empty list if it looks fine)."""
+    if entry['source'] == 'error':
+        return ['error']
+    reasons = []
+    if entry['matches'] == 0:
+        reasons.append('no matches')
+    if entry['unresolved']:
+        reasons.append(f"{entry['unresolved']} unresolved")
+    # Bouts between two athletes - byes don't eliminate anyone
+    if entry['competitors'] > 1 and entry['matches'] - entry['byes'] < entry['competitors'] - 1:
+        reasons.append(f"{entry['matches'] - entry['byes']} bouts for {entry['competitors']} competitors")
+    return reasons
+
+
+class ParseReport:
+    """Collects one entry per bracket file during a parse run."""
+
+    def __init__(self, backend=None, jobs=1, verid_filter=None):
+        self.backend = backend
+        self.jobs = jobs
+        self.verid_filter = verid_filter
+        self.started = time.perf_counter()
+        self.wall_seconds = None
+        self.files = []
+
+    def add(self, name, verid, catid, source, seconds=None, size=None, parsed=None, error=None):
+        """Record one file; source is 'parsed', 'cached' or 'error'."""
+        entry = {
+            'file': name,
+            'verid': verid,
+            'catid': catid,
+            'source': source,
+            'ms': round(seconds * 1000, 2) if seconds is not None else None,
+            'kb': round(size / 1024, 1) if size is not None else None,
+            **bracket_counts(parsed or {})
+        }
+        if error:
+            entry['error'] = error
+        self.files.append(entry)
+        return entry
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self.started
+
+    def summary(self):
+        """Totals and distributions over the recorded files."""
+        parsed = [f for f in self.files if f['source'] == 'parsed']
+        ok = [f for f in self.files if f['source'] != 'error']
+        parse_seconds = sum(f['ms'] for f in parsed) / 1000
+        wall = self.wall_seconds if self.wall_seconds is not None else time.perf_counter() - self.started
+        return {
+            'files': len(self.files),
+            'parsed': len(parsed),
+            'cached': sum(1 for f in self.files if f['source'] == 'cached'),
+            'errors': len(self.files) - len(ok),
+            'suspect': sum(1 for f in self.files if suspect_reasons(f)),
+            'matches': sum(f['matches'] for f in ok),
+            'competitors': sum(f['competitors'] for f in ok),
+            'unresolved': sum(f['unresolved'] for f in ok),
+            'byes': sum(f['byes'] for f in ok),
+            'parse_seconds': round(parse_seconds, 3),
+            'wall_seconds': round(wall, 3),
+            'files_per_sec': round(len(parsed) / parse_seconds, 1) if parse_seconds > 0 else None,
+            'parse_ms': distribution([f['ms'] for f in parsed]),
+            'ms_per_kb': distribution([f['ms'] / f['kb'] for f in parsed if f['kb']], 3),
+            'matches_per_file': distribution([f['matches'] for f in ok], 1),
+        }
+
+    def to_dict(self):
+        parsed = [f for f in self.files if f['source'] == 'parsed']
+        return {
+            'version': REPORT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'backend': self.backend,
+            'jobs': self.jobs,
+            'verid_filter': self.verid_filter,
+            'summary': self.summary(),
+            'slowest': [f['file'] for f in sorted(parsed, key=lambda f: -f['ms'])[:SLOWEST]],
+            'files': self.files
+        }
+
+    def write(self, output_file=None):
+        """Save the report as JSON (via a temp file); returns its path."""
+        output_file = Path(output_file) if output_file else REPORT_FILE
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = output_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=1, ensure_ascii=False)
+        tmp_file.replace(output_file)
+        return output_file
+
+
+def load_report(report_file=None):
+    """The last saved report, or None."""
+    report_file = Path(report_file) if report_file else REPORT_FILE
+    if not report_file.exists():
+        return None
+    with open(report_file, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    return report if report.get('version') == REPORT_VERSION else None
+
+
+def format_summary(summary):
+    """Printable lines for a report summary."""
+    lines = [
+        f"Files: {summary['files']} ({summary['parsed']} parsed, {summary['cached']} cached, "
+        f"{summary['errors']} errors, {summary['suspect']} suspect)",
+        f"Matches: {summary['matches']}  competitors: {summary['competitors']}  "
+        f"unresolved winners: {summary['unresolved']}  byes: {summary['byes']}",
+    ]
+    if summary['parse_ms']:
+        ms = summary['parse_ms']
+        lines.append(f"Parse time: {summary['parse_seconds']:.2f}s of {summary['wall_seconds']:.2f}s wall "
+                     f"({summary['files_per_sec']} files/sec)")
+        lines.append("ms/file: " + '  '.join(f"{k} {v}" for k, v in ms.items()))
+    if summary['matches_per_file']:
+        lines.append("matches/file: " + '  '.join(f"{k} {v}" for k, v in summary['matches_per_file'].items()))
+    return lines
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Show the bracket parse report')
+    parser.add_argument('--slowest', type=int, metavar='N', help='List the N slowest files')
+    parser.add_argument('--suspect', action='store_true', help='List files with errors, no or too few matches, or unresolved winners')
+    parser.add_argument('--errors', action='store_true', help='List files that failed to parse')
+    args = parser.parse_args()
+
+    report = load_report()
+    if report is None:
+        print(f"No parse report at {REPORT_FILE} - run: python parse_bracket_html.py --all")
+        sys.exit(1)
+
+    print(f"Parse report: {report['created_at']} (backend {report['backend']}, jobs {report['jobs']}"
+          f"{', verid ' + report['verid_filter'] if report['verid_filter'] else ''})")
+    for line in format_summary(report['summary']):
+        print(f"  {line}")
+
+    files = report['files']
+    if args.slowest:
+        print(f"\nSlowest {args.slowest}:")
+        for f in sorted((f for f in files if f['source'] == 'parsed'), key=lambda f: -f['ms'])[:args.slowest]:
+            print(f"  {f['ms']:>9.1f} ms  {f['kb'] or 0:>8.1f} KB  {f['matches']:>4} matches  {f['file']}")
+
+    if args.suspect:
+        suspects = [(f, suspect_reasons(f)) for f in files]
+        suspects = [(f, reasons) for f, reasons in suspects if reasons]
+        print(f"\nSuspect files: {len(suspects)}")
+        for f, reasons in suspects:
+            print(f"  {f['file']:<32} {', '.join(reasons)}")
+        if suspects:
+            print("\nRe-scrape an event with: python robust_bracket_scraper.py --scrape VERID --force")
+
+    if args.errors:
+        errors = [f for f in files if f['source'] == 'error']
+        print(f"\nErrors: {len(errors)}")
+        for f in errors:
+            print(f"  {f['file']}: {f.get('error')}")
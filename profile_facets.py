@@ -0,0 +1,237 @@
+"""
+Profile Facets
+==============
+Per-athlete filter facets, computed once when the profile shards are built.
+
+Gender, weight classes, weight groups, disciplines, age categories and the
+event types an athlete has competed in are derived from category names and
+stored in Results/profiles/facets.parquet - one row per profile, in shard
+order. Multi-valued facets are one boolean column per value
+('weight:-62 KG', 'discipline:Ne-Waza', 'age:U21', ...), so filters are
+vectorized masks over the table instead of per-profile regex loops.
+
+Usage:
+    python profile_facets.py             # Show how many athletes have each facet value
+"""
+import re
+import sys
+
+import pandas as pd
+
+# Weight filter groups - a category matches a group if its name contains any token
+WEIGHT_GROUPS = {
+    'Lightweight (-62kg)': ['-56', '-62', '-48', '-52', '-57'],
+    'Middleweight (62-77kg)': ['-69', '-77', '-63', '-70'],
+    'Light Heavy (77-94kg)': ['-85', '-94'],
+    'Heavyweight (+94kg)': ['+94'],
+}
+
+DISCIPLINES = ['Fighting', 'Ne-Waza', 'Duo', 'Contact']
+AGE_CATEGORIES = ['U16', 'U18', 'U21', 'Adults', 'Masters']
+
+# Competition event types matched against comp['event_type']
+EVENT_TYPES = ['WORLD CHAMPIONSHIP', 'CONTINENTAL CHAMPIONSHIP', 'WORLD GAMES', 'A CLASS TOURNAMENT']
+
+BASE_COLUMNS = ['profile_id', 'name', 'country_code', 'gender', 'has_data', 'total_events',
+                'medals', 'gold', 'silver', 'bronze', 'medal_score', 'weights']
+
+
+def extract_gender_from_categories(profile):
+    """Extract gender from athlete's competition categories."""
+    categories = profile.get('categories', [])
+    for cat in categories:
+        cat_name = cat.get('category', '').upper()
+        if 'FEMALE' in cat_name:
+            return 'Female'
+        elif 'MALE' in cat_name:
+            return 'Male'
+    return 'Unknown'
+
+
+def extract_weight_classes(profile):
+    """Extract unique weight classes from athlete's categories."""
+    weights = set()
+    categories = profile.get('categories', [])
+    for cat in categories:
+        cat_name = cat.get('category', '')
+        # Extract weight like "-62 KG", "+94 KG", "-85 KG"
+        weight_match = re.search(r'([+-]?\d+\s*KG)', cat_name, re.IGNORECASE)
+        if weight_match:
+            weights.add(weight_match.group(1).upper())
+    return list(weights)
+
+
+def sort_weight_classes(weights):
+    """Sort weight classes numerically ('-48 KG' before '-62 KG')."""
+    def weight_sort_key(w):
+        num = re.search(r'(\d+)', w)
+        return int(num.group(1)) if num else 0
+    return sorted(weights, key=lambda w: (weight_sort_key(w), w))
+
+
+def extract_discipline(category_name):
+    """Extract Jiu Jitsu discipline from category name.
+
+    JJIF disciplines:
+    - Fighting (traditional gi competition)
+    - Ne-Waza (ground fighting only)
+    - Duo (choreographed pairs)
+    - Contact Ju-Jitsu (full contact striking + grappling)
+    """
+    cat_upper = category_name.upper()
+    if 'NE-WAZA' in cat_upper or 'NEWAZA' in cat_upper or 'NE WAZA' in cat_upper:
+        return 'Ne-Waza'
+    elif 'DUO' in cat_upper or 'SHOW' in cat_upper:
+        return 'Duo'
+    elif 'CONTACT' in cat_upper:
+        return 'Contact'
+    else:
+        return 'Fighting'
+
+
+def extract_age_category(category_name):
+    """Extract age category from category name.
+
+    JJIF age categories:
+    - U16 (Under 16)
+    - U18 (Under 18) / Cadets
+    - U21 (Under 21) / Juniors
+    - Adults / Seniors
+    - Masters (30+)
+    """
+    cat_upper = category_name.upper()
+    if 'U16' in cat_upper or 'UNDER 16' in cat_upper or 'U-16' in cat_upper:
+        return 'U16'
+    elif 'U18' in cat_upper or 'UNDER 18' in cat_upper or 'U-18' in cat_upper or 'CADET' in cat_upper:
+        return 'U18'
+    elif 'U21' in cat_upper or 'UNDER 21' in cat_upper or 'U-21' in cat_upper or 'JUNIOR' in cat_upper:
+        return 'U21'
+    elif 'MASTER' in cat_upper or 'VETERAN' in cat_upper:
+        return 'Masters'
+    elif 'ADULT' in cat_upper or 'SENIOR' in cat_upper:
+        return 'Adults'
+    else:
+        return 'Adults'  # Default
+
+
+def get_disciplines_competed(profile):
+    """Get all disciplines athlete has competed in."""
+    disciplines = set()
+    for cat in profile.get('categories', []):
+        discipline = extract_discipline(cat.get('category', ''))
+        disciplines.add(discipline)
+    return list(disciplines)
+
+
+def get_age_categories_competed(profile):
+    """Get all age categories athlete has competed in."""
+    age_cats = set()
+    for cat in profile.get('categories', []):
+        age_cat = extract_age_category(cat.get('category', ''))
+        age_cats.add(age_cat)
+    return list(age_cats)
+
+
+def facet_column(facet, value):
+    """Column name of one facet value, e.g. ('weight', '-62 KG') -> 'weight:-62 KG'."""
+    return f"{facet}:{value}"
+
+
+def _profile_facets(p):
+    """(base values, set of facet columns that are True) for one profile."""
+    categories = p.get('categories') or []
+    cat_names = [cat.get('category', '').upper() for cat in categories]
+    medals = p.get('medal_summary') or {}
+    weights = sort_weight_classes(extract_weight_classes(p))
+
+    base = {
+        'profile_id': str(p.get('profile_id') or ''),
+        'name': p.get('name', ''),
+        'country_code': p.get('country_code') or '',
+        'gender': extract_gender_from_categories(p),
+        'has_data': bool(categories),
+        'total_events': (p.get('overall_stats') or {}).get('total_events', 0) or 0,
+        'medals': medals.get('total', 0) or 0,
+        'gold': medals.get('gold', 0) or 0,
+        'silver': medals.get('silver', 0) or 0,
+        'bronze': medals.get('bronze', 0) or 0,
+        'weights': ', '.join(weights),
+    }
+    base['medal_score'] = base['gold'] * 3 + base['silver'] * 2 + base['bronze']
+
+    flags = {facet_column('weight', w) for w in weights}
+    flags.update(facet_column('discipline', d) for d in get_disciplines_competed(p))
+    flags.update(facet_column('age', a) for a in get_age_categories_competed(p))
+    for group, tokens in WEIGHT_GROUPS.items():
+        if any(token in name for name in cat_names for token in tokens):
+            flags.add(facet_column('weight_group', group))
+
+    event_types = {comp.get('event_type', '').upper()
+                   for cat in categories for comp in cat.get('competitions', [])}
+    for event_type in EVENT_TYPES:
+        if any(event_type in et for et in event_types):
+            flags.add(facet_column('event_type', event_type))
+
+    return base, flags
+
+
+def build_facets(profiles):
+    """Facet table for a list of profiles - row i describes profiles[i]."""
+    base_rows = []
+    flag_rows = []
+    weights = set()
+    for p in profiles:
+        base, flags = _profile_facets(p)
+        base_rows.append(base)
+        flag_rows.append(flags)
+        weights.update(w for w in base['weights'].split(', ') if w)
+
+    df = pd.DataFrame(base_rows, columns=BASE_COLUMNS)
+    for col in ('country_code', 'gender'):
+        df[col] = df[col].astype('category')
+    df['has_data'] = df['has_data'].astype(bool)
+    for col in ('total_events', 'medals', 'gold', 'silver', 'bronze', 'medal_score'):
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int32')
+
+    # Fixed vocabularies always get a column, so filters never miss one
+    columns = ([facet_column('weight', w) for w in sort_weight_classes(weights)] +
+               [facet_column('weight_group', g) for g in WEIGHT_GROUPS] +
+               [facet_column('discipline', d) for d in DISCIPLINES] +
+               [facet_column('age', a) for a in AGE_CATEGORIES] +
+               [facet_column('event_type', e) for e in EVENT_TYPES])
+    flag_columns = pd.DataFrame({col: [col in flags for flags in flag_rows] for col in columns},
+                                index=df.index, dtype=bool)
+    return pd.concat([df, flag_columns], axis=1)
+
+
+def has_facet(facets, facet, value):
+    """Boolean mask of athletes with a facet value (all False if nobody has it)."""
+    col = facet_column(facet, value)
+    if col in facets.columns:
+        return facets[col]
+    return pd.Series(False, index=facets.index)
+
+
+def facet_values(facets, facet):
+    """Values of a facet that at least one athlete in the table has, in column order."""
+    prefix = facet_column(facet, '')
+    return [col[len(prefix):] for col in facets.columns
+            if col.startswith(prefix) and facets[col].any()]
+
+
+if __name__ == "__main__":
+    from profile_store import load_facets
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    facets = load_facets()
+    if facets is None:
+        print("No profile data found")
+        sys.exit(1)
+
+    print(f"Athletes: {len(facets)} ({int(facets['has_data'].sum())} with competition data)")
+    print(f"Gender: {', '.join(f'{g} {n}' for g, n in facets['gender'].value_counts().items())}")
+    for facet in ('weight_group', 'discipline', 'age', 'event_type', 'weight'):
+        print(f"\n{facet}:")
+        for value in facet_values(facets, facet):
+            print(f"  {value:<28} {int(has_facet(facets, facet, value).sum()):>6}")
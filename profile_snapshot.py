@@ -0,0 +1,220 @@
+"""
+Profile Snapshot
+================
+Versioned, memory-mapped profile cache file (Cache/profiles.snap).
+
+Layout (little-endian):
+
+    header   magic b'JJIFSNAP', uint32 version, uint32 record count,
+             uint64 offsets position, uint64 meta position, uint64 meta length
+    records  one UTF-8 JSON document per profile, back to back
+    offsets  uint64[count + 1] - record i is bytes offsets[i]:offsets[i + 1]
+    meta     UTF-8 JSON - stats, search index, profile ids, per-file ranges
+
+The file is opened with mmap, so every process reading it shares the OS
+page cache, and a single profile is decoded by slicing its record - the
+rest of the file is never parsed. A file written with another version
+raises SnapshotVersionError, and a damaged one (offsets outside the file,
+undecodable meta or records) SnapshotError, so callers can rebuild it.
+
+Usage:
+    python profile_snapshot.py            # Show snapshot header and size
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+SNAPSHOT_FILE = BASE_DIR / "Cache" / "profiles.snap"
+
+MAGIC = b'JJIFSNAP'
+SNAPSHOT_VERSION = 1
+
+HEADER = struct.Struct('<8sIIQQQ')
+
+
+class SnapshotError(Exception):
+    """Snapshot file is unreadable."""
+
+
+class SnapshotVersionError(SnapshotError):
+    """Snapshot file was written with a different format version."""
+
+
+def write_snapshot(profiles, meta, snapshot_file=None, files=None):
+    """Write profiles + meta as a snapshot.
+
+    files maps a source file name to its profiles; the records are written
+    in that order and the ranges are stored so one file's profiles can be
+    read back on their own.
+    """
+    snapshot_file = Path(snapshot_file) if snapshot_file else SNAPSHOT_FILE
+    snapshot_file.parent.mkdir(exist_ok=True)
+
+    if files is not None:
+        ordered = [(name, p) for name, file_profiles in files.items() for p in file_profiles]
+    else:
+        ordered = [(None, p) for p in profiles]
+
+    meta = dict(meta)
+    meta['ids'] = {}
+    meta['files'] = {}
+
+    # A private temp file - dashboard workers may rebuild at the same time
+    with tempfile.NamedTemporaryFile(dir=snapshot_file.parent, prefix=f"{snapshot_file.stem}.", suffix='.tmp',
+                                     delete=False) as f:
+        tmp_file = Path(f.name)
+        f.write(b'\0' * HEADER.size)
+
+        offsets = [HEADER.size]
+        for i, (name, p) in enumerate(ordered):
+            f.write(json.dumps(p, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            offsets.append(f.tell())
+
+            if p.get('profile_id'):
+                meta['ids'][str(p['profile_id'])] = i
+            if name is not None:
+                start, _ = meta['files'].get(name, (i, i))
+                meta['files'][name] = (start, i + 1)
+
+        offsets_pos = f.tell()
+        f.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+
+        meta_pos = f.tell()
+        meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        f.write(meta_bytes)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(ordered), offsets_pos, meta_pos, len(meta_bytes)))
+
+    os.chmod(tmp_file, 0o644)
+    os.replace(tmp_file, snapshot_file)
+    return snapshot_file
+
+
+class ProfileSnapshot:
+    """Read-only view over a snapshot file. Profiles are decoded on access."""
+
+    def __init__(self, snapshot_file=None):
+        self.path = Path(snapshot_file) if snapshot_file else SNAPSHOT_FILE
+
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise SnapshotError(f"{self.path.name} is truncated")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._view = self._offsets = None
+        try:
+            self._open(size)
+        except SnapshotError:
+            # Unmap first so the file can be replaced by a rebuild
+            self.close()
+            raise
+
+    def _open(self, size):
+        """Check the header, offsets and meta against the mapped size."""
+        name = self.path.name
+        magic, version, count, offsets_pos, meta_pos, meta_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{name} is not a profile snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotVersionError(f"{name} is version {version}, expected {SNAPSHOT_VERSION}")
+
+        offsets_end = offsets_pos + 8 * (count + 1)
+        if not HEADER.size <= offsets_pos <= offsets_end <= meta_pos <= meta_pos + meta_len <= size:
+            raise SnapshotError(f"{name} is damaged: sections outside the file")
+
+        self.count = count
+        self._records_end = offsets_pos
+        self._view = memoryview(self._mm)
+        self._offsets = self._view[offsets_pos:offsets_end].cast('Q')
+        if self._offsets[0] != HEADER.size or self._offsets[count] != offsets_pos:
+            raise SnapshotError(f"{name} is damaged: record offsets don't match the file")
+
+        try:
+            self.meta = json.loads(self._mm[meta_pos:meta_pos + meta_len].decode('utf-8'))
+        except ValueError as e:
+            raise SnapshotError(f"{name} is damaged: unreadable meta ({e})") from e
+        if not isinstance(self.meta, dict):
+            raise SnapshotError(f"{name} is damaged: meta is not an object")
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.profile(i)
+
+    def __getitem__(self, key):
+        """Meta values by name (country_stats, search_index, ...)."""
+        return self.meta[key]
+
+    def get(self, key, default=None):
+        return self.meta.get(key, default)
+
+    def profile(self, i):
+        """Decode record i (SnapshotError if the record is damaged)."""
+        start, end = self._offsets[i], self._offsets[i + 1]
+        if not HEADER.size <= start <= end <= self._records_end:
+            raise SnapshotError(f"{self.path.name} is damaged: record {i} outside the records")
+        try:
+            return json.loads(self._mm[start:end].decode('utf-8'))
+        except ValueError as e:
+            raise SnapshotError(f"{self.path.name} is damaged: record {i} ({e})") from e
+
+    def profile_by_id(self, profile_id):
+        """Decode one profile by id (None if not present)."""
+        i = self.meta.get('ids', {}).get(str(profile_id))
+        return self.profile(i) if i is not None else None
+
+    def profiles(self):
+        """Decode every profile."""
+        return list(self)
+
+    def file_profiles(self, name):
+        """Decode the profiles that came from one source file."""
+        start, end = self.meta.get('files', {}).get(name, (0, 0))
+        return [self.profile(i) for i in range(start, end)]
+
+    def close(self):
+        if self._offsets is not None:
+            self._offsets.release()
+        if self._view is not None:
+            self._view.release()
+        self._mm.close()
+
+
+def open_snapshot(snapshot_file=None):
+    """Open a snapshot, or None if the file doesn't exist.
+
+    Raises SnapshotVersionError / SnapshotError for old or damaged files.
+    """
+    snapshot_file = Path(snapshot_file) if snapshot_file else SNAPSHOT_FILE
+    if not snapshot_file.exists():
+        return None
+    return ProfileSnapshot(snapshot_file)
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    try:
+        snapshot = open_snapshot()
+    except SnapshotError as e:
+        print(f"Unreadable snapshot: {e}")
+        sys.exit(1)
+
+    if snapshot is None:
+        print(f"No snapshot at {SNAPSHOT_FILE} - run: python data_cache.py --profiles")
+    else:
+        print(f"Snapshot: {snapshot.path}")
+        print(f"Version: {SNAPSHOT_VERSION}")
+        print(f"Size: {snapshot.path.stat().st_size / 1024:.1f} KB")
+        print(f"Profiles: {len(snapshot)}")
+        print(f"Source files: {len(snapshot.get('files', {}))}")
+        print(f"Built: {snapshot.get('timestamp', 'N/A')}")
@@ -0,0 +1,232 @@
+"""
+Profile Store
+=============
+Per-country profile shards built from Results/all_profiles.json.
+
+Each country is written to Results/profiles/{CODE}.json, with a small
+index.json listing the countries, their athlete counts and shard files.
+Readers load only the countries they need instead of decoding every
+athlete in the database. facets.parquet holds the filter facets of every
+profile in shard order (see profile_facets.py).
+
+Usage:
+    python profile_store.py              # Rebuild shards from all_profiles.json
+    python profile_store.py --info       # Show shard index
+"""
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from json_ingest import iter_items
+from profile_facets import build_facets
+
+BASE_DIR = Path(__file__).parent
+RESULTS_DIR = BASE_DIR / "Results"
+PROFILES_JSON = RESULTS_DIR / "all_profiles.json"
+SHARD_DIR = RESULTS_DIR / "profiles"
+SHARD_INDEX = SHARD_DIR / "index.json"
+FACETS_FILE = SHARD_DIR / "facets.parquet"
+
+# Shard key for profiles without a country code
+UNKNOWN_COUNTRY = 'UNK'
+
+
+def _read_profiles_json(json_file):
+    """Return (profiles, scraped_at) from an all_profiles.json file."""
+    header = {}
+    profiles = list(iter_items(json_file, 'profiles', header=header))
+    return profiles, header.get('scraped_at', '')
+
+
+def _write_replace(path, write, mode='w'):
+    """Write a file via a private temp file in its directory and os.replace it into place.
+
+    Dashboard threads read the shards while a rebuild runs - they see the
+    old file or the new one, never a partly written one.
+    """
+    encoding = None if 'b' in mode else 'utf-8'
+    with tempfile.NamedTemporaryFile(mode, encoding=encoding, dir=path.parent, prefix=f"{path.name}.",
+                                     suffix='.tmp', delete=False) as f:
+        tmp_file = Path(f.name)
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            tmp_file.unlink(missing_ok=True)
+            raise
+    os.chmod(tmp_file, 0o644)
+    os.replace(tmp_file, path)
+
+
+def write_profile_shards(profiles, scraped_at='', shard_dir=None):
+    """Split profiles by country and write one shard per country plus the index.
+
+    Shards, facets.parquet and index.json are replaced atomically, index.json last.
+    """
+    shard_dir = Path(shard_dir) if shard_dir else SHARD_DIR
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    by_country = {}
+    for p in profiles:
+        by_country.setdefault(p.get('country_code') or UNKNOWN_COUNTRY, []).append(p)
+
+    index = {
+        'scraped_at': scraped_at,
+        'total': len(profiles),
+        'countries': {}
+    }
+
+    ordered = []
+    codes = []
+    for code in sorted(by_country):
+        country_profiles = by_country[code]
+        ordered.extend(country_profiles)
+        codes.extend([code] * len(country_profiles))
+        shard_file = f"{code}.json"
+        shard = {'country_code': code, 'profiles': country_profiles}
+        _write_replace(shard_dir / shard_file, lambda f, shard=shard: json.dump(shard, f, ensure_ascii=False))
+
+        index['countries'][code] = {
+            'file': shard_file,
+            'country': country_profiles[-1].get('country') or code,
+            'count': len(country_profiles),
+            'with_data': sum(1 for p in country_profiles if p.get('categories'))
+        }
+
+    # Facet rows follow the shard order: country by country, profiles as stored
+    facets = build_facets(ordered)
+    facets['country_code'] = pd.Categorical(codes)
+    _write_replace(shard_dir / FACETS_FILE.name, lambda f: facets.to_parquet(f, index=False), mode='wb')
+
+    # Index is written last - readers treat it as the commit point
+    _write_replace(shard_dir / SHARD_INDEX.name, lambda f: json.dump(index, f, indent=2, ensure_ascii=False))
+
+    # Drop shards for countries that are no longer present - only once the index stops listing them
+    for old_file in shard_dir.glob("*.json"):
+        if old_file.name != SHARD_INDEX.name and old_file.stem not in by_country:
+            old_file.unlink(missing_ok=True)
+
+    return index
+
+
+def rebuild_profile_shards(json_file=None, shard_dir=None):
+    """Rebuild the shards from an existing all_profiles.json."""
+    json_file = Path(json_file) if json_file else PROFILES_JSON
+    if not json_file.exists():
+        return None
+
+    profiles, scraped_at = _read_profiles_json(json_file)
+    return write_profile_shards(profiles, scraped_at, shard_dir)
+
+
+def shards_are_stale():
+    """True if the shard index or facets are missing, or older than all_profiles.json."""
+    if not SHARD_INDEX.exists() or not FACETS_FILE.exists():
+        return PROFILES_JSON.exists()
+    if PROFILES_JSON.exists():
+        return PROFILES_JSON.stat().st_mtime > SHARD_INDEX.stat().st_mtime
+    return False
+
+
+def load_profile_index():
+    """Load the shard index, rebuilding the shards first if they are stale.
+
+    Returns None when no profile data exists.
+    """
+    if shards_are_stale():
+        try:
+            rebuild_profile_shards()
+        except Exception as e:
+            print(f"  Could not rebuild profile shards: {e}")
+
+    if not SHARD_INDEX.exists():
+        return None
+
+    with open(SHARD_INDEX, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_shard(code, index=None):
+    """Load the profiles of a single country ([] if it has no shard)."""
+    index = index if index is not None else load_profile_index()
+    if not index:
+        return []
+
+    entry = index['countries'].get(code)
+    if not entry:
+        return []
+
+    with open(SHARD_DIR / entry['file'], 'r', encoding='utf-8') as f:
+        return json.load(f).get('profiles', [])
+
+
+def load_profiles(countries=None, exclude=None):
+    """Load profiles for the given country codes, reading only their shards.
+
+    countries=None loads every country; exclude skips the listed codes.
+    """
+    index = load_profile_index()
+    if not index:
+        return []
+
+    codes = list(countries) if countries is not None else sorted(index['countries'])
+    skip = set(exclude or [])
+
+    profiles = []
+    for code in codes:
+        if code not in skip:
+            profiles.extend(load_shard(code, index))
+    return profiles
+
+
+def load_facets(countries=None, exclude=None):
+    """Facet table for the same countries as load_profiles(countries, exclude).
+
+    Rows are in the same order as the profiles load_profiles() returns, so
+    a boolean mask over the table selects from that list directly.
+    """
+    index = load_profile_index()
+    if not index or not FACETS_FILE.exists():
+        return None
+
+    facets = pd.read_parquet(FACETS_FILE)
+    if countries is None and not exclude:
+        return facets
+
+    codes = list(countries) if countries is not None else sorted(index['countries'])
+    skip = set(exclude or [])
+    parts = [facets[facets['country_code'] == code] for code in codes if code not in skip]
+    if not parts:
+        return facets.iloc[0:0]
+    return pd.concat(parts, ignore_index=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Build per-country profile shards')
+    parser.add_argument('--info', action='store_true', help='Show shard index')
+    args = parser.parse_args()
+
+    if args.info:
+        index = load_profile_index()
+        if index is None:
+            print("No profile data found")
+        else:
+            print(f"Shards: {SHARD_DIR}")
+            print(f"Profiles: {index['total']} in {len(index['countries'])} countries")
+            for code, entry in index['countries'].items():
+                size = (SHARD_DIR / entry['file']).stat().st_size / 1024
+                print(f"  {code:<5} {entry['count']:>5} athletes  {size:>8.1f} KB")
+    else:
+        index = rebuild_profile_shards()
+        if index:
+            print(f"Wrote {len(index['countries'])} shards ({index['total']} profiles) to: {SHARD_DIR}")
+        else:
+            print(f"No {PROFILES_JSON.name} found")
@@ -2,6 +2,13 @@
 Robust Bracket Scraper
 ======================
 Fixed version that properly handles CAPTCHA and extracts categories.
+
+Runs on the asyncio engine (scrape_engine.py); --sync uses the original
+one-page Playwright loop. With --http the bracket pages are fetched over
+HTTP with the browser's cookies once the CAPTCHA is solved
+(bracket_http.py), and only pages that hit a CAPTCHA load in the browser.
+Images, fonts, CSS and third-party requests are blocked (RequestProfile in
+scrape_common.py) unless --no-block is given.
 """
 import sys
 import os
@@ -17,13 +24,23 @@ from datetime import datetime
 from pathlib import Path
 from playwright.sync_api import sync_playwright
 
+import scrape_engine
+from bracket_http import session_from_context, fetch_all
+from json_ingest import count_items
+from scrape_common import (BASE_URL, BracketWorker, TokenBucket, bracket_url, save_bracket, fetch_pages,
+                           wait_ready, RequestProfile, format_blocked,
+                           BRACKET_SELECTOR, CATEGORY_SELECTOR, EVENT_SELECTOR,
+                           DEFAULT_PAGES, DEFAULT_RATE)
+
 BASE_DIR = Path(__file__).parent
 RESULTS_DIR = BASE_DIR / "Results"
 BRACKETS_DIR = BASE_DIR / "Brackets"
 RESULTS_DIR.mkdir(exist_ok=True)
 BRACKETS_DIR.mkdir(exist_ok=True)
 
-BASE_URL = "https://www.sportdata.org/ju-jitsu/set-online"
+# Anything wait_for_captcha accepts as loaded content
+CONTENT_SELECTOR = f"{EVENT_SELECTOR}, .bracket, .draw, .outline_draw"
+
 
 
 def wait_for_captcha(page, timeout=600, target_url=None):
@@ -69,9 +86,8 @@ def wait_for_captcha(page, timeout=600, target_url=None):
         # CAPTCHA was solved - need to navigate back to target URL
         if captcha_was_detected and target_url:
             print(f"  CAPTCHA solved! Re-navigating to target URL...", flush=True)
-            time.sleep(2)  # Brief pause
             page.goto(target_url, wait_until='domcontentloaded')
-            page.wait_for_timeout(3000)
+            wait_ready(page, CONTENT_SELECTOR, 3000)
             captcha_was_detected = False  # Reset so we don't loop forever
             continue
 
@@ -102,8 +118,8 @@ def wait_for_captcha(page, timeout=600, target_url=None):
                 continue
             raise
 
-        # Wait a bit more for AJAX
-        time.sleep(1)
+        # Wait a bit more for AJAX - returns as soon as the content shows up
+        wait_ready(page, CONTENT_SELECTOR, 1000)
 
     print("  Timeout waiting for content", flush=True)
     return False
@@ -116,7 +132,7 @@ def get_categories(page, verid):
     print(f"\nStep 1: Loading event page: {event_url}", flush=True)
 
     page.goto(event_url, wait_until='domcontentloaded')
-    page.wait_for_timeout(2000)
+    wait_ready(page, EVENT_SELECTOR)
 
     # Wait for CAPTCHA to be solved - after solving, navigate to catauslist
     cat_url = f"{BASE_URL}/veranstaltung_info_main.php?active_menu=calendar&vernr={verid}&ver_info_action=catauslist#a_eventheadend"
@@ -138,7 +154,7 @@ def get_categories(page, verid):
         for attempt in range(3):
             print(f"  Navigation attempt {attempt + 1}/3...")
             page.goto(cat_url, wait_until='domcontentloaded')
-            page.wait_for_timeout(4000)
+            wait_ready(page, CATEGORY_SELECTOR, 4000)
 
             # Check if CAPTCHA appeared again
             content = page.content()
@@ -218,13 +234,20 @@ def get_categories(page, verid):
     return categories
 
 
-def scrape_bracket(page, verid, catid, cat_name):
-    """Scrape a single bracket."""
-    url = f"{BASE_URL}/popup_mitschrift_main.php?popup_action=mitschriftcatxml&catid={catid}&verid={verid}"
+def scrape_bracket(page, verid, catid, cat_name, worker=None, loaded=False):
+    """Scrape a single bracket.
+
+    With a BracketWorker the competitors are parsed in the background and
+    filled into the returned dict when the worker collects them.
+    loaded=True means page already shows the bracket (fetch_pages).
+    """
+    url = bracket_url(verid, catid)
 
     try:
-        page.goto(url, wait_until='domcontentloaded', timeout=30000)
-        page.wait_for_timeout(2000)
+        if not loaded:
+            page.goto(url, wait_until='domcontentloaded', timeout=30000)
+        # Rounds in the DOM (or a fully loaded page without any) - no fixed wait
+        wait_ready(page, BRACKET_SELECTOR, until_load=True)
 
         # Check for CAPTCHA
         content = page.content()
@@ -234,46 +257,24 @@ def scrape_bracket(page, verid, catid, cat_name):
                 return None
             content = page.content()
 
-        # Save bracket HTML
-        html_file = BRACKETS_DIR / f"bracket_{verid}_{catid}.html"
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(content)
-
-        # Extract competitor data
-        competitors = page.evaluate('''() => {
-            const comps = [];
-
-            // Look for competitor names in bracket cells
-            const cells = document.querySelectorAll('td[class*="name"], .competitor, .athlete-name, td');
-            cells.forEach(cell => {
-                const text = cell.textContent.trim();
-                // Look for patterns like "Name (COUNTRY)"
-                const match = text.match(/^([^(]+)\s*\(([A-Z]{3})\)/);
-                if (match) {
-                    comps.push({
-                        name: match[1].trim(),
-                        country: match[2]
-                    });
-                }
-            });
-
-            return [...new Map(comps.map(c => [c.name, c])).values()];
-        }''')
-
-        return {
-            'catid': catid,
-            'category': cat_name,
-            'html_saved': str(html_file),
-            'competitors': competitors
-        }
+        # Save bracket HTML; competitors come from the shared parser, off the browser's thread
+        return save_bracket(verid, catid, cat_name, content, worker)
 
     except Exception as e:
         print(f" [Error: {e}]", end="", flush=True)
         return None
 
 
-def scrape_event(verid, skip_existing=True):
-    """Scrape all brackets for an event."""
+def scrape_event(verid, skip_existing=True, pages=1, rate=DEFAULT_RATE, http=False, block=True):
+    """Scrape all brackets for an event.
+
+    pages > 1 fetches that many categories at once in the same browser
+    context, at most rate requests per second. http=True fetches them over
+    HTTP with the context's cookies instead, `pages` at a time, and uses
+    the browser only for pages that come back as a CAPTCHA. block=False
+    turns off the RequestProfile that aborts images, CSS and third-party
+    requests.
+    """
     print("\n" + "=" * 70)
     print(f"SCRAPING EVENT: verid={verid}")
     print("=" * 70)
@@ -302,7 +303,11 @@ def scrape_event(verid, skip_existing=True):
             viewport={'width': 1400, 'height': 900},
             no_viewport=True  # Use full window size
         )
+        profile = RequestProfile() if block else None
+        if profile is not None:
+            context.route('**/*', profile.route)
         page = context.new_page()
+        worker = BracketWorker()
 
         try:
             # Get categories
@@ -316,56 +321,115 @@ def scrape_event(verid, skip_existing=True):
             print(f"\nWill scrape {len(categories)} categories")
             print("-" * 50)
 
-            # Scrape each category
-            for i, cat in enumerate(categories, 1):
-                catid = cat['catid']
+            def scrape_category(page, item, loaded=False, content=None):
+                i, cat = item
                 name = cat['name'][:40] + "..." if len(cat['name']) > 40 else cat['name']
 
                 print(f"[{i}/{len(categories)}] {name}", end=" ", flush=True)
 
-                result = scrape_bracket(page, verid, catid, cat['name'])
+                if content is not None:
+                    # Fetched over HTTP
+                    result = save_bracket(verid, cat['catid'], cat['name'], content, worker)
+                else:
+                    result = scrape_bracket(page, verid, cat['catid'], cat['name'], worker, loaded)
 
                 if result:
                     results['categories'].append(result)
-                    n_comps = len(result.get('competitors', []))
-                    print(f" OK ({n_comps} competitors)")
+                    print(" OK")
                 else:
                     print(" FAILED")
 
-                # Rate limit
-                page.wait_for_timeout(500)
-
                 # Save progress periodically
                 if i % 20 == 0:
+                    worker.collect()
                     progress_file = RESULTS_DIR / f"brackets_{verid}_progress.json"
                     with open(progress_file, 'w', encoding='utf-8') as f:
                         json.dump(results, f, indent=2, ensure_ascii=False)
                     print(f"  [Progress saved: {len(results['categories'])} categories]")
 
+            items = list(enumerate(categories, 1))
+            if http:
+                # The page passed the CAPTCHA - the session carries its cookies
+                print(f"Fetching over HTTP, {pages} at a time, max {rate:g} requests/sec")
+                with session_from_context(context, page, pages) as session:
+                    urls = [bracket_url(verid, cat['catid']) for _, cat in items]
+                    for item, content in zip(items, fetch_all(session, urls, TokenBucket(rate))):
+                        scrape_category(page, item, content=content)
+                        if content is None:
+                            # Loaded in the browser - pass on the cookies of a solved CAPTCHA
+                            session.set_cookies(context.cookies())
+                    print(f"HTTP: {session.stats()}")
+            elif pages > 1:
+                # Several categories load at once; the token bucket spaces out the requests
+                print(f"Fetching {pages} pages at a time, max {rate:g} requests/sec")
+                fetch_pages(context, items, lambda item: bracket_url(verid, item[1]['catid']),
+                            scrape_category, pages, TokenBucket(rate))
+            else:
+                limiter = TokenBucket(rate)
+                for item in items:
+                    # Rate limit - only waits when pages come back faster than --rate
+                    limiter.acquire()
+                    scrape_category(page, item)
+
         except Exception as e:
             print(f"\nError: {e}")
             import traceback
             traceback.print_exc()
 
         finally:
+            if profile is not None:
+                results['blocked_requests'] = profile.report()
+                print(format_blocked(results['blocked_requests']))
             context.close()
             browser.close()
+            # Competitors of the last pages are still being parsed
+            worker.close()
+
+    save_results(results)
+    return results
 
-    # Save final results
-    if results['categories']:
-        output_file = RESULTS_DIR / f"brackets_{verid}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
 
-        print(f"\n{'=' * 50}")
-        print(f"COMPLETED: {output_file.name}")
-        print(f"Categories scraped: {len(results['categories'])}")
+def save_results(results):
+    """Save an event's scrape results to Results/brackets_{verid}_{timestamp}.json."""
+    if not results or not results['categories']:
+        return None
 
-        # Count competitors
-        total_comps = sum(len(c.get('competitors', [])) for c in results['categories'])
-        print(f"Total competitors: {total_comps}")
+    verid = results['verid']
+    output_file = RESULTS_DIR / f"brackets_{verid}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
 
-    return results
+    print(f"\n{'=' * 50}")
+    print(f"COMPLETED: {output_file.name}")
+    print(f"Categories scraped: {len(results['categories'])}")
+
+    # Count competitors
+    total_comps = sum(len(c.get('competitors', [])) for c in results['categories'])
+    print(f"Total competitors: {total_comps}")
+    return output_file
+
+
+def scrape_events_async(verids, skip_existing=True, pages=1, rate=DEFAULT_RATE, events=1, http=False,
+                        block=True):
+    """Scrape events on the asyncio engine, `events` at a time, saving each as it finishes.
+
+    An event that fails part-way is saved with the categories scraped before the error.
+    """
+    if skip_existing:
+        done = [v for v in verids if list(RESULTS_DIR.glob(f"brackets_{v}_*.json"))]
+        for verid in done:
+            print(f"Already scraped: verid={verid} (use --force to re-scrape)")
+        verids = [v for v in verids if v not in done]
+    if not verids:
+        return []
+
+    print("=" * 70)
+    print(f"SCRAPING {len(verids)} EVENT(S): {', '.join(verids)}")
+    print(f"{pages} page(s), {events} event(s) at a time, max {rate:g} requests/sec")
+    print("=" * 70)
+    print(">>> LOOK FOR THE CHROMIUM BROWSER WINDOW <<<", flush=True)
+    return scrape_engine.scrape_events(verids, pages=pages, rate=rate, events=events, on_event=save_results,
+                                       http=http, block=block)
 
 
 def load_mappings():
@@ -394,10 +458,9 @@ def list_events():
         if existing:
             # Check if it has actual data
             try:
-                with open(existing[0], 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    n_cats = len(data.get('categories', []))
-                    scraped.append((verid, name, n_cats))
+                # Count categories without decoding the whole file
+                n_cats = count_items(existing[0], 'categories')
+                scraped.append((verid, name, n_cats))
             except:
                 scraped.append((verid, name, 0))
         else:
@@ -424,6 +487,17 @@ def main():
     parser.add_argument('--scrape', metavar='VERID', help='Scrape specific event')
     parser.add_argument('--scrape-all', action='store_true', help='Scrape all unmapped events')
     parser.add_argument('--force', action='store_true', help='Re-scrape even if data exists')
+    parser.add_argument('--pages', type=int, nargs='?', const=DEFAULT_PAGES, default=1,
+                        help=f'Fetch categories on several pages at once (default {DEFAULT_PAGES} when given)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help='Max bracket requests per second with --pages')
+    parser.add_argument('--events', type=int, default=1, help='Events scraped at once (--scrape-all)')
+    parser.add_argument('--sync', action='store_true',
+                        help='Use the original one-page sync loop instead of the asyncio engine')
+    parser.add_argument('--http', action='store_true',
+                        help='Fetch bracket pages over HTTP with the browser cookies (browser only on CAPTCHA)')
+    parser.add_argument('--no-block', action='store_true',
+                        help='Load every resource (images, CSS, third-party) - e.g. if a CAPTCHA does not render')
 
     args = parser.parse_args()
 
@@ -433,8 +507,13 @@ def main():
             print(f"\nTo scrape an event: python robust_bracket_scraper.py --scrape VERID")
             print(f"To scrape all: python robust_bracket_scraper.py --scrape-all")
 
+    elif args.scrape and not args.sync:
+        scrape_events_async([args.scrape], skip_existing=not args.force, pages=args.pages, rate=args.rate,
+                            http=args.http, block=not args.no_block)
+
     elif args.scrape:
-        scrape_event(args.scrape, skip_existing=not args.force)
+        scrape_event(args.scrape, skip_existing=not args.force, pages=args.pages, rate=args.rate, http=args.http,
+                     block=not args.no_block)
 
     elif args.scrape_all:
         not_scraped = list_events()
@@ -445,11 +524,18 @@ def main():
         print(f"\nWill scrape {len(not_scraped)} events")
         input("Press ENTER to start...")
 
+        if not args.sync:
+            scrape_events_async([verid for verid, _ in not_scraped], skip_existing=not args.force,
+                                pages=args.pages, rate=args.rate, events=args.events, http=args.http,
+                                block=not args.no_block)
+            return
+
         for verid, name in not_scraped:
             print(f"\n{'#' * 70}")
             print(f"# {name[:60]}")
             print(f"{'#' * 70}")
-            scrape_event(verid, skip_existing=not args.force)
+            scrape_event(verid, skip_existing=not args.force, pages=args.pages, rate=args.rate, http=args.http,
+                         block=not args.no_block)
             time.sleep(2)
 
     else:
@@ -459,6 +545,11 @@ def main():
         print("  --scrape VERID  Scrape specific event")
         print("  --scrape-all    Scrape all unscraped events")
         print("  --force         Re-scrape even if data exists")
+        print("  --pages [N]     Fetch N categories at once (with --rate requests/sec)")
+        print("  --events N      Scrape N events at once (--scrape-all)")
+        print("  --sync          Original one-page loop instead of the asyncio engine")
+        print("  --http          Brackets over HTTP with the browser cookies, browser only on CAPTCHA")
+        print("  --no-block      Load images, CSS and third-party requests too")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,470 @@
+"""
+Scrape Common
+=============
+Shared pieces of the bracket scrapers (robust_bracket_scraper.py and
+batch_asian_scraper.py).
+
+Competitor records come from the offline parser (parse_bracket_html.py),
+not from a regex over the page's td cells in the browser: the scraper
+saves the captured HTML and hands it to a BracketWorker, which parses it
+in a background process while the browser moves on to the next category.
+Both scrapers - and a later parse of Brackets/ - therefore see the same
+names, with the federation text split off:
+
+    {"name": "KULIYEVA LEYLA", "country": "TKM", "federation": "TURKMENISTAN NATIONAL ..."}
+
+With --pages N the scrapers fetch categories concurrently: fetch_pages()
+opens N pages in the browser context that cleared the CAPTCHA, starts a
+navigation on each free page and handles the pages in order as they
+load. A TokenBucket shared by all pages caps the request rate (--rate,
+requests per second) so sportdata.org sees a steady, polite load.
+
+Pages are read as soon as they are ready rather than after a fixed
+sleep: wait_ready() returns once the page's marker element (bracket
+rounds, category links) is in the DOM, with the old sleep as the
+timeout. The rate limit, not a sleep, spaces the requests.
+
+A RequestProfile on the browser context aborts what the scrapers never
+read: images, fonts, stylesheets, media and anything from a third-party
+host. Documents, scripts and XHR from sportdata.org go through, and
+CAPTCHA hosts (reCAPTCHA, gstatic, hCaptcha, Cloudflare) and first-party
+challenge paths (/cdn-cgi/..., CAPTCHA images) are allowed in full so the
+challenge still renders. The profile counts what it blocked
+per event, with an estimate of the bytes saved.
+
+Usage:
+    python scrape_common.py Brackets/bracket_127_4942.html           # Print a bracket's competitors
+    python scrape_common.py --refresh Results/brackets_127_*.json    # Redo competitors from the saved HTML
+"""
+import os
+import sys
+import json
+import time
+import threading
+import multiprocessing
+from collections import deque, Counter
+from pathlib import Path
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor
+
+BASE_DIR = Path(__file__).parent
+BRACKETS_DIR = BASE_DIR / "Brackets"
+
+# SPORTDATA_BASE_URL points the scrapers elsewhere, e.g. at bracket_http.py's stub server
+BASE_URL = os.environ.get('SPORTDATA_BASE_URL', "https://www.sportdata.org/ju-jitsu/set-online").rstrip('/')
+
+# lxml is several times faster with identical output; the parser falls back to bs4 without it
+DEFAULT_BACKEND = 'lxml'
+
+
+def bracket_competitors(bracket_data):
+    """Competitors of a parsed bracket in first-seen order, one record per name."""
+    competitors = {}
+    for match in bracket_data.get('matches', []):
+        for corner in (match.get('red_corner'), match.get('blue_corner')):
+            if corner and corner.get('name') and corner['name'] not in competitors:
+                competitors[corner['name']] = {
+                    'name': corner['name'],
+                    'country': corner.get('country', ''),
+                    'federation': corner.get('federation', '')
+                }
+    return list(competitors.values())
+
+
+def extract_bracket(html_content, backend=None):
+    """Competitors and match count of one bracket page (runs in the worker process)."""
+    from parse_bracket_html import parse_bracket_html
+
+    bracket_data = parse_bracket_html(html_content, backend=backend or DEFAULT_BACKEND)
+    return {
+        'competitors': bracket_competitors(bracket_data),
+        'matches': len(bracket_data['matches'])
+    }
+
+
+class BracketWorker:
+    """Parses captured bracket pages in a background process.
+
+    submit() queues a page and returns at once; the category result dict
+    gets its 'competitors' when collect() sees the parse finish. A page
+    that fails to parse gets empty competitors and a 'parse_error'.
+    """
+
+    def __init__(self, jobs=1, backend=None):
+        self.backend = backend or DEFAULT_BACKEND
+        # spawn - never fork a process that is driving a browser
+        self.pool = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn'))
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def submit(self, result, html_content):
+        """Queue html_content; its competitors are written into result."""
+        result['competitors'] = []
+        future = self.pool.submit(extract_bracket, html_content, self.backend)
+        with self.lock:
+            self.pending.append((result, future))
+
+    def collect(self, wait=False):
+        """Fill in finished results (all of them with wait=True); returns how many were filled.
+
+        Safe to call from another thread while pages are being submitted
+        (the async engine waits in an executor).
+        """
+        with self.lock:
+            pending, self.pending = self.pending, []
+        still_pending = []
+        filled = 0
+        for result, future in pending:
+            if not wait and not future.done():
+                still_pending.append((result, future))
+                continue
+            try:
+                extracted = future.result()
+                result['competitors'] = extracted['competitors']
+                result['matches'] = extracted['matches']
+            except Exception as e:
+                result['parse_error'] = str(e)
+            filled += 1
+        with self.lock:
+            self.pending = still_pending + self.pending
+        return filled
+
+    def close(self):
+        """Wait for the queued pages, fill in their results and stop the worker."""
+        self.collect(wait=True)
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def bracket_url(verid, catid, base_url=None):
+    """URL of a category's bracket page."""
+    return f"{base_url or BASE_URL}/popup_mitschrift_main.php?popup_action=mitschriftcatxml&catid={catid}&verid={verid}"
+
+
+def event_url(verid):
+    """URL of an event's info page."""
+    return f"{BASE_URL}/veranstaltung_info_main.php?active_menu=calendar&vernr={verid}#a_eventhead"
+
+
+def category_list_url(verid):
+    """URL of an event's category list."""
+    return f"{BASE_URL}/veranstaltung_info_main.php?active_menu=calendar&vernr={verid}&ver_info_action=catauslist#a_eventheadend"
+
+
+# Page markers: the CAPTCHA interstitial, and the elements that mean a page is ready
+CAPTCHA_MARKER = 'verify you are'
+BRACKET_SELECTOR = '.tournament-bracket__round'
+CATEGORY_SELECTOR = 'a[href*="catid="]'
+# Event pages link to categories or other events
+EVENT_SELECTOR = 'a[href*="catid="], a[href*="vernr="]'
+
+# Longest wait for a ready marker - the old fixed wait after domcontentloaded
+READY_TIMEOUT_MS = 2000
+
+# True once the selector is in the DOM - or, with untilLoad, once the page
+# has fully loaded without it (a category with no draw has no rounds)
+READY_JS = """([selector, untilLoad]) =>
+    !!document.querySelector(selector) || (untilLoad && document.readyState === 'complete')"""
+
+
+def is_captcha_page(content):
+    """True if the HTML is sportdata's CAPTCHA page."""
+    return CAPTCHA_MARKER in content.lower()
+
+
+def wait_ready(page, selector, timeout_ms=READY_TIMEOUT_MS, until_load=False):
+    """Wait until selector is on a (sync Playwright) page, at most timeout_ms.
+
+    Returns as soon as the marker is there instead of sleeping a fixed
+    time. until_load=True also stops once the page has loaded without it.
+    Returns True if the selector is present.
+    """
+    try:
+        page.wait_for_function(READY_JS, arg=[selector, until_load], timeout=timeout_ms)
+        return page.query_selector(selector) is not None
+    except Exception:
+        # Timed out, or the page navigated away mid-wait
+        return False
+
+
+def save_bracket(verid, catid, cat_name, content, worker=None):
+    """Save a fetched bracket page to Brackets/ and return its category result.
+
+    Competitors come from the shared parser - queued on worker, or parsed
+    here without one.
+    """
+    html_file = BRACKETS_DIR / f"bracket_{verid}_{catid}.html"
+    with open(html_file, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+    result = {
+        'catid': catid,
+        'category': cat_name,
+        'html_saved': str(html_file)
+    }
+    if worker is not None:
+        worker.submit(result, content)
+    else:
+        result.update(extract_bracket(content))
+    return result
+
+
+# Concurrent fetching: pages open at once, and requests per second across all of them
+DEFAULT_PAGES = 4
+DEFAULT_RATE = 1.0
+
+
+class TokenBucket:
+    """Request rate limiter shared by all pages.
+
+    Tokens refill at rate per second up to burst; acquire() takes one,
+    sleeping until it is available.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token now; returns the seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self):
+        """Block until a request may be made; returns the seconds waited."""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+def fetch_pages(context, items, url_for, handle, pages=DEFAULT_PAGES, limiter=None,
+                settle_ms=0, timeout_ms=30000):
+    """Load url_for(item) for every item on a pool of pages in one browser context.
+
+    Navigations on all free pages run at once; handle(page, item, loaded)
+    is called for each item in order once its page is at the URL and
+    settle_ms have passed since the navigation started. loaded is False if
+    the page didn't get there within timeout_ms (e.g. a CAPTCHA page) -
+    handle can retry on that page. The pages are closed afterwards.
+    """
+    limiter = limiter or TokenBucket()
+    pool = [context.new_page() for _ in range(max(1, pages))]
+    free = list(pool)
+    in_flight = deque()
+    todo = iter(items)
+    exhausted = False
+
+    try:
+        while True:
+            # Start a navigation on every free page
+            while free and not exhausted:
+                item = next(todo, todo)
+                if item is todo:
+                    exhausted = True
+                    break
+                limiter.acquire()
+                page = free.pop()
+                url = url_for(item)
+                # Fire-and-forget: the navigation runs while the other pages are handled
+                page.evaluate("url => { setTimeout(() => window.location.assign(url), 0); }", url)
+                in_flight.append((page, item, url, time.monotonic()))
+
+            if not in_flight:
+                break
+
+            page, item, url, started = in_flight.popleft()
+            target = url.split('#')[0]
+            try:
+                page.wait_for_url(lambda u: u.split('#')[0] == target,
+                                  wait_until='domcontentloaded', timeout=timeout_ms)
+                remaining = settle_ms - (time.monotonic() - started) * 1000
+                if remaining > 0:
+                    page.wait_for_timeout(remaining)
+                loaded = True
+            except Exception:
+                loaded = False
+
+            handle(page, item, loaded)
+            free.append(page)
+    finally:
+        for page in pool:
+            try:
+                page.close()
+            except Exception:
+                pass
+
+
+# Request profile: the resource types the scrapers need from sportdata.org
+ALLOWED_RESOURCE_TYPES = {'document', 'script', 'xhr', 'fetch'}
+# Allowed in full so the CAPTCHA renders and can be solved
+CAPTCHA_HOSTS = ('google.com', 'gstatic.com', 'recaptcha.net', 'hcaptcha.com', 'challenges.cloudflare.com')
+# First-party challenge paths (Cloudflare's /cdn-cgi/challenge-platform/..., CAPTCHA images) - any resource type
+CHALLENGE_PATHS = ('/cdn-cgi/',)
+CHALLENGE_MARKER = 'captcha'
+# Typical size of a blocked request by type (KB) - blocked requests are never downloaded, so bytes saved is an estimate
+BLOCKED_KB = {'image': 25, 'font': 40, 'stylesheet': 15, 'media': 250, 'script': 40}
+BLOCKED_KB_OTHER = 5
+
+
+def _host_in(host, domains):
+    return any(host == d or host.endswith('.' + d) for d in domains)
+
+
+class RequestProfile:
+    """Aborts the browser requests the scrapers don't need and counts them.
+
+    Install on a context with context.route('**/*', profile.route) - or
+    profile.route_async on the async API. Counts are kept per label: the
+    event a page is working on (assign()), or None for a one-event context.
+    """
+
+    def __init__(self, base_url=None):
+        host = urlparse(base_url or BASE_URL).hostname or ''
+        # sportdata.org and its subdomains (www., static., ...)
+        self.first_party = host[4:] if host.startswith('www.') else host
+        self.lock = threading.Lock()
+        self.labels = {}
+        self.blocked = {}
+
+    def allows(self, url, resource_type):
+        parsed = urlparse(url)
+        host = parsed.hostname or ''
+        if _host_in(host, CAPTCHA_HOSTS):
+            return True
+        if url.startswith(('data:', 'blob:')):
+            return True
+        if not _host_in(host, (self.first_party,)):
+            return False
+        path = parsed.path.lower()
+        if path.startswith(CHALLENGE_PATHS) or CHALLENGE_MARKER in path:
+            return True
+        return resource_type in ALLOWED_RESOURCE_TYPES
+
+    def assign(self, page, label):
+        """Count page's blocked requests under label from now on (until the page closes)."""
+        with self.lock:
+            if page not in self.labels:
+                page.on('close', self._forget)
+            self.labels[page] = label
+
+    def _forget(self, page):
+        with self.lock:
+            self.labels.pop(page, None)
+
+    def _label(self, request):
+        try:
+            return self.labels.get(request.frame.page)
+        except Exception:
+            # Service worker requests have no frame
+            return None
+
+    def _check(self, request):
+        """True to let request through; counts it if blocked."""
+        if self.allows(request.url, request.resource_type):
+            return True
+        label = self._label(request)
+        host = urlparse(request.url).hostname or ''
+        kind = request.resource_type if _host_in(host, (self.first_party,)) else 'third-party'
+        with self.lock:
+            self.blocked.setdefault(label, Counter())[(kind, request.resource_type)] += 1
+        return False
+
+    def route(self, route):
+        """Route handler for the sync API."""
+        if self._check(route.request):
+            route.continue_()
+        else:
+            route.abort()
+
+    async def route_async(self, route):
+        """Route handler for the async API."""
+        if self._check(route.request):
+            await route.continue_()
+        else:
+            await route.abort()
+
+    def report(self, label=None):
+        """Blocked requests under label since the last report: count, estimated KB saved, count per kind."""
+        with self.lock:
+            counts = self.blocked.pop(label, Counter())
+        by_kind = Counter()
+        kb = 0
+        for (kind, resource_type), n in counts.items():
+            by_kind[kind] += n
+            kb += n * BLOCKED_KB.get(resource_type, BLOCKED_KB_OTHER)
+        return {'requests': sum(counts.values()), 'kb_saved_est': kb, 'by_kind': dict(by_kind)}
+
+
+def format_blocked(report):
+    """One line for a RequestProfile report."""
+    kinds = ', '.join(f"{n} {kind}" for kind, n in sorted(report['by_kind'].items(), key=lambda x: -x[1]))
+    return f"Blocked {report['requests']} requests (~{report['kb_saved_est'] / 1024:.1f} MB saved){': ' + kinds if kinds else ''}"
+
+
+def saved_bracket_file(html_saved):
+    """Local path of a result's html_saved (scrape results may hold Windows paths)."""
+    return BRACKETS_DIR / Path(str(html_saved).replace('\\', '/')).name
+
+
+def refresh_results(results_file, backend=None):
+    """Recompute the competitors of a brackets_{verid}_*.json from the saved HTML; returns categories updated."""
+    results_file = Path(results_file)
+    with open(results_file, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+
+    updated = 0
+    for category in results.get('categories', []):
+        html_file = saved_bracket_file(category.get('html_saved', ''))
+        if not html_file.exists():
+            continue
+        extracted = extract_bracket(html_file.read_text(encoding='utf-8'), backend)
+        category['competitors'] = extracted['competitors']
+        category['matches'] = extracted['matches']
+        category.pop('parse_error', None)
+        updated += 1
+
+    if updated:
+        with open(results_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return updated
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Competitor extraction shared by the bracket scrapers')
+    parser.add_argument('files', nargs='+', help='Bracket HTML files (or scrape results with --refresh)')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Recompute competitors in brackets_*.json results from Brackets/')
+    parser.add_argument('--backend', choices=['bs4', 'lxml'], default=DEFAULT_BACKEND, help='Parser backend')
+    args = parser.parse_args()
+
+    for name in args.files:
+        path = Path(name)
+        if not path.exists():
+            print(f"Not found: {path}")
+            continue
+
+        if args.refresh:
+            print(f"{path.name}: {refresh_results(path, args.backend)} categories updated")
+            continue
+
+        extracted = extract_bracket(path.read_text(encoding='utf-8'), args.backend)
+        print(f"{path.name}: {len(extracted['competitors'])} competitors, {extracted['matches']} matches")
+        for c in extracted['competitors']:
+            print(f"  {c['name']:<35} {c['country']:<4} {c['federation']}")
@@ -0,0 +1,447 @@
+"""
+Scrape Engine
+=============
+Asyncio bracket scraping on the async Playwright API.
+
+One browser context is shared by every task. Events and their
+categories are scheduled as asyncio tasks: up to `events` events at once,
+and up to `pages` bracket pages loading at once across all of them (a
+pool of pages in the context). Every navigation takes a token from the
+shared TokenBucket (scrape_common.py), so the request rate stays at
+`rate` per second however many tasks are running.
+
+Waits are event-driven instead of one-second sleep polls:
+
+- a page is ready when its bracket rounds / category links are in the
+  DOM (scrape_common.READY_JS), capped at the old fixed wait; a bracket
+  page without rounds is done once it has loaded
+- a CAPTCHA is waited out on the page's navigation events. While it is
+  up, the other tasks pause before their next request, and pages that
+  hit it while it was being solved just reload
+
+With http=True (--http) bracket pages are fetched over HTTP with the
+context's cookies (bracket_http.py), on a thread per page slot; a page
+that answers with the CAPTCHA is loaded on a browser page instead, and
+the cookies are copied over again once the CAPTCHA is solved.
+
+Every PROGRESS_EVERY categories an event's brackets so far are saved to
+Results/brackets_{verid}_progress.json, and an event that fails part-way
+still hands the categories it got to on_event.
+
+The context carries a RequestProfile (scrape_common.py) unless
+block=False: images, fonts, CSS and third-party requests are aborted,
+and each event's results get a 'blocked_requests' count.
+
+robust_bracket_scraper.py and batch_asian_scraper.py run on this engine
+(--sync keeps their old one-page loop).
+
+Usage:
+    python scrape_engine.py 811 814 --pages 4 --events 2 --rate 1   # Scrape events, print a summary
+    python scrape_engine.py 811 --pages 8 --rate 4 --http           # Brackets over HTTP after the CAPTCHA
+"""
+import sys
+import json
+import asyncio
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from scrape_common import (BracketWorker, TokenBucket, bracket_url, event_url, category_list_url,
+                           is_captcha_page, save_bracket, RequestProfile, format_blocked,
+                           BRACKET_SELECTOR, CATEGORY_SELECTOR, READY_JS, READY_TIMEOUT_MS,
+                           DEFAULT_PAGES, DEFAULT_RATE)
+
+try:
+    from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+except ImportError:
+    async_playwright = None
+    PlaywrightError = PlaywrightTimeoutError = Exception
+
+BASE_DIR = Path(__file__).parent
+RESULTS_DIR = BASE_DIR / "Results"
+
+DEFAULT_EVENTS = 1
+# Categories between two saves of brackets_{verid}_progress.json
+PROGRESS_EVERY = 20
+
+NAVIGATION_TIMEOUT_MS = 30000
+CAPTCHA_TIMEOUT = 600
+
+# Category links on the catauslist page (onclick handlers as a fallback)
+CATEGORIES_JS = r'''() => {
+    const cats = [];
+    const seen = new Set();
+
+    document.querySelectorAll('a[href*="catid="]').forEach(link => {
+        const href = link.href || link.getAttribute('href') || '';
+        const catMatch = href.match(/catid=(\d+)/);
+        if (!catMatch || seen.has(catMatch[1])) return;
+        const name = link.textContent.trim();
+        if (name && name.length > 2) {
+            seen.add(catMatch[1]);
+            cats.push({catid: catMatch[1], name: name});
+        }
+    });
+
+    if (cats.length === 0) {
+        document.querySelectorAll('[onclick*="catid"]').forEach(el => {
+            const catMatch = (el.getAttribute('onclick') || '').match(/catid[=:]?\s*(\d+)/i);
+            if (!catMatch || seen.has(catMatch[1])) return;
+            const name = el.textContent.trim();
+            if (name) {
+                seen.add(catMatch[1]);
+                cats.push({catid: catMatch[1], name: name});
+            }
+        });
+    }
+
+    return cats;
+}'''
+
+
+def clean_event_title(title):
+    """Event name from the page title."""
+    name = (title or '').replace('SET Online Ju-Jitsu:', '').strip()
+    return name if name and name != 'SET Online Ju-Jitsu' else ''
+
+
+class ScrapeEngine:
+    """Browser, page pool, rate limit and CAPTCHA handling for async scraping.
+
+    Use as `async with ScrapeEngine(...) as engine:`; with a BracketWorker
+    the competitors of each saved page are parsed in the background.
+    """
+
+    def __init__(self, pages=DEFAULT_PAGES, rate=DEFAULT_RATE, events=DEFAULT_EVENTS,
+                 worker=None, headless=False, http=False, block=True):
+        if async_playwright is None:
+            raise RuntimeError("playwright is not installed (pip install playwright)")
+        self.pages = max(1, pages)
+        self.events = max(1, events)
+        self.limiter = TokenBucket(rate)
+        self.worker = worker
+        self.headless = headless
+        self.http = http
+        self.profile = RequestProfile() if block else None
+        # BracketSession, created from the context once the first event page is in
+        self.session = None
+
+    async def __aenter__(self):
+        self.playwright = await async_playwright().start()
+        print("Launching browser...", flush=True)
+        self.browser = await self.playwright.chromium.launch(
+            headless=self.headless,
+            args=['--start-maximized', '--window-position=100,100']
+        )
+        self.context = await self.browser.new_context(
+            viewport={'width': 1400, 'height': 900},
+            no_viewport=True
+        )
+        if self.profile is not None:
+            await self.context.route('**/*', self.profile.route_async)
+        self.page_pool = asyncio.Queue()
+        for _ in range(self.pages):
+            self.page_pool.put_nowait(await self.context.new_page())
+
+        # Set while no CAPTCHA is up; solves counts the CAPTCHAs cleared so far
+        self.captcha_clear = asyncio.Event()
+        self.captcha_clear.set()
+        self.captcha_lock = asyncio.Lock()
+        self.solves = 0
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.session is not None:
+            self.http_pool.shutdown()
+            self.session.close()
+            print(f"HTTP: {self.session.stats()}", flush=True)
+        await self.context.close()
+        await self.browser.close()
+        await self.playwright.stop()
+
+    # -------------------------------------------------------------------------
+    # Navigation
+    # -------------------------------------------------------------------------
+    async def throttle(self):
+        """Wait for the CAPTCHA to be clear and for a request token."""
+        await self.captcha_clear.wait()
+        wait = self.limiter.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    async def is_captcha(self, page):
+        try:
+            return is_captcha_page(await page.content())
+        except PlaywrightError:
+            # Mid-navigation - check again once the new document is in
+            await page.wait_for_load_state('domcontentloaded')
+            return is_captcha_page(await page.content())
+
+    async def solve_captcha(self, page, target_url=None, timeout=CAPTCHA_TIMEOUT):
+        """Wait for the CAPTCHA on page to be solved, then reload target_url.
+
+        Only one page waits for a human at a time; a page that hit the
+        CAPTCHA while another was solving it just reloads.
+        """
+        seen = self.solves
+        async with self.captcha_lock:
+            if self.solves != seen and target_url:
+                await page.goto(target_url, wait_until='domcontentloaded', timeout=NAVIGATION_TIMEOUT_MS)
+                if not await self.is_captcha(page):
+                    return True
+
+            self.captcha_clear.clear()
+            print("  CAPTCHA detected - solve it in the browser window...", flush=True)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            try:
+                await page.bring_to_front()
+                # Each submit of the CAPTCHA form navigates the page
+                while await self.is_captcha(page):
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise PlaywrightTimeoutError("CAPTCHA not solved")
+                    await page.wait_for_event('framenavigated', predicate=lambda f: f == page.main_frame,
+                                              timeout=remaining * 1000)
+                    await page.wait_for_load_state('domcontentloaded')
+                self.solves += 1
+                print("  CAPTCHA solved", flush=True)
+                if self.session is not None:
+                    self.session.set_cookies(await self.context.cookies())
+            except PlaywrightTimeoutError:
+                print("  Timeout waiting for the CAPTCHA", flush=True)
+                return False
+            finally:
+                self.captcha_clear.set()
+
+        # sportdata often lands somewhere else after the CAPTCHA
+        if target_url:
+            await page.goto(target_url, wait_until='domcontentloaded', timeout=NAVIGATION_TIMEOUT_MS)
+            return not await self.is_captcha(page)
+        return True
+
+    async def load(self, page, url, ready_selector=None, ready_timeout_ms=READY_TIMEOUT_MS, until_load=False):
+        """Navigate to url, get past a CAPTCHA and wait for ready_selector; False on failure.
+
+        until_load=True stops waiting once the page has loaded without the
+        selector (see scrape_common.wait_ready).
+        """
+        await self.throttle()
+        await page.goto(url, wait_until='domcontentloaded', timeout=NAVIGATION_TIMEOUT_MS)
+        if await self.is_captcha(page) and not await self.solve_captcha(page, url):
+            return False
+        if ready_selector:
+            try:
+                await page.wait_for_function(READY_JS, arg=[ready_selector, until_load], timeout=ready_timeout_ms)
+            except PlaywrightError:
+                # Ready marker never showed - use what loaded
+                pass
+        return True
+
+    # -------------------------------------------------------------------------
+    # Scraping
+    # -------------------------------------------------------------------------
+    async def categories(self, page, verid):
+        """Event name and categories of an event."""
+        if not await self.load(page, event_url(verid), CATEGORY_SELECTOR):
+            return '', []
+        event_name = clean_event_title(await page.title())
+        if not event_name:
+            h1 = await page.evaluate('() => document.querySelector("h1")?.textContent || ""')
+            event_name = h1.strip() or 'Unknown Event'
+
+        if not await self.load(page, category_list_url(verid), CATEGORY_SELECTOR):
+            return event_name, []
+        if f'vernr={verid}' not in page.url:
+            # Redirected to another event after a CAPTCHA - one more try
+            await self.load(page, category_list_url(verid), CATEGORY_SELECTOR)
+        return event_name, await page.evaluate(CATEGORIES_JS)
+
+    async def start_session(self, page):
+        """Hand the context's cookies to a BracketSession for HTTP fetches."""
+        from bracket_http import BracketSession
+
+        user_agent = await page.evaluate('() => navigator.userAgent')
+        self.session = BracketSession(await self.context.cookies(), user_agent, self.pages)
+        self.http_pool = ThreadPoolExecutor(max_workers=self.pages)
+        self.http_slots = asyncio.Semaphore(self.pages)
+
+    async def fetch_http(self, url):
+        """Bracket HTML over HTTP, or None if the page needs the browser."""
+        async with self.http_slots:
+            await self.throttle()
+            return await asyncio.get_running_loop().run_in_executor(self.http_pool, self.session.fetch, url)
+
+    async def bracket(self, verid, cat):
+        """Fetch one category's bracket on a pooled page; returns its result or None."""
+        if self.session is not None:
+            content = await self.fetch_http(bracket_url(verid, cat['catid']))
+            if content is not None:
+                return save_bracket(verid, cat['catid'], cat['name'], content, self.worker)
+
+        page = await self.page_pool.get()
+        self.assign(page, verid)
+        try:
+            if not await self.load(page, bracket_url(verid, cat['catid']), BRACKET_SELECTOR, until_load=True):
+                return None
+            return save_bracket(verid, cat['catid'], cat['name'], await page.content(), self.worker)
+        except PlaywrightError as e:
+            print(f"  [{cat['catid']}] Error: {e}", flush=True)
+            return None
+        finally:
+            self.page_pool.put_nowait(page)
+
+    async def scrape_event(self, verid):
+        """Scrape all categories of an event; returns the brackets_{verid} results dict.
+
+        An error part-way is printed and the categories scraped before it
+        are returned.
+        """
+        results = {
+            'verid': verid,
+            'event_name': '',
+            'scraped_at': datetime.now().isoformat(),
+            'categories': []
+        }
+        try:
+            await self.scrape_categories(results)
+        except Exception as e:
+            print(f"[{verid}] Error: {e}", flush=True)
+
+        if self.worker is not None:
+            # Competitors of the last pages are still being parsed
+            await asyncio.get_running_loop().run_in_executor(None, self.worker.collect, True)
+        self.blocked(results)
+        return results
+
+    async def scrape_categories(self, results):
+        """Fill in results' event name and categories, saving progress as they come in."""
+        verid = results['verid']
+        page = await self.page_pool.get()
+        self.assign(page, verid)
+        try:
+            results['event_name'], categories = await self.categories(page, verid)
+        finally:
+            self.page_pool.put_nowait(page)
+
+        if not categories:
+            print(f"[{verid}] No categories found!", flush=True)
+            return
+
+        print(f"[{verid}] {results['event_name']}: {len(categories)} categories", flush=True)
+        # Filled in as pages finish; results keep category order
+        fetched = [None] * len(categories)
+        done = 0
+
+        async def fetch(i, cat):
+            nonlocal done
+            try:
+                fetched[i] = await self.bracket(verid, cat)
+            except Exception as e:
+                print(f"  [{cat['catid']}] Error: {e}", flush=True)
+            done += 1
+            name = cat['name'][:40] + "..." if len(cat['name']) > 40 else cat['name']
+            print(f"  [{verid} {done}/{len(categories)}] {name} {'OK' if fetched[i] else 'FAILED'}", flush=True)
+            results['categories'] = [r for r in fetched if r]
+            if done % PROGRESS_EVERY == 0:
+                await self.save_progress(results)
+
+        # The page pool bounds how many run at once
+        await asyncio.gather(*(fetch(i, cat) for i, cat in enumerate(categories)))
+
+    async def save_progress(self, results):
+        """Save the categories scraped so far to Results/brackets_{verid}_progress.json."""
+        snapshot = dict(results, categories=list(results['categories']))
+
+        def save():
+            if self.worker is not None:
+                self.worker.collect()
+            RESULTS_DIR.mkdir(exist_ok=True)
+            progress_file = RESULTS_DIR / f"brackets_{snapshot['verid']}_progress.json"
+            with open(progress_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, indent=2, ensure_ascii=False)
+
+        await asyncio.get_running_loop().run_in_executor(None, save)
+        print(f"  [{snapshot['verid']} progress saved: {len(snapshot['categories'])} categories]", flush=True)
+
+    def assign(self, page, verid):
+        """Count page's blocked requests under verid."""
+        if self.profile is not None:
+            self.profile.assign(page, verid)
+
+    def blocked(self, results):
+        """Add the event's blocked request counts to its results."""
+        if self.profile is not None:
+            results['blocked_requests'] = self.profile.report(results['verid'])
+            print(f"[{results['verid']}] {format_blocked(results['blocked_requests'])}", flush=True)
+
+    async def scrape_events(self, verids, on_event=None):
+        """Scrape events as tasks, `events` at a time; on_event(results) runs as each finishes.
+
+        The first event page is loaded alone so the CAPTCHA is solved once
+        before the tasks start. Returns the results in verids order.
+        """
+        if not verids:
+            return []
+
+        page = await self.page_pool.get()
+        self.assign(page, verids[0])
+        try:
+            if await self.load(page, event_url(verids[0]), CATEGORY_SELECTOR) and self.http:
+                await self.start_session(page)
+        finally:
+            self.page_pool.put_nowait(page)
+
+        slots = asyncio.Semaphore(self.events)
+
+        async def run(verid):
+            async with slots:
+                # Errors are caught per event - on_event also gets a partly scraped event
+                results = await self.scrape_event(verid)
+                if on_event is not None:
+                    on_event(results)
+                return results
+
+        return await asyncio.gather(*(run(v) for v in verids))
+
+
+def scrape_events(verids, pages=DEFAULT_PAGES, rate=DEFAULT_RATE, events=DEFAULT_EVENTS, on_event=None,
+                  http=False, block=True):
+    """Run the engine on verids from synchronous code; returns the results per event."""
+
+    async def main():
+        with BracketWorker() as worker:
+            async with ScrapeEngine(pages=pages, rate=rate, events=events, worker=worker, http=http,
+                                    block=block) as engine:
+                return await engine.scrape_events(list(verids), on_event)
+
+    return asyncio.run(main())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Asyncio bracket scraping engine')
+    parser.add_argument('verids', nargs='+', help='Event ids to scrape')
+    parser.add_argument('--pages', type=int, default=DEFAULT_PAGES, help='Bracket pages loading at once')
+    parser.add_argument('--events', type=int, default=DEFAULT_EVENTS, help='Events scraped at once')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='Max requests per second')
+    parser.add_argument('--http', action='store_true',
+                        help='Fetch bracket pages over HTTP with the browser cookies (browser only on CAPTCHA)')
+    parser.add_argument('--no-block', action='store_true',
+                        help='Load every resource (images, CSS, third-party) - e.g. if a CAPTCHA does not render')
+    args = parser.parse_args()
+
+    if async_playwright is None:
+        print("playwright is not installed (pip install playwright)")
+        sys.exit(1)
+
+    for verid, results in zip(args.verids, scrape_events(args.verids, args.pages, args.rate, args.events,
+                                                             http=args.http, block=not args.no_block)):
+        if results['categories']:
+            n = sum(len(c.get('competitors', [])) for c in results['categories'])
+            print(f"{verid}: {len(results['categories'])} categories, {n} competitors")
+        else:
+            print(f"{verid}: FAILED")
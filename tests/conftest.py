@@ -0,0 +1,123 @@
+"""
+Shared fixtures: a throwaway copy of the project with generated data.
+
+The scripts find their data next to themselves (Brackets/, Profiles/,
+Results/, Cache/), so pipeline tests run them in a copy of the repo under
+tmp_path instead of patching every path constant.
+
+Tests are marked with the backlog requests they cover, e.g.
+@pytest.mark.backlog('user-014'); run one request's tests with
+python -m pytest -q --backlog user-014.
+"""
+import sys
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bracket_benchmark import generate_bracket  # noqa: E402
+
+# (verid, catid, competitors) of the generated brackets
+BRACKETS = [
+    ('701', '11', 4), ('701', '12', 8), ('701', '13', 13),
+    ('702', '21', 16), ('702', '22', 6),
+    ('703', '31', 32),
+]
+
+
+def bracket_html(verid, catid, competitors, seed=0):
+    """Generated bracket page for one category (the event name comes from the verid)."""
+    return generate_bracket(competitors, seed=int(catid) + seed, event_name=f"SYNTHETIC OPEN {verid}")[0]
+
+
+def write_brackets(brackets_dir, brackets=BRACKETS, seed=0):
+    brackets_dir.mkdir(parents=True, exist_ok=True)
+    for verid, catid, competitors in brackets:
+        html = bracket_html(verid, catid, competitors, seed)
+        (brackets_dir / f"bracket_{verid}_{catid}.html").write_text(html, encoding='utf-8')
+
+
+def make_profiles(project):
+    """One profile per bracket athlete, written to Profiles/ and Results/all_profiles.json."""
+    from parse_bracket_html import parse_bracket_html
+
+    profiles = {}
+    for html_file in sorted((project / "Brackets").glob("bracket_*.html")):
+        parsed = parse_bracket_html(html_file.read_text(encoding='utf-8'))
+        for match in parsed['matches']:
+            for corner in (match.get('red_corner'), match.get('blue_corner')):
+                if corner and corner['name'] not in profiles:
+                    profiles[corner['name']] = {
+                        'profile_id': str(1000 + len(profiles)),
+                        'name': corner['name'],
+                        'country_code': corner['country'],
+                        'country': corner['country'],
+                        'medal_summary': {'gold': len(profiles) % 2, 'silver': 0, 'bronze': 0, 'total': len(profiles) % 2},
+                        'overall_stats': {'total_events': 3, 'win_rate': f"{len(profiles) % 100}%"},
+                        'categories': [{
+                            'category': parsed['category'],
+                            'rank': len(profiles) % 30 + 1,
+                            'points': 100 + len(profiles),
+                            'competitions': [{'event': parsed['event_name'], 'event_type': 'OPEN',
+                                              'date': '2025-01-01', 'rank': 1, 'wins': 2, 'medal': 'gold'}]
+                        }]
+                    }
+
+    profiles_dir = project / "Profiles"
+    profiles_dir.mkdir(exist_ok=True)
+    for p in profiles.values():
+        with open(profiles_dir / f"p_{p['profile_id']}.json", 'w', encoding='utf-8') as f:
+            json.dump(p, f)
+    write_all_profiles(project, list(profiles.values()))
+    return list(profiles.values())
+
+
+def write_all_profiles(project, profiles):
+    with open(project / "Results" / "all_profiles.json", 'w', encoding='utf-8') as f:
+        json.dump({'scraped_at': '2025-01-01T00:00:00', 'profiles': profiles}, f)
+
+
+def run(project, *args):
+    """Run a project script in the copy; returns its stdout."""
+    result = subprocess.run([sys.executable, *args], cwd=project, capture_output=True, text=True,
+                            encoding='utf-8', timeout=600)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+def pytest_addoption(parser):
+    parser.addoption('--backlog', action='append', default=[], metavar='ID',
+                     help="Only run tests marked with this backlog request id (repeatable)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "backlog(*ids): backlog requests the test covers")
+
+
+def pytest_collection_modifyitems(config, items):
+    wanted = set(config.getoption('backlog'))
+    if not wanted:
+        return
+    selected, deselected = [], []
+    for item in items:
+        ids = {i for mark in item.iter_markers('backlog') for i in mark.args}
+        (selected if ids & wanted else deselected).append(item)
+    config.hook.pytest_deselected(items=deselected)
+    items[:] = selected
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Copy of the project scripts with generated brackets in Brackets/."""
+    project = tmp_path / "project"
+    project.mkdir()
+    for script in ROOT.glob("*.py"):
+        shutil.copy2(script, project)
+    (project / "Results").mkdir()
+    write_brackets(project / "Brackets")
+    return project
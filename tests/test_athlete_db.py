@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+from athlete_db import query_category_matches
+from conftest import run, make_profiles
+
+pytestmark = pytest.mark.backlog('user-003')
+
+CASES = [
+    ('SYNTHETIC OPEN 702', None, None),
+    ('Synthetic open', 'male -63', None),
+    ('702 nothing', None, 'KSA'),
+    # Words too short for the trigram index
+    ('OP 70', None, None),
+    (None, 'KG', 'JPN'),
+    ('Quote "it"', None, None),
+    (None, None, 'UAE'),
+]
+
+
+@pytest.fixture
+def conn(project):
+    run(project, 'parse_bracket_html.py', '--all')
+    make_profiles(project)
+    run(project, 'athlete_db.py')
+    conn = sqlite3.connect(project / "Cache" / "jjif.sqlite")
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def test_category_query_matches_a_full_scan(conn):
+    rows = conn.execute("SELECT m.id, e.name AS event, c.name AS category, m.red_country, m.blue_country "
+                        "FROM matches m JOIN events e ON e.id = m.event_id "
+                        "JOIN categories c ON c.id = m.category_id ORDER BY m.id").fetchall()
+    for event, category, country in CASES:
+        words = event.upper().split() if event else []
+        expected = [r['id'] for r in rows
+                    if (not words or any(w in r['event'].upper() for w in words))
+                    and (not category or category.upper() in r['category'].upper())
+                    and (not country or country in (r['red_country'], r['blue_country']))]
+
+        found = [m['match_id'] for m in query_category_matches(conn, event, category, country)]
+        assert found == expected, (event, category, country)
+
+    # The plan reads matches through the category index, not a scan
+    plan = ' '.join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT m.id FROM matches m WHERE m.category_id IN "
+        "(SELECT rowid FROM category_search WHERE category_search MATCH ?)", ('"MALE"',)))
+    assert 'SCAN m' not in plan and 'idx_matches_category' in plan
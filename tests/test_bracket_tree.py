@@ -0,0 +1,103 @@
+import pytest
+
+from bracket_benchmark import generate_bracket
+from bracket_tree import final_match, path_to_final, athlete_path, round_order, restore_links, has_links
+from match_outcome import decide_outcome, read_score, resolve_ties, round_stage
+from parse_bracket_html import parse_bracket_html
+
+
+def corner(name, score, mark=None, marked_winner=False):
+    c = {'name': name, 'country': 'KSA', 'federation': '', 'score': score}
+    if mark:
+        c['mark'] = mark
+    if marked_winner:
+        c['marked_winner'] = True
+    return c
+
+
+@pytest.mark.backlog('user-016')
+@pytest.mark.parametrize('competitors', [4, 6, 8, 13, 16, 32])
+def test_links_follow_the_bracket(competitors):
+    html, expected = generate_bracket(competitors, seed=competitors)
+    bracket = parse_bracket_html(html)
+    matches = bracket['matches']
+
+    assert has_links(bracket)
+    assert [m['id'] for m in matches] == list(range(len(matches)))
+    for m in matches:
+        # Links only point forward, and feeders mirror next
+        assert all(t is None or t > m['id'] for t in (m['next'], m['loser_next']))
+        assert all(matches[f]['next'] == m['id'] for f in m['feeders'])
+        if m['next'] is not None:
+            assert m['winner'] is None or m['winner'] in (
+                matches[m['next']]['red_corner']['name'], matches[m['next']]['blue_corner']['name'])
+
+    final = final_match(bracket)
+    assert final['round'] == 'Final'
+    if expected['champion']:
+        assert final['winner'] == expected['champion']
+        # The champion's bouts lead to the final one match per round
+        path = athlete_path(bracket, expected['champion'])
+        assert path[-1] is final
+        assert [m['depth'] for m in path] == sorted(m['depth'] for m in path)
+        assert path_to_final(bracket, path[0]['id'])[-1] is final
+
+    # Main tree rounds come out in bracket order, the final deepest
+    assert round_order(bracket)[-1] == 'Final'
+    assert max(bracket['round_depths']) == final['depth']
+
+
+@pytest.mark.backlog('user-015', 'user-016')
+def test_restore_links_from_next_only():
+    bracket = parse_bracket_html(generate_bracket(16, seed=5)[0])
+    stripped = {
+        'rounds': bracket['rounds'],
+        'matches': [{k: m[k] for k in ('round', 'red_corner', 'blue_corner', 'winner', 'next', 'loser_next')}
+                    for m in bracket['matches']]
+    }
+    restore_links(stripped)
+    assert stripped['round_depths'] == bracket['round_depths']
+    assert [m['feeders'] for m in stripped['matches']] == [m['feeders'] for m in bracket['matches']]
+    assert [m['depth'] for m in stripped['matches']] == [m['depth'] for m in bracket['matches']]
+
+
+@pytest.mark.backlog('user-018')
+@pytest.mark.parametrize('red, blue, winner, outcome', [
+    (corner('A', 3), corner('B', 1), 'A', 'score'),
+    (corner('A', 0), corner('B', 2), 'B', 'score'),
+    (corner('A', 5, 'DQ'), corner('B', 0), 'B', 'disqualification'),
+    (corner('A', 0), corner('B', 0, 'WO'), 'A', 'walkover'),
+    (corner('A', 0), corner('B', 0, 'IPPON'), 'B', 'submission'),
+    (corner('A', 2, marked_winner=True), corner('B', 2), 'A', 'decision'),
+    (corner('A', 2), corner('B', 2), None, None),
+    (corner('A', 2), None, None, 'bye'),
+])
+def test_decide_outcome(red, blue, winner, outcome):
+    match = decide_outcome({'round': 'Round 1', 'red_corner': red, 'blue_corner': blue})
+    assert (match['winner'], match['outcome']) == (winner, outcome)
+
+
+@pytest.mark.backlog('user-018')
+def test_read_score_marks():
+    assert read_score({}, ' 4 ') == {'score': 4}
+    assert read_score({}, 'D.Q.') == {'score': 0, 'mark': 'DQ'}
+    assert read_score({}, '3 (sub)') == {'score': 3, 'mark': 'SUB'}
+
+
+@pytest.mark.backlog('user-018')
+def test_resolve_ties_gives_tied_bout_to_the_corner_that_fought_on():
+    bracket = {'matches': [
+        {'red_corner': corner('A', 1), 'blue_corner': corner('B', 1), 'winner': None, 'next': 1},
+        {'red_corner': corner('A', 0), 'blue_corner': corner('C', 3), 'winner': 'C', 'next': None},
+    ]}
+    assert resolve_ties(bracket) == 1
+    assert (bracket['matches'][0]['winner'], bracket['matches'][0]['outcome']) == ('A', 'progression')
+
+
+@pytest.mark.backlog('user-018')
+@pytest.mark.parametrize('name, stage', [
+    ('Main Tree Pool 1 - Round 1', 'main'), ('Semi-Final', 'main'), ('Final', 'final'),
+    ('Repechage Pool 2 - Round 1', 'repechage'), ('Bronze Medal Match', 'bronze'), ('Pool A', 'pool'),
+])
+def test_round_stage(name, stage):
+    assert round_stage(name) == stage
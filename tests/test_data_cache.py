@@ -0,0 +1,119 @@
+import os
+import json
+import shutil
+import sqlite3
+
+import pytest
+
+from conftest import run, make_profiles, write_all_profiles, write_brackets
+
+# Cache files compared between a full and an incremental build
+SUMMARIES = ['profiles_summary.json', 'matches_summary.json', 'saudi_matches.json', 'rankings_cache.json']
+TABLES = ('athletes', 'competitions', 'events', 'categories', 'matches')
+
+
+def cache_contents(project):
+    """Cache outputs without build times: JSON summaries, snapshot profiles, database rows."""
+    cache_dir = project / "Cache"
+    contents = {}
+    for name in SUMMARIES:
+        data = json.loads((cache_dir / name).read_text(encoding='utf-8'))
+        if isinstance(data, dict):
+            data.pop('timestamp', None)
+        contents[name] = data
+
+    # Unordered: a patched entry ends up last
+    for ids in contents['profiles_summary.json']['search_index'].values():
+        if isinstance(ids, list):
+            ids.sort()
+    contents['rankings_cache.json']['categories'].sort()
+
+    snapshot = run(project, '-c', "import json, profile_snapshot as s; "
+                                  "print(json.dumps(s.open_snapshot().profiles()))")
+    contents['profiles.snap'] = json.loads(snapshot)
+
+    conn = sqlite3.connect(cache_dir / "jjif.sqlite")
+    contents['jjif.sqlite'] = {t: conn.execute(f"SELECT * FROM {t} ORDER BY id").fetchall() for t in TABLES}
+    conn.close()
+    return contents
+
+
+def change_inputs(project, profiles):
+    """Edit, add and remove a profile, and re-scrape one event with different brackets.
+
+    Returns the country codes whose shards changed.
+    """
+    edited = dict(profiles[0], name=profiles[0]['name'] + ' JR')
+    edited['categories'] = [dict(profiles[0]['categories'][0], rank=1, points=9999)]
+    added = dict(profiles[1], profile_id='9999', country_code='KSA', country='KSA')
+    removed = profiles[2]
+
+    profiles = [edited] + [p for p in profiles[1:] if p is not removed] + [added]
+    write_all_profiles(project, profiles)
+
+    write_brackets(project / "Brackets", [('702', '21', 16), ('702', '22', 9)], seed=7)
+    run(project, 'parse_bracket_html.py', '--all')
+    return {p['country_code'] for p in (edited, added, removed)}
+
+
+@pytest.mark.backlog('user-002', 'user-007')
+def test_incremental_build_matches_full_build(project, tmp_path):
+    run(project, 'parse_bracket_html.py', '--all')
+    profiles = make_profiles(project)
+    run(project, 'data_cache.py')
+
+    out = run(project, 'data_cache.py', '--incremental')
+    assert "0 changed, 0 removed country shards" in out
+    assert "0 changed, 0 removed events" in out
+    assert "No changed events - index is current" in out
+    assert "database is current" in out
+
+    countries = change_inputs(project, profiles)
+    out = run(project, 'data_cache.py', '--incremental')
+    assert f"{len(countries)} changed, 0 removed country shards" in out
+    assert "1 changed, 0 removed events" in out
+    incremental = cache_contents(project)
+
+    full = tmp_path / "full"
+    shutil.copytree(project, full, ignore=shutil.ignore_patterns('Cache'))
+    run(full, 'data_cache.py')
+    assert cache_contents(full) == incremental
+
+
+@pytest.mark.backlog('user-007')
+def test_damaged_snapshot_is_not_used(project):
+    run(project, 'parse_bracket_html.py', '--all')
+    profiles = make_profiles(project)
+    run(project, 'data_cache.py', '--profiles')
+    snapshot_file = project / "Cache" / "profiles.snap"
+    built = snapshot_file.read_bytes()
+
+    data = bytearray(built)
+    data[-20:] = b'\xff' * 20
+    snapshot_file.write_bytes(bytes(data))
+
+    # Readers fall back to all_profiles.json - only data_cache.py rebuilds
+    load = "import data_cache\nprint(data_cache.load_profiles_fast())"
+    assert run(project, '-c', load).strip().endswith('None')
+    assert snapshot_file.read_bytes() == bytes(data)
+
+    out = run(project, 'data_cache.py', '--profiles', '--incremental')
+    assert "doing a full rebuild" in out
+    out = run(project, '-c', "import data_cache\nprint(len(data_cache.load_profiles_fast()))")
+    assert out.strip() == str(len(profiles))
+
+
+@pytest.mark.backlog('user-007')
+def test_stale_snapshot_is_not_used(project):
+    run(project, 'parse_bracket_html.py', '--all')
+    make_profiles(project)
+    run(project, 'data_cache.py', '--profiles')
+    manifest = (project / "Cache" / "manifest.json").read_bytes()
+
+    profiles_json = project / "Results" / "all_profiles.json"
+    newer = (project / "Cache" / "profiles.snap").stat().st_mtime + 10
+    os.utime(profiles_json, (newer, newer))
+
+    assert run(project, '-c', "import data_cache\nprint(data_cache.load_profiles_fast())").strip() == 'None'
+    # Nothing was rebuilt behind the caller's back
+    assert (project / "Cache" / "manifest.json").read_bytes() == manifest
@@ -0,0 +1,36 @@
+import pytest
+
+from file_watch import DirectoryWatcher, fingerprint
+
+pytestmark = pytest.mark.backlog('user-009')
+
+
+def test_fingerprint_ignores_identical_rewrites(tmp_path):
+    path = tmp_path / "all_profiles.json"
+    path.write_text('{"profiles": []}', encoding='utf-8')
+    before = fingerprint(path)
+    path.write_text('{"profiles": []}', encoding='utf-8')
+    assert fingerprint(path) == before
+    path.write_text('{"profiles": [{}]}', encoding='utf-8')
+    assert fingerprint(path) != before
+
+
+def test_watcher_skips_derived_outputs(tmp_path):
+    results = tmp_path / "Results"
+    (results / "profiles").mkdir(parents=True)
+    (results / "matches").mkdir()
+    watcher = DirectoryWatcher([results])
+
+    # What the dashboard's own loaders and the parser's bookkeeping write
+    (results / "profiles" / "index.json").write_text('{}', encoding='utf-8')
+    (results / "matches" / "manifest.json").write_text('{}', encoding='utf-8')
+    (results / "all_matches.parquet").write_bytes(b'PAR1')
+    (results / "parse_report.json").write_text('{}', encoding='utf-8')
+    (results / "brackets_701_progress.json").write_text('{}', encoding='utf-8')
+    assert watcher.poll() == []
+
+    (results / "all_profiles.json").write_text('{}', encoding='utf-8')
+    (results / "brackets_701_20250101_000000.json").write_text('{}', encoding='utf-8')
+    assert [p.rsplit('/', 1)[-1] for p in watcher.poll()] == [
+        'all_profiles.json', 'brackets_701_20250101_000000.json']
+    assert watcher.poll() == []
@@ -0,0 +1,131 @@
+import pytest
+
+import identity_index
+import h2h_index
+from identity_index import name_forms, build_identity_index, load_identity_index
+from h2h_index import build_h2h_index, HeadToHeadIndex
+from match_store import build_match_table
+
+PROFILES = [
+    {'profile_id': '1', 'name': 'Saeed AL-Kaabi', 'country_code': 'UAE'},
+    {'profile_id': '2', 'name': 'KIM MIN-JUN', 'country_code': 'KOR'},
+    # Two athletes whose names reduce to the same form
+    {'profile_id': '3', 'name': 'SATO KENJI', 'country_code': 'JPN'},
+    {'profile_id': '4', 'name': 'KENJI SATO', 'country_code': 'JPN'},
+]
+
+
+def competitor(name, country, score):
+    return {'name': name, 'country': country, 'federation': f"{country} JU-JITSU FEDERATION", 'score': score}
+
+
+def bout(red, blue, winner):
+    return {'round': 'Round 1', 'red_corner': red, 'blue_corner': blue, 'winner': winner['name']}
+
+
+KAABI = competitor('AL KAABI SAEED', 'UAE', 0)
+KIM = competitor('KIM MIN JUN', 'KOR', 0)
+SATO = competitor('SATO KENJI', 'JPN', 0)
+ONLY_BRACKET = competitor('DUPONT LUCAS', 'FRA', 0)
+
+EVENTS = [{'verid': '1', 'event_name': 'OPEN 1', 'categories': [{'catid': '10', 'category': 'M -62', 'matches': [
+    bout(KAABI, KIM, KAABI),
+    bout(KIM, ONLY_BRACKET, ONLY_BRACKET),
+    bout(SATO, KAABI, KAABI),
+    bout(KIM, KAABI, KIM),
+]}]}]
+
+
+@pytest.fixture
+def match_table(tmp_path, monkeypatch):
+    df = build_match_table({'events': EVENTS})
+    table_file = tmp_path / "all_matches.parquet"
+    df.to_parquet(table_file, index=False)
+
+    def load(columns=None, table_file=None):
+        return df[list(columns)] if columns else df
+
+    monkeypatch.setattr(identity_index, 'load_profiles', lambda: PROFILES)
+    monkeypatch.setattr(identity_index, 'load_match_table', load)
+    monkeypatch.setattr(h2h_index, 'load_match_table', load)
+    monkeypatch.setattr(h2h_index, 'MATCHES_TABLE', table_file)
+    return df
+
+
+@pytest.fixture
+def identity(match_table, tmp_path, monkeypatch):
+    index_file = tmp_path / "identity_index.json"
+    index = build_identity_index(index_file)
+    monkeypatch.setattr(h2h_index, 'load_identity_index', lambda: index)
+    monkeypatch.setattr(h2h_index, 'IDENTITY_FILE', index_file)
+    return index
+
+
+@pytest.mark.backlog('user-005')
+def test_name_forms():
+    assert name_forms('Saeed AL-Kaabi') == ['AL KAABI SAEED', 'KAABI SAEED']
+    assert name_forms('KAABI SAEED (UAE)') == ['KAABI SAEED']
+    assert name_forms('OMAR KHALIL UAE JU-JITSU FEDERATION', 'UAE JU-JITSU FEDERATION') == ['KHALIL OMAR']
+    assert name_forms('') == []
+
+
+@pytest.mark.backlog('user-005')
+def test_identity_resolves_spellings(identity):
+    assert identity.resolve('KAABI Saeed', 'UAE') == '1'
+    assert identity.resolve('Saeed Kaabi', 'UAE') == '1'
+    assert identity.resolve('MIN-JUN KIM', 'KOR') == '2'
+    # Same name, other country: not this athlete
+    assert identity.resolve('KIM MIN JUN', 'JPN') is None
+    # A bracket-only athlete gets an id of their own
+    assert identity.resolve('DUPONT LUCAS', 'FRA') == 'FRA:DUPONT LUCAS'
+    assert identity.profile_id('FRA:DUPONT LUCAS') is None
+
+
+@pytest.mark.backlog('user-005')
+def test_ambiguous_forms_resolve_to_nobody(identity):
+    assert identity.resolve('SATO KENJI', 'JPN') is None
+    # Both profiles, plus the bracket-only id the unresolvable bracket name got
+    assert sorted(identity.resolve_all('KENJI SATO')) == ['3', '4', 'JPN:KENJI SATO']
+    assert identity.coverage['ambiguous_forms'] == 1
+    assert {'name': 'SATO KENJI', 'country': 'JPN'} in identity.unresolved
+
+
+@pytest.mark.backlog('user-005')
+def test_identity_index_round_trip(identity, tmp_path):
+    loaded = load_identity_index(tmp_path / "identity_index.json")
+    assert loaded.forms == identity.forms
+    assert loaded.athletes == identity.athletes
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.backlog('user-006')
+def test_h2h_pairs_and_opponents(identity, match_table, tmp_path):
+    index = build_h2h_index(tmp_path / "h2h")
+    # Rows in table order, whichever corner each athlete fought from
+    assert index.bouts_between('1', '2') == [0, 3]
+    assert index.bouts_between('2', '1') == [0, 3]
+    assert index.side_of(3, '1') == 'blue'
+    assert index.bouts_between('2', 'FRA:DUPONT LUCAS') == [1]
+    # Ambiguous SATO KENJI is never indexed
+    assert dict(index.opponents_of('1')) == {'2': 2}
+    assert dict(index.opponents_of('2')) == {'1': 2, 'FRA:DUPONT LUCAS': 1}
+    assert index.bouts_between('1', 'nobody') == []
+    assert index.meta['total_bouts'] == 3
+
+
+@pytest.mark.backlog('user-006')
+def test_h2h_reader_keeps_its_arrays_across_a_rebuild(identity, match_table, tmp_path, monkeypatch):
+    index_dir = tmp_path / "h2h"
+    old = build_h2h_index(index_dir)
+    pairs = old.pair_keys.tolist()
+
+    # Rebuilt for a table without the first bout
+    smaller = match_table.iloc[1:].reset_index(drop=True)
+    monkeypatch.setattr(h2h_index, 'load_match_table', lambda columns=None, table_file=None: smaller[list(columns)])
+    new = build_h2h_index(index_dir)
+
+    assert old.pair_keys.tolist() == pairs
+    assert old.bouts_between('1', '2') == [0, 3]
+    assert HeadToHeadIndex(index_dir).bouts_between('1', '2') == [2]
+    assert new.meta['total_bouts'] == 2
+    assert not list(index_dir.glob("*.tmp"))
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import json_ingest
+from json_ingest import iter_items, read_header, count_items
+
+pytestmark = pytest.mark.backlog('user-008')
+
+# Strings that look like structure to a naive scanner
+TRICKY = ['a]b', 'c}d', '"quoted"', 'back\\slash\\', 'esc\\"]', 'ü ✓', '[{', '']
+
+DOCUMENT = {
+    'scraped_at': '2025-01-01T00:00:00',
+    'skipped': [{'name': s, 'nested': [s, {'k]': [1, 2.5, None]}]} for s in TRICKY] * 20,
+    'meta': {'a': {'b': ['}', '{', '"']}, 'c': 'x\\'},
+    'profiles': [{'profile_id': str(i), 'name': TRICKY[i % len(TRICKY)], 'score': 10 ** i}
+                 for i in range(30)],
+    'total': 30,
+    'ratio': -1.25e-3,
+    'ok': True,
+}
+
+
+@pytest.fixture(params=[1, 2, 7, 64, 1 << 16])
+def chunk_size(request, monkeypatch):
+    """Every read boundary - one character at a time up to the real chunk size."""
+    monkeypatch.setattr(json_ingest, 'CHUNK_SIZE', request.param)
+    return request.param
+
+
+@pytest.fixture(params=[None, 1])
+def document_file(request, tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps(DOCUMENT, indent=request.param, ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+def test_items_and_header(chunk_size, document_file):
+    header = {}
+    assert list(iter_items(document_file, 'profiles', header=header)) == DOCUMENT['profiles']
+    assert header == {k: v for k, v in DOCUMENT.items() if not isinstance(v, (list, dict))}
+
+
+def test_skips_other_arrays(chunk_size, document_file):
+    assert read_header(document_file)['total'] == 30
+    assert count_items(document_file, 'skipped') == len(DOCUMENT['skipped'])
+    assert count_items(document_file, 'missing') == 0
+
+
+def test_top_level_array(chunk_size, tmp_path):
+    path = tmp_path / "list.json"
+    path.write_text(json.dumps(DOCUMENT['profiles']), encoding='utf-8')
+    assert list(iter_items(path, 'ignored')) == DOCUMENT['profiles']
+
+
+def test_large_item_spans_many_chunks(monkeypatch, tmp_path):
+    monkeypatch.setattr(json_ingest, 'CHUNK_SIZE', 64)
+    big = {'blob': 'x' * 200_000, 'items': list(range(5000))}
+    path = tmp_path / "big.json"
+    path.write_text(json.dumps({'skip': [big], 'profiles': [big, {'n': 1}]}), encoding='utf-8')
+
+    attempts = []
+    decode = json_ingest._decoder.raw_decode
+    monkeypatch.setattr(json_ingest, '_decoder', type('Decoder', (), {
+        'raw_decode': staticmethod(lambda s, pos: attempts.append(len(s)) or decode(s, pos))}))
+
+    assert list(iter_items(path, 'profiles')) == [big, {'n': 1}]
+    # The buffer doubles between attempts - not one retry per 64-character chunk
+    assert len(attempts) < 100
+
+
+def test_truncated_file_raises(tmp_path):
+    text = json.dumps(DOCUMENT)
+    for cut in (text.index('"skipped"') + 40, text.index('"profiles"') + 40):
+        path = tmp_path / "cut.json"
+        path.write_text(text[:cut], encoding='utf-8')
+        with pytest.raises(ValueError):
+            list(iter_items(path, 'profiles'))
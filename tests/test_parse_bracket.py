@@ -0,0 +1,100 @@
+import json
+import shutil
+
+import pytest
+
+from bracket_benchmark import generate_corpus, check_parse
+from parse_bracket_html import parse_bracket_html, etree
+from match_shards import MatchShardWriter, load_manifest, iter_events
+
+from conftest import run
+
+CORPUS = generate_corpus(sizes=[2, 4, 5, 8, 13, 16, 32, 64], per_size=3, seed=3)
+
+
+@pytest.mark.backlog('user-013', 'user-017')
+@pytest.mark.parametrize('backend', ['bs4', 'lxml'])
+def test_parse_matches_generator(backend):
+    if backend == 'lxml' and etree is None:
+        pytest.skip("lxml is not installed")
+    for name, html, expected in CORPUS:
+        assert check_parse(parse_bracket_html(html, backend), expected) == [], name
+
+
+@pytest.mark.backlog('user-013')
+@pytest.mark.skipif(etree is None, reason="lxml is not installed")
+def test_backend_parity():
+    for name, html, _ in CORPUS:
+        assert parse_bracket_html(html, 'bs4') == parse_bracket_html(html, 'lxml'), name
+
+
+def shard_contents(project):
+    """{file name: content} of the match shards, without the parse time."""
+    shards = {}
+    for path in sorted((project / "Results" / "matches").glob("*.json")):
+        data = json.loads(path.read_text(encoding='utf-8'))
+        data.pop('parsed_at', None)
+        shards[path.name] = data
+    return shards
+
+
+@pytest.mark.backlog('user-011', 'user-012', 'user-014')
+def test_serial_and_parallel_parse_are_equal(project):
+    run(project, 'parse_bracket_html.py', '--all', '--no-cache')
+    serial = shard_contents(project)
+    serial_table = (project / "Results" / "all_matches.parquet").read_bytes()
+
+    shutil.rmtree(project / "Results" / "matches")
+    run(project, 'parse_bracket_html.py', '--all', '--no-cache', '--jobs', '3')
+    assert shard_contents(project) == serial
+    assert (project / "Results" / "all_matches.parquet").read_bytes() == serial_table
+
+    # Read back from the parse cache
+    run(project, 'parse_bracket_html.py', '--all', '--jobs', '3')
+    assert shard_contents(project) == serial
+    assert set(serial) == {'701.json', '702.json', '703.json', 'manifest.json'}
+
+
+@pytest.mark.backlog('user-014')
+def test_failed_run_keeps_previous_shards(tmp_path):
+    events = [{'verid': str(v), 'event_name': f"EVENT {v}", 'categories': [{'matches': [{}] * v}]} for v in (1, 2)]
+    writer = MatchShardWriter(tmp_path)
+    for event in events:
+        writer.write_event(event)
+    writer.close()
+
+    writer = MatchShardWriter(tmp_path)
+    writer.write_event(dict(events[0], event_name='CHANGED'))
+    # Nothing is visible before close()
+    assert [e['event_name'] for e in iter_events(tmp_path)] == ['EVENT 1', 'EVENT 2']
+    writer.discard()
+    assert [e['event_name'] for e in iter_events(tmp_path)] == ['EVENT 1', 'EVENT 2']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['1.json', '2.json', 'manifest.json']
+
+    writer = MatchShardWriter(tmp_path)
+    writer.write_event(dict(events[0], event_name='CHANGED'))
+    manifest = writer.close()
+    assert manifest['total_matches'] == 1
+    assert load_manifest(tmp_path)['events'][0]['event_name'] == 'CHANGED'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['1.json', 'manifest.json']
+
+
+@pytest.mark.backlog('user-001', 'user-014')
+def test_match_table_is_streamed_in_row_groups(tmp_path, monkeypatch):
+    import match_store
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    events = [{'verid': str(i), 'event_name': f"EVENT {i}", 'categories': [
+        {'catid': str(i), 'category': name, 'matches': parse_bracket_html(html)['matches']}]}
+        for i, (name, html, _) in enumerate(CORPUS[-6:])]
+    expected = match_store.build_match_table({'events': events})
+
+    monkeypatch.setattr(match_store, 'ROW_GROUP_ROWS', 40)
+    table_file = match_store.write_match_table({'events': iter(events)}, tmp_path / "all_matches.parquet")
+    assert pq.ParquetFile(table_file).num_row_groups > 1
+    assert not list(tmp_path.glob("*.tmp"))
+
+    df = pd.read_parquet(table_file)
+    assert df.dtypes.to_dict() == expected.dtypes.to_dict()
+    pd.testing.assert_frame_equal(df.astype(object), expected.astype(object))
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from profile_store import write_profile_shards
+
+PROFILES = [
+    {'profile_id': '1', 'name': 'A', 'country_code': 'KSA', 'country': 'Saudi Arabia', 'categories': [{}]},
+    {'profile_id': '2', 'name': 'B', 'country_code': 'UAE', 'country': 'United Arab Emirates'},
+    {'profile_id': '3', 'name': 'C', 'country_code': 'JPN', 'country': 'Japan'},
+]
+
+
+def read(path):
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+@pytest.mark.backlog('user-004')
+def test_shards_and_index(tmp_path):
+    index = write_profile_shards(PROFILES, '2025-01-01', tmp_path)
+    assert read(tmp_path / "index.json") == index
+    assert sorted(index['countries']) == ['JPN', 'KSA', 'UAE']
+    assert index['countries']['KSA']['with_data'] == 1
+    assert read(tmp_path / "UAE.json")['profiles'] == [PROFILES[1]]
+
+    # A country that disappears loses its shard
+    write_profile_shards(PROFILES[:2], '2025-01-02', tmp_path)
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == ['KSA.json', 'UAE.json', 'index.json']
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.backlog('user-004')
+def test_failed_write_keeps_previous_shards(tmp_path):
+    write_profile_shards(PROFILES, '2025-01-01', tmp_path)
+    before = {p.name: p.read_bytes() for p in tmp_path.iterdir()}
+
+    # UAE sorts after KSA: KSA's shard is written before the failure
+    broken = [dict(PROFILES[0], name='A2'), dict(PROFILES[1], unserializable={1})]
+    with pytest.raises(TypeError):
+        write_profile_shards(broken, '2025-01-02', tmp_path)
+
+    assert not list(tmp_path.glob("*.tmp"))
+    assert read(tmp_path / "index.json")['scraped_at'] == '2025-01-01'
+    # Every shard is whole - the old file or the new one
+    assert read(tmp_path / "UAE.json") == json.loads(before['UAE.json'])
+    assert read(tmp_path / "KSA.json")['profiles'][0]['name'] == 'A2'
+
+
+@pytest.mark.backlog('user-010')
+def test_facets_follow_shard_order(tmp_path):
+    import pandas as pd
+
+    write_profile_shards(PROFILES, '2025-01-01', tmp_path)
+    facets = pd.read_parquet(tmp_path / "facets.parquet")
+    assert list(facets['country_code']) == ['JPN', 'KSA', 'UAE']
+
+    write_profile_shards(PROFILES[:2], '2025-01-02', tmp_path)
+    assert list(pd.read_parquet(tmp_path / "facets.parquet")['country_code']) == ['KSA', 'UAE']
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,207 @@
+import time
+import threading
+
+import pytest
+
+from bracket_http import BracketSession, StubHandler, STUB_EVENT, fetch_all, start_stub, run_check
+from scrape_common import TokenBucket, RequestProfile, bracket_url, is_captcha_page
+from parse_bracket_html import parse_bracket_html
+
+BASE_URL = "https://www.sportdata.org/ju-jitsu/set-online"
+
+
+# -----------------------------------------------------------------------------
+# TokenBucket
+# -----------------------------------------------------------------------------
+@pytest.mark.backlog('user-021')
+def test_token_bucket_spaces_requests():
+    bucket = TokenBucket(rate=50)
+    assert bucket.reserve() == 0.0
+    # Each further token is 1/rate later than the one before
+    assert bucket.reserve() == pytest.approx(0.02, abs=0.005)
+    assert bucket.reserve() == pytest.approx(0.04, abs=0.005)
+
+
+@pytest.mark.backlog('user-021')
+def test_token_bucket_burst_and_refill():
+    bucket = TokenBucket(rate=100, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() > 0
+    time.sleep(0.05)
+    assert bucket.reserve() == 0.0
+
+
+@pytest.mark.backlog('user-021')
+def test_token_bucket_shared_by_threads():
+    bucket = TokenBucket(rate=200)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(10)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 40 requests at 200/sec: the first is free, the rest are spaced out
+    assert time.perf_counter() - start >= 39 / 200 * 0.9
+
+
+# -----------------------------------------------------------------------------
+# RequestProfile
+# -----------------------------------------------------------------------------
+class Page:
+    """Just enough of a Playwright page for assign() and the close event."""
+
+    def __init__(self):
+        self.handlers = []
+
+    def on(self, event, handler):
+        assert event == 'close'
+        self.handlers.append(handler)
+
+    def close(self):
+        for handler in self.handlers:
+            handler(self)
+
+
+class Request:
+    def __init__(self, url, resource_type, page=None):
+        self.url = url
+        self.resource_type = resource_type
+        self.frame = type('Frame', (), {'page': page})()
+
+
+@pytest.mark.backlog('user-025')
+@pytest.mark.parametrize('url, resource_type, allowed', [
+    (f"{BASE_URL}/index.php", 'document', True),
+    ("https://static.sportdata.org/js/app.js", 'script', True),
+    (f"{BASE_URL}/popup.php", 'xhr', True),
+    ("https://www.sportdata.org/logo.png", 'image', False),
+    ("https://www.sportdata.org/style.css", 'stylesheet', False),
+    ("https://www.sportdata.org/font.woff2", 'font', False),
+    ("https://analytics.example.com/t.js", 'script', False),
+    ("https://www.sportdata.org.evil.com/app.js", 'script', False),
+    # CAPTCHA: third-party hosts and first-party challenge paths, any type
+    ("https://www.gstatic.com/recaptcha/api2/logo.png", 'image', True),
+    ("https://challenges.cloudflare.com/turnstile/v0/api.js", 'script', True),
+    ("https://www.sportdata.org/cdn-cgi/challenge-platform/h/b/orchestrate/chl_page/v1", 'script', True),
+    ("https://www.sportdata.org/cdn-cgi/challenge-platform/h/b/img/x.png", 'image', True),
+    ("https://www.sportdata.org/ju-jitsu/captcha/image.php?id=1", 'image', True),
+    ("https://evil.com/cdn-cgi/challenge-platform/x.js", 'script', False),
+    ("data:image/png;base64,AAAA", 'image', True),
+])
+def test_request_profile_allows(url, resource_type, allowed):
+    assert RequestProfile(BASE_URL).allows(url, resource_type) is allowed
+
+
+@pytest.mark.backlog('user-025')
+def test_request_profile_counts_per_label():
+    profile = RequestProfile(BASE_URL)
+    page_a, page_b = Page(), Page()
+    profile.assign(page_a, '701')
+    profile.assign(page_b, '702')
+
+    assert profile._check(Request(f"{BASE_URL}/index.php", 'document', page_a))
+    assert not profile._check(Request("https://www.sportdata.org/a.png", 'image', page_a))
+    assert not profile._check(Request("https://www.sportdata.org/b.png", 'image', page_a))
+    assert not profile._check(Request("https://ads.example.com/x.js", 'script', page_b))
+
+    assert profile.report('701') == {'requests': 2, 'kb_saved_est': 50, 'by_kind': {'image': 2}}
+    assert profile.report('702') == {'requests': 1, 'kb_saved_est': 40, 'by_kind': {'third-party': 1}}
+    # Reports are since the last report
+    assert profile.report('701')['requests'] == 0
+
+
+@pytest.mark.backlog('user-025')
+def test_request_profile_forgets_closed_pages():
+    profile = RequestProfile(BASE_URL)
+    page = Page()
+    profile.assign(page, '701')
+    profile.assign(page, '702')
+    assert len(page.handlers) == 1
+    page.close()
+    assert profile.labels == {}
+    assert not profile._check(Request("https://www.sportdata.org/a.png", 'image', page))
+    assert profile.report(None)['requests'] == 1
+
+
+# -----------------------------------------------------------------------------
+# bracket_http against the stub server
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        server, base_url = start_stub(**kwargs)
+        servers.append(server)
+        return base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def cleared():
+    """Cookies of a browser that just solved the stub's CAPTCHA."""
+    name, value = StubHandler.cookie().split('=')
+    return [{'name': name, 'value': value, 'domain': '127.0.0.1', 'path': '/'}]
+
+
+@pytest.mark.backlog('user-024')
+def test_session_needs_the_cleared_cookie(stub):
+    base_url = stub()
+    url = bracket_url('1', 1004, base_url)
+    with BracketSession(workers=2) as session:
+        assert session.fetch(url) is None
+        session.set_cookies(cleared())
+        html = session.fetch(url)
+        assert (session.pages, session.fallbacks) == (1, 1)
+    assert not is_captcha_page(html)
+    assert len(parse_bracket_html(html)['matches']) > 0
+
+
+@pytest.mark.backlog('user-024')
+@pytest.mark.parametrize('charset', [True, False])
+def test_non_ascii_names_without_a_charset(stub, charset):
+    base_url = stub(charset=charset)
+    with BracketSession(cleared()) as session:
+        html = session.fetch(bracket_url('1', 1004, base_url))
+    assert parse_bracket_html(html)['event_name'] == STUB_EVENT
+
+
+@pytest.mark.backlog('user-024')
+def test_fetch_all_keeps_order_and_a_bounded_window(stub):
+    base_url = stub(delay_ms=5)
+    urls = [bracket_url('1', 1000 + i, base_url) for i in range(20)]
+    expected = [BracketSession(cleared()).fetch(url) for url in urls]
+
+    StubHandler.requests_seen = 0
+    sent = []
+    with BracketSession(cleared(), workers=3) as session:
+        for i, html in enumerate(fetch_all(session, urls)):
+            # Requests go out lazily - never more than `workers` past the page handed out
+            sent.append(StubHandler.requests_seen - i)
+            assert html == expected[i]
+    assert max(sent) <= 3
+
+
+@pytest.mark.backlog('user-024')
+def test_fetch_all_uses_refreshed_cookies(stub):
+    base_url = stub(captcha_every=7)
+    urls = [bracket_url('1', 1000 + i, base_url) for i in range(40)]
+    with BracketSession(cleared(), workers=4) as session:
+        for html in fetch_all(session, urls):
+            if html is None:
+                session.set_cookies(cleared())
+        challenges = StubHandler.generation - 1
+        # Each re-challenge costs at most the requests already out with the old cookie
+        assert session.fallbacks <= challenges * 4
+        assert session.pages + session.fallbacks == 40
+
+
+@pytest.mark.backlog('user-024')
+def test_run_check_reports_counts(capsys):
+    counts = run_check(categories=12, workers=3, delay_ms=0, captcha_every=5)
+    assert counts['challenges'] == 2
+    assert counts['pages'] + counts['fallbacks'] == 12
+    assert "re-challenges ->" in capsys.readouterr().out